@@ -18,6 +18,13 @@ from app.models import (
     Collection, PromoBlock,
     Order, OrderItem,
     DesignTemplate, CustomDesignOrder,
+    CatalogState,
+    InventoryHold,
+    IdempotencyKey,
+    Cart,
+    UploadBlob,
+    DesignUpload,
+    Job,
 )
 
 # This is the Alembic Config object
@@ -0,0 +1,83 @@
+"""Catalog and order columns
+
+Adds the columns introduced on tables that existed before migrations were
+tracked; scripts/init_db.py creates missing tables but never alters existing
+ones. Safe to re-run: existing columns and indexes are skipped.
+
+Revision ID: 0b7e4d2a1c95
+Revises:
+Create Date: 2026-10-19 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e4d2a1c95"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> column -> (type, column options), mirroring the models as of this revision
+COLUMNS = {
+    "collections": {
+        "rules": (sa.JSON(none_as_null=True), {"nullable": True}),
+    },
+    "collection_product": {
+        "position": (sa.Integer(), {"nullable": False, "server_default": "0"}),
+    },
+    "variants": {
+        "reserved_qty": (sa.Integer(), {"nullable": False, "server_default": "0"}),
+    },
+    "design_templates": {
+        "preview_hash": (sa.String(64), {"nullable": True}),
+        "previews": (sa.JSON(), {"nullable": True}),
+    },
+    "orders": {
+        "cancel_reason": (sa.String(100), {"nullable": True}),
+    },
+}
+
+# table -> index name -> columns
+INDEXES = {
+    "orders": {
+        "ix_orders_status_created_at": ["status", "created_at"],
+    },
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for table, columns in COLUMNS.items():
+        existing_columns = {c["name"] for c in inspector.get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for column, (column_type, options) in columns.items():
+                if column not in existing_columns:
+                    batch_op.add_column(sa.Column(column, column_type, **options))
+
+    for table, indexes in INDEXES.items():
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table)}
+        for name, columns in indexes.items():
+            if name not in existing_indexes:
+                op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for table, indexes in INDEXES.items():
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table)}
+        for name in indexes:
+            if name in existing_indexes:
+                op.drop_index(name, table_name=table)
+
+    for table, columns in COLUMNS.items():
+        existing_columns = {c["name"] for c in inspector.get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                if column in existing_columns:
+                    batch_op.drop_column(column)
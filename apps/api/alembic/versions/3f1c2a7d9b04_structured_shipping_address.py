@@ -0,0 +1,132 @@
+"""Structured shipping address columns
+
+Adds ship_* columns and region indexes to orders and backfills them from the
+JSON shipping_address in batches, so large tables aren't locked by one
+long UPDATE. Safe to re-run: existing columns and indexes are skipped and
+only rows without ship_* values are backfilled.
+
+Revision ID: 3f1c2a7d9b04
+Revises: 0b7e4d2a1c95
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c2a7d9b04"
+down_revision: Union[str, None] = "0b7e4d2a1c95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Mirrors app.models.order.SHIPPING_ADDRESS_FIELDS as of this revision
+SHIP_COLUMNS = {
+    "ship_name": (sa.String(255), ("name",)),
+    "ship_line1": (sa.String(255), ("line1", "street")),
+    "ship_line2": (sa.String(255), ("line2",)),
+    "ship_suburb": (sa.String(100), ("suburb",)),
+    "ship_city": (sa.String(100), ("city",)),
+    "ship_province": (sa.String(50), ("province", "state")),
+    "ship_postal_code": (sa.String(10), ("postal_code",)),
+    "ship_country": (sa.String(2), ("country",)),
+}
+
+INDEXES = {
+    "ix_orders_ship_province_postal_code": ["ship_province", "ship_postal_code"],
+    "ix_orders_ship_city": ["ship_city"],
+}
+
+
+def _address_columns(shipping_address):
+    try:
+        data = json.loads(shipping_address) if shipping_address else {}
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    columns = {}
+    for column, (_, keys) in SHIP_COLUMNS.items():
+        value = next((data[key] for key in keys if data.get(key)), None)
+        columns[column] = str(value).strip() if value is not None else None
+    return columns
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_columns = {c["name"] for c in inspector.get_columns("orders")}
+    existing_indexes = {i["name"] for i in inspector.get_indexes("orders")}
+
+    with op.batch_alter_table("orders") as batch_op:
+        for column, (column_type, _) in SHIP_COLUMNS.items():
+            if column not in existing_columns:
+                batch_op.add_column(sa.Column(column, column_type, nullable=True))
+
+    for name, columns in INDEXES.items():
+        if name not in existing_indexes:
+            op.create_index(name, "orders", columns)
+
+    orders = sa.table(
+        "orders",
+        sa.column("id", sa.Integer),
+        sa.column("shipping_address", sa.Text),
+        *(sa.column(column, column_type) for column, (column_type, _) in SHIP_COLUMNS.items()),
+    )
+    update = (
+        orders.update()
+        .where(orders.c.id == sa.bindparam("order_id"))
+        .values({column: sa.bindparam(f"new_{column}") for column in SHIP_COLUMNS})
+    )
+
+    # Walk the table by id; rows whose address has no usable fields stay NULL
+    # but are still passed over, so the batches always move forward
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(orders.c.id, orders.c.shipping_address)
+            .where(
+                orders.c.id > last_id,
+                orders.c.shipping_address.isnot(None),
+                orders.c.ship_line1.is_(None),
+                orders.c.ship_city.is_(None),
+                orders.c.ship_province.is_(None),
+            )
+            .order_by(orders.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            update,
+            [
+                {
+                    "order_id": row.id,
+                    **{f"new_{column}": value for column, value in _address_columns(row.shipping_address).items()},
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_columns = {c["name"] for c in inspector.get_columns("orders")}
+    existing_indexes = {i["name"] for i in inspector.get_indexes("orders")}
+
+    for name in INDEXES:
+        if name in existing_indexes:
+            op.drop_index(name, table_name="orders")
+
+    with op.batch_alter_table("orders") as batch_op:
+        for column in SHIP_COLUMNS:
+            if column in existing_columns:
+                batch_op.drop_column(column)
@@ -0,0 +1,57 @@
+"""Order search index
+
+Creates the orders_search FTS5 trigram table and the triggers that keep it
+in step with orders, then indexes the existing rows.
+
+Revision ID: 8a5e0c4b6d21
+Revises: 3f1c2a7d9b04
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a5e0c4b6d21"
+down_revision: Union[str, None] = "3f1c2a7d9b04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mirrors app.models.order.SEARCH_COLUMNS as of this revision
+SEARCH_COLUMNS = ("customer_email", "customer_name", "customer_phone", "waybill", "payfast_payment_id")
+
+TRIGGERS = ("orders_search_insert", "orders_search_delete", "orders_search_update")
+
+
+def upgrade() -> None:
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS orders_search USING fts5("
+        f"{columns}, content='orders', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS orders_search_insert AFTER INSERT ON orders BEGIN "
+        f"INSERT INTO orders_search(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS orders_search_delete AFTER DELETE ON orders BEGIN "
+        f"INSERT INTO orders_search(orders_search, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS orders_search_update AFTER UPDATE OF {columns} ON orders BEGIN "
+        f"INSERT INTO orders_search(orders_search, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO orders_search(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    )
+    # Index every existing order from the content table
+    op.execute("INSERT INTO orders_search(orders_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS orders_search")
@@ -0,0 +1,34 @@
+"""Upload thumbnails
+
+Adds upload_blobs.thumbnails, the list of responsive thumbnails (size,
+format, URL) rendered for an image upload.
+
+Revision ID: a7c4e2d9f013
+Revises: f1a9d3c6b278
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c4e2d9f013"
+down_revision: Union[str, None] = "f1a9d3c6b278"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "thumbnails" in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("upload_blobs")}:
+        return
+
+    with op.batch_alter_table("upload_blobs") as batch_op:
+        batch_op.add_column(sa.Column("thumbnails", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("upload_blobs") as batch_op:
+        batch_op.drop_column("thumbnails")
@@ -0,0 +1,54 @@
+"""Upload blobs
+
+Adds upload_blobs, one row per distinct design file content, for
+content-addressed storage and reuse of validation results.
+
+Revision ID: c2d7f19e4a83
+Revises: 8a5e0c4b6d21
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d7f19e4a83"
+down_revision: Union[str, None] = "8a5e0c4b6d21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("upload_blobs"):
+        return
+
+    op.create_table(
+        "upload_blobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("file_id", sa.String(32), nullable=False),
+        sa.Column("storage_key", sa.String(500), nullable=False),
+        sa.Column("storage_type", sa.String(20), nullable=False),
+        sa.Column("file_url", sa.String(500), nullable=False),
+        sa.Column("thumbnail_url", sa.String(500), nullable=True),
+        sa.Column("content_type", sa.String(100), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("is_valid", sa.Boolean(), nullable=False),
+        sa.Column("validation_errors", sa.Text(), nullable=False),
+        sa.Column("validation_version", sa.Integer(), nullable=False),
+        sa.Column("upload_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_uploaded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("file_id"),
+    )
+    op.create_index("ix_upload_blobs_id", "upload_blobs", ["id"])
+    op.create_index("ix_upload_blobs_sha256", "upload_blobs", ["sha256"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_upload_blobs_sha256", table_name="upload_blobs")
+    op.drop_index("ix_upload_blobs_id", table_name="upload_blobs")
+    op.drop_table("upload_blobs")
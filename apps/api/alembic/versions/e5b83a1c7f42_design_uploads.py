@@ -0,0 +1,51 @@
+"""Design uploads
+
+Adds design_uploads, tracking design files uploaded straight to storage
+with a presigned URL, from URL issue through processing.
+
+Revision ID: e5b83a1c7f42
+Revises: c2d7f19e4a83
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b83a1c7f42"
+down_revision: Union[str, None] = "c2d7f19e4a83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ("PENDING", "UPLOADED", "PROCESSING", "READY", "FAILED")
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("design_uploads"):
+        return
+
+    op.create_table(
+        "design_uploads",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("file_id", sa.String(32), nullable=False),
+        sa.Column("file_name", sa.String(255), nullable=False),
+        sa.Column("storage_key", sa.String(500), nullable=False),
+        sa.Column("declared_size", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum(*STATUSES, name="designuploadstatus"), nullable=False),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("blob_id", sa.Integer(), sa.ForeignKey("upload_blobs.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_design_uploads_id", "design_uploads", ["id"])
+    op.create_index("ix_design_uploads_file_id", "design_uploads", ["file_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_design_uploads_file_id", table_name="design_uploads")
+    op.drop_index("ix_design_uploads_id", table_name="design_uploads")
+    op.drop_table("design_uploads")
@@ -0,0 +1,59 @@
+"""Background jobs
+
+Adds jobs, the durable queue run by scripts/run_jobs.py, and records the
+storage type of design uploads, which may now be staged locally.
+
+Revision ID: f1a9d3c6b278
+Revises: e5b83a1c7f42
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1a9d3c6b278"
+down_revision: Union[str, None] = "e5b83a1c7f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATUSES = ("QUEUED", "RUNNING", "DONE", "FAILED")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if "storage_type" not in {c["name"] for c in inspector.get_columns("design_uploads")}:
+        with op.batch_alter_table("design_uploads") as batch_op:
+            batch_op.add_column(sa.Column("storage_type", sa.String(20), nullable=False, server_default="s3"))
+
+    if inspector.has_table("jobs"):
+        return
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.Enum(*STATUSES, name="jobstatus"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_status_run_at", "jobs", ["status", "run_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_status_run_at", table_name="jobs")
+    op.drop_index("ix_jobs_id", table_name="jobs")
+    op.drop_table("jobs")
+    with op.batch_alter_table("design_uploads") as batch_op:
+        batch_op.drop_column("storage_type")
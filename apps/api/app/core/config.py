@@ -44,11 +44,75 @@ class Settings(BaseSettings):
     warehouse_postal_code: str = "0157"
     warehouse_country: str = "ZA"
 
+    # Checkout shipping
+    shipping_quote_cache_ttl_seconds: int = 600  # How long a quote is reused by later quotes/checkout
+    free_shipping_threshold: int = 2500  # Standard shipping is free from this subtotal (ZAR)
+
     # S3/Storage
     s3_bucket: str = ""
     s3_access_key: str = ""
     s3_secret_key: str = ""
     s3_endpoint_url: str = ""
+    s3_max_pool_connections: int = 32  # HTTP connections kept by the shared S3 client
+    s3_transfer_concurrency: int = 4  # Parallel parts per multipart upload
+
+    # Design uploads
+    upload_max_bytes: int = 10 * 1024 * 1024  # Largest design file accepted
+    upload_spool_memory_bytes: int = 1024 * 1024  # Uploads larger than this are spooled to disk
+    presigned_upload_expiry_seconds: int = 900  # How long a direct-to-storage upload URL is valid
+    validation_workers: int = 2  # Processes for DXF/image validation and thumbnails (0 = run inline)
+    validation_timeout_seconds: float = 30.0  # Per validation or thumbnail task
+    thumbnail_sizes: list[int] = [200, 400, 800]  # Thumbnail boxes in pixels (1x/2x/4x of the 200px preview)
+    thumbnail_formats: list[str] = ["avif", "webp", "png"]  # Best first; unsupported formats are skipped
+    upload_jobs_inline: bool = False  # Process uploads in the request instead of the job worker (no worker needed)
+
+    # Durable background job queue
+    job_worker_in_app: bool = True  # Run a job worker in each API process; off if scripts/run_jobs.py runs them
+    job_max_attempts: int = 5  # Runs before a job is marked failed
+    job_retry_base_seconds: float = 5.0  # Retry delay after the first failure; doubles each time
+    job_retry_max_seconds: float = 600.0  # Upper bound on the retry delay
+    job_lease_seconds: int = 300  # A running job is retried after this if its worker disappears
+    job_poll_seconds: float = 1.0  # Worker poll interval when the queue is empty
+    job_retention_days: int = 7  # Finished jobs are deleted after this
+
+    # Design template catalog caching
+    design_templates_snapshot_ttl_seconds: int = 300  # In-memory snapshot refresh interval
+    design_templates_cache_max_age: int = 86400  # Browser/CDN Cache-Control max-age
+    design_templates_stale_while_revalidate: int = 86400  # Cache-Control stale-while-revalidate window
+    design_templates_public_dir: str = ""  # Web public/ dir holding template SVGs (default: apps/web/public)
+
+    # Inventory
+    inventory_hold_ttl_minutes: int = 30  # How long checkout holds stock awaiting payment
+
+    # Trade-order CSV validation
+    bulk_validation_chunk_size: int = 500  # Rows priced per SKU lookup
+    bulk_validation_max_lines: int = 20000  # Larger files are rejected with 413
+
+    # Order read cache (GET /orders/{id} polling)
+    order_cache_ttl_seconds: int = 30  # Upper bound on staleness across worker processes
+
+    # Order status event streams (SSE)
+    order_events_broker: str = "local"  # "local" (one worker) or "db" (also poll for other workers' changes)
+    order_events_poll_seconds: float = 2.0  # "db" broker poll interval
+    order_events_keepalive_seconds: int = 15  # Comment line sent on idle streams
+
+    # Server-side carts
+    cart_ttl_days: int = 30  # Carts untouched for this long are deleted
+
+    # Unpaid orders
+    pending_order_ttl_minutes: int = 24 * 60  # Cancel PENDING orders older than this
+    pending_order_sweep_batch_size: int = 100  # Orders cancelled per transaction
+    pending_order_sweep_max_batches: int = 20  # Per sweep run, to bound each run's work
+
+    # Idempotency-Key handling for checkout and shipment creation
+    idempotency_key_ttl_hours: int = 24  # How long a completed response is replayed
+    # After this an in-flight key is considered abandoned; must exceed the
+    # worst-case checkout (several 30s TCG calls plus the database work)
+    idempotency_lock_seconds: int = 300
+
+    # Background jobs started with the app (preview rendering, sweeps)
+    background_jobs_enabled: bool = True
+    maintenance_interval_seconds: int = 60  # Hold expiry / idempotency key purge interval
 
     # Admin
     admin_api_key: str = "koosdoos-admin-secret-key-change-in-production"
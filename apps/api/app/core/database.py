@@ -19,6 +19,11 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def get_session_factory():
+    """Dependency for handlers that open sessions outside the request, e.g. in a stream."""
+    return SessionLocal
+
+
 def get_db():
     """Dependency to get database session."""
     db = SessionLocal()
@@ -1,10 +1,63 @@
 """KoosDoos Fire Pits - FastAPI Application."""
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
+from .core.database import SessionLocal
+from .core.middleware import BodySizeLimitMiddleware
 from .routers import health, products, collections, design_templates, cart, uploads, webhooks, admin, shipping
+from .services import (
+    template_catalog, template_previews, inventory, idempotency, order_expiry, carts, scheduler, order_events,
+    validation_pool, jobs,
+)
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def _render_template_previews():
+    """Render missing design template previews without blocking startup."""
+    db = SessionLocal()
+    try:
+        rendered = await template_previews.render_template_previews(db)
+        if rendered:
+            logger.info(f"Rendered previews for {rendered} design templates")
+            template_catalog.invalidate()
+    except Exception:
+        logger.exception("Design template preview rendering failed")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background jobs on startup and cancel them on shutdown."""
+    await validation_pool.pool.start()
+    tasks = []
+    stop_jobs = asyncio.Event()
+    if settings.background_jobs_enabled:
+        interval = settings.maintenance_interval_seconds
+        tasks.extend([
+            asyncio.create_task(_render_template_previews()),
+            asyncio.create_task(scheduler.run_periodically("Expire inventory holds", interval, inventory.expire_holds)),
+            asyncio.create_task(scheduler.run_periodically("Purge idempotency keys", interval, idempotency.purge_expired)),
+            asyncio.create_task(scheduler.run_periodically("Expire pending orders", interval, order_expiry.expire_pending_orders)),
+            asyncio.create_task(scheduler.run_periodically("Purge stale carts", interval, carts.purge_stale)),
+            asyncio.create_task(scheduler.run_periodically("Purge finished jobs", interval, jobs.purge_finished)),
+        ])
+        if isinstance(order_events.broker, order_events.PollingBroker):
+            tasks.append(asyncio.create_task(order_events.broker.run(SessionLocal)))
+        if settings.job_worker_in_app:
+            tasks.append(asyncio.create_task(jobs.work(SessionLocal, stop_jobs)))
+    yield
+    # A job interrupted here is run again once its lease runs out
+    stop_jobs.set()
+    for task in tasks:
+        task.cancel()
+    validation_pool.pool.shutdown()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -13,9 +66,19 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+)
+
+# Refuse oversized uploads while they stream in, before the multipart
+# parser spools them; the allowance covers the form's boundaries and headers.
+# Added before CORS so CORS is outermost and the 413 carries CORS headers.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    path_prefix=f"{settings.api_v1_prefix}/uploads",
+    max_bytes=settings.upload_max_bytes + 64 * 1024,
 )
 
-# Configure CORS middleware
+# Configure CORS middleware (outermost)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
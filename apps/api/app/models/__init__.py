@@ -3,6 +3,12 @@ from .product import Product, Variant, ProductImage, ReviewSummary, collection_p
 from .collection import Collection, PromoBlock
 from .order import Order, OrderItem, OrderStatus
 from .design import DesignTemplate, CustomDesignOrder, DesignCategory, CustomDesignStatus
+from .catalog import CatalogState
+from .inventory import InventoryHold, HoldStatus
+from .idempotency import IdempotencyKey
+from .cart import Cart
+from .upload import UploadBlob, DesignUpload, DesignUploadStatus
+from .job import Job, JobStatus
 
 __all__ = [
     # Product models
@@ -23,4 +29,20 @@ __all__ = [
     "CustomDesignOrder",
     "DesignCategory",
     "CustomDesignStatus",
+    # Catalog models
+    "CatalogState",
+    # Inventory models
+    "InventoryHold",
+    "HoldStatus",
+    # Idempotency models
+    "IdempotencyKey",
+    # Cart models
+    "Cart",
+    # Upload models
+    "UploadBlob",
+    "DesignUpload",
+    "DesignUploadStatus",
+    # Job models
+    "Job",
+    "JobStatus",
 ]
@@ -0,0 +1,24 @@
+"""Server-side cart model."""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, JSON
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class Cart(Base):
+    """
+    Shopper cart identified by an opaque token.
+
+    ``lines`` caches each line as last priced; ``catalog_version`` records
+    the catalog version that pricing was computed against, so an unchanged
+    cart on an unchanged catalog is served without re-pricing it.
+    """
+    __tablename__ = "carts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(String(64), unique=True, nullable=False, index=True)
+    # [{"product_id", "variant_id", "quantity", "found", "sku", "title", "price", "available_qty"}]
+    lines = Column(JSON, nullable=False, default=list)
+    subtotal = Column(Numeric(10, 2), nullable=False, default=0)
+    catalog_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
@@ -0,0 +1,13 @@
+"""Catalog state model."""
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class CatalogState(Base):
+    """Single-row catalog version counter, bumped on every catalog write."""
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
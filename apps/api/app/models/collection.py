@@ -1,5 +1,5 @@
 """Collection and promo block models."""
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from ..core.database import Base
 from .product import collection_product
@@ -13,9 +13,17 @@ class Collection(Base):
     slug = Column(String(255), unique=True, nullable=False, index=True)
     title = Column(String(255), nullable=False)
     hero_copy = Column(Text, nullable=True)
+    # Smart collection rules; when set, membership in collection_product is
+    # maintained by services.smart_collections instead of by hand.
+    rules = Column(JSON(none_as_null=True), nullable=True)
 
     # Relationships
-    products = relationship("Product", secondary=collection_product, back_populates="collections")
+    products = relationship(
+        "Product",
+        secondary=collection_product,
+        back_populates="collections",
+        order_by=[collection_product.c.position, collection_product.c.product_id],
+    )
     promo_blocks = relationship("PromoBlock", back_populates="collection", cascade="all, delete-orphan")
 
 
@@ -1,5 +1,5 @@
 """Design template and custom design order models."""
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -33,6 +33,8 @@ class DesignTemplate(Base):
     category = Column(Enum(DesignCategory), nullable=False)
     thumbnail = Column(String(500), nullable=True)  # URL to thumbnail image
     svg_path = Column(String(500), nullable=True)  # URL to SVG file
+    preview_hash = Column(String(64), nullable=True)  # SHA-256 of the SVG the previews were rendered from
+    previews = Column(JSON, nullable=True)  # [{"size": 96, "format": "webp", "url": "..."}]
 
 
 class CustomDesignOrder(Base):
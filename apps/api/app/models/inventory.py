@@ -0,0 +1,42 @@
+"""Inventory reservation models."""
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+
+class HoldStatus(enum.Enum):
+    """Inventory hold status enumeration."""
+    ACTIVE = "active"
+    CONVERTED = "converted"  # Order paid; stock decremented
+    RELEASED = "released"  # Order cancelled
+    EXPIRED = "expired"  # TTL passed before payment
+
+
+class InventoryHold(Base):
+    """
+    Stock reserved for a pending order.
+
+    Active holds are mirrored in Variant.reserved_qty so available-to-sell
+    is a column subtraction rather than an aggregate over this table.
+    """
+    __tablename__ = "inventory_holds"
+    __table_args__ = (
+        # Expiring due holds for a set of variants at reservation time
+        Index("ix_inventory_holds_variant_status_expires", "variant_id", "status", "expires_at"),
+        # Global expiry sweep
+        Index("ix_inventory_holds_status_expires", "status", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    variant_id = Column(Integer, ForeignKey("variants.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(Enum(HoldStatus), default=HoldStatus.ACTIVE, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    variant = relationship("Variant")
+    order = relationship("Order")
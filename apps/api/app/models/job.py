@@ -0,0 +1,38 @@
+"""Background job model."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+
+class JobStatus(enum.Enum):
+    """Background job status enumeration."""
+    QUEUED = "queued"  # Waiting for run_at
+    RUNNING = "running"  # Claimed by a worker until locked_until
+    DONE = "done"
+    FAILED = "failed"  # Out of attempts
+
+
+class Job(Base):
+    """
+    A unit of background work, run by a job worker (see services/jobs.py).
+
+    A worker claims a due job by setting it RUNNING with a lease. If the
+    worker dies, the job is claimed again once the lease runs out.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # Handler name, e.g. "process_design_upload"
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Not before; pushed back on retry
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,8 +1,10 @@
 """Order and order item models."""
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, Enum, Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
+from typing import Optional
 import enum
+import json
 from ..core.database import Base
 
 
@@ -17,9 +19,45 @@ class OrderStatus(enum.Enum):
     REFUNDED = "refunded"
 
 
+# ship_* column -> keys it is read from in the shipping_address JSON
+SHIPPING_ADDRESS_FIELDS = {
+    "ship_name": ("name",),
+    "ship_line1": ("line1", "street"),
+    "ship_line2": ("line2",),
+    "ship_suburb": ("suburb",),
+    "ship_city": ("city",),
+    "ship_province": ("province", "state"),
+    "ship_postal_code": ("postal_code",),
+    "ship_country": ("country",),
+}
+
+
+def shipping_address_columns(shipping_address: Optional[str]) -> dict[str, Optional[str]]:
+    """Structured ship_* column values for a JSON-encoded shipping address."""
+    try:
+        data = json.loads(shipping_address) if shipping_address else {}
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    columns = {}
+    for column, keys in SHIPPING_ADDRESS_FIELDS.items():
+        value = next((data[key] for key in keys if data.get(key)), None)
+        columns[column] = str(value).strip() if value is not None else None
+    return columns
+
+
 class Order(Base):
     """Order model for customer purchases."""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Admin status filters and the pending-order expiry sweep
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Shipping analytics and admin filters by region
+        Index("ix_orders_ship_province_postal_code", "ship_province", "ship_postal_code"),
+        Index("ix_orders_ship_city", "ship_city"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     payfast_payment_id = Column(String(255), unique=True, nullable=True, index=True)  # Payfast payment ID
@@ -31,8 +69,18 @@ class Order(Base):
     shipping_cost = Column(Numeric(10, 2), nullable=True, default=0)
     shipping_service = Column(String(50), nullable=True)  # standard, express, overnight
     shipping_address = Column(Text, nullable=True)  # JSON-encoded address
+    # Structured copy of shipping_address, kept in sync when it is set
+    ship_name = Column(String(255), nullable=True)
+    ship_line1 = Column(String(255), nullable=True)
+    ship_line2 = Column(String(255), nullable=True)
+    ship_suburb = Column(String(100), nullable=True)
+    ship_city = Column(String(100), nullable=True)
+    ship_province = Column(String(50), nullable=True)
+    ship_postal_code = Column(String(10), nullable=True)
+    ship_country = Column(String(2), nullable=True)
     waybill = Column(String(100), nullable=True, index=True)  # TCG waybill number
     tracking_url = Column(String(500), nullable=True)
+    cancel_reason = Column(String(100), nullable=True)  # e.g. "expired" when swept unpaid
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -40,6 +88,44 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     custom_design_orders = relationship("CustomDesignOrder", back_populates="order", cascade="all, delete-orphan")
 
+    @validates("shipping_address")
+    def _sync_ship_columns(self, key, value):
+        """Keep the ship_* columns in step with shipping_address."""
+        for column, column_value in shipping_address_columns(value).items():
+            setattr(self, column, column_value)
+        return value
+
+
+# Columns indexed by the orders_search full-text table
+SEARCH_COLUMNS = ("customer_email", "customer_name", "customer_phone", "waybill", "payfast_payment_id")
+
+# orders_search is an external-content FTS5 table over SEARCH_COLUMNS using
+# the trigram tokenizer, so any substring of three or more characters is an
+# index lookup. Triggers keep it in step with every write to orders.
+_search_columns = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+ORDER_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS orders_search USING fts5("
+    f"{_search_columns}, content='orders', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS orders_search_insert AFTER INSERT ON orders BEGIN "
+    f"INSERT INTO orders_search(rowid, {_search_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS orders_search_delete AFTER DELETE ON orders BEGIN "
+    f"INSERT INTO orders_search(orders_search, rowid, {_search_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS orders_search_update AFTER UPDATE OF {_search_columns} ON orders BEGIN "
+    f"INSERT INTO orders_search(orders_search, rowid, {_search_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO orders_search(rowid, {_search_columns}) VALUES (new.id, {_new_values}); END",
+)
+
+for _statement in ORDER_SEARCH_DDL:
+    event.listen(Order.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Order.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS orders_search").execute_if(dialect="sqlite"),
+)
+
 
 class OrderItem(Base):
     """Individual item within an order."""
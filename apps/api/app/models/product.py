@@ -10,6 +10,7 @@ collection_product = Table(
     Base.metadata,
     Column("collection_id", Integer, ForeignKey("collections.id"), primary_key=True),
     Column("product_id", Integer, ForeignKey("products.id"), primary_key=True),
+    Column("position", Integer, nullable=False, default=0, server_default="0"),  # Display order within the collection
 )
 
 
@@ -45,6 +46,7 @@ class Variant(Base):
     price = Column(Numeric(10, 2), nullable=False)  # Price in ZAR
     compare_at_price = Column(Numeric(10, 2), nullable=True)  # Original price for sales
     inventory_qty = Column(Integer, default=0)
+    reserved_qty = Column(Integer, default=0, server_default="0", nullable=False)  # Held by pending orders
     weight = Column(Float, nullable=True)  # Weight in kg
     dimensions_mm = Column(String(100), nullable=True)  # e.g., "600x600x450"
 
@@ -52,6 +54,11 @@ class Variant(Base):
     product = relationship("Product", back_populates="variants")
     order_items = relationship("OrderItem", back_populates="variant")
 
+    @property
+    def available_qty(self) -> int:
+        """Stock available to sell (on hand minus active holds)."""
+        return max(0, (self.inventory_qty or 0) - (self.reserved_qty or 0))
+
 
 class ProductImage(Base):
     """Product image model."""
@@ -0,0 +1,69 @@
+"""Uploaded file models."""
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, JSON, String, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from ..core.database import Base
+
+
+class DesignUploadStatus(enum.Enum):
+    """Direct-to-storage upload status enumeration."""
+    PENDING = "pending"  # Presigned URL issued, waiting for the client's upload
+    UPLOADED = "uploaded"  # Client reported completion; processing queued
+    PROCESSING = "processing"
+    READY = "ready"  # Validated and stored; see the blob
+    FAILED = "failed"
+
+
+class UploadBlob(Base):
+    """
+    A stored design file, identified by the SHA-256 of its content.
+
+    Holds where the file and its thumbnail were stored and the validation
+    outcome, so a re-upload of the same content can reuse all of them.
+    """
+    __tablename__ = "upload_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False, index=True)
+    file_id = Column(String(32), unique=True, nullable=False)  # file_id of the upload that first stored it
+    storage_key = Column(String(500), nullable=False)
+    storage_type = Column(String(20), nullable=False)  # s3 or local
+    file_url = Column(String(500), nullable=False)
+    thumbnail_url = Column(String(500), nullable=True)  # Smallest fallback-format thumbnail
+    thumbnails = Column(JSON, nullable=True)  # [{"size": 200, "format": "webp", "url": "..."}]
+    content_type = Column(String(100), nullable=False)
+    size = Column(Integer, nullable=False)
+    is_valid = Column(Boolean, nullable=False)
+    validation_errors = Column(Text, nullable=False, default="[]")  # JSON list, errors then warnings
+    validation_version = Column(Integer, nullable=False)  # upload_blobs.VALIDATION_VERSION at validation
+    upload_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class DesignUpload(Base):
+    """
+    A design file stored under a staging key, awaiting or after processing.
+
+    Either the client PUTs the file to storage_key with a presigned URL and
+    reports completion, or the upload endpoint stores it there. A job then
+    validates it and moves it to its content key, recording the outcome as
+    an UploadBlob.
+    """
+    __tablename__ = "design_uploads"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_id = Column(String(32), unique=True, nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    storage_key = Column(String(500), nullable=False)  # Staging key (local: path) the file is stored under
+    storage_type = Column(String(20), default="s3", nullable=False)  # 's3' or 'local'
+    declared_size = Column(Integer, nullable=False)
+    status = Column(Enum(DesignUploadStatus), default=DesignUploadStatus.PENDING, nullable=False)
+    error = Column(String(500), nullable=True)  # Why processing failed
+    blob_id = Column(Integer, ForeignKey("upload_blobs.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)  # Presigned URL expiry
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    blob = relationship("UploadBlob")
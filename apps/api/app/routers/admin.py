@@ -1,6 +1,7 @@
 """Admin API endpoints for product, collection, and order management."""
 from fastapi import APIRouter, Depends, HTTPException, Query, Header, status
-from sqlalchemy import text
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional
 import hashlib
@@ -22,6 +23,8 @@ from ..schemas.admin import (
     CollectionCreate,
     CollectionUpdate,
     CollectionResponse,
+    CollectionProductsRequest,
+    CollectionMembershipResponse,
     PromoBlockCreate,
     PromoBlockUpdate,
     PromoBlockResponse,
@@ -29,10 +32,13 @@ from ..schemas.admin import (
     OrderAdminResponse,
     OrderListResponse,
     OrderItemResponse,
+    ShippingRegionSummary,
+    ShippingSummaryResponse,
     MessageResponse,
     SQLQueryRequest,
     SQLQueryResponse,
 )
+from ..services import smart_collections, catalog, collection_membership, inventory, order_cache, order_events, order_search
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -141,6 +147,8 @@ async def create_product(
         )
         db.add(review)
 
+    smart_collections.refresh_product(db, product.id)
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(product)
 
@@ -180,6 +188,8 @@ async def update_product(
     for field, value in update_data.items():
         setattr(product, field, value)
 
+    smart_collections.refresh_product(db, product.id)
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(product)
 
@@ -214,6 +224,7 @@ async def delete_product(
 
     product_title = product.title
     db.delete(product)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message=f"Product '{product_title}' deleted successfully", id=product_id)
@@ -256,6 +267,8 @@ async def add_variant(
         dimensions_mm=variant_data.dimensions_mm,
     )
     db.add(variant)
+    smart_collections.refresh_product(db, product_id)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message=f"Variant '{variant_data.sku}' added successfully", id=variant.id)
@@ -289,6 +302,8 @@ async def update_variant(
     for field, value in update_data.items():
         setattr(variant, field, value)
 
+    smart_collections.refresh_product(db, variant.product_id)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message=f"Variant updated successfully", id=variant_id)
@@ -316,7 +331,10 @@ async def delete_variant(
             detail="Cannot delete variant that has existing orders.",
         )
 
+    product_id = variant.product_id
     db.delete(variant)
+    smart_collections.refresh_product(db, product_id)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message="Variant deleted successfully", id=variant_id)
@@ -341,25 +359,37 @@ async def create_collection(
             detail=f"Collection with slug '{collection_data.slug}' already exists",
         )
 
+    if collection_data.rules and collection_data.product_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Smart collections derive their products from rules; omit product_ids",
+        )
+
     collection = Collection(
         slug=collection_data.slug,
         title=collection_data.title,
         hero_copy=collection_data.hero_copy,
+        rules=collection_data.rules.model_dump(mode="json", exclude_none=True) if collection_data.rules else None,
     )
 
-    # Add products to collection
-    if collection_data.product_ids:
-        products = db.query(Product).filter(Product.id.in_(collection_data.product_ids)).all()
-        found_ids = {p.id for p in products}
-        missing_ids = set(collection_data.product_ids) - found_ids
-        if missing_ids:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Products with IDs {list(missing_ids)} not found",
-            )
-        collection.products = products
+    # Validate products before creating the collection
+    missing_ids = collection_membership.find_missing_products(db, collection_data.product_ids)
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Products with IDs {list(missing_ids)} not found",
+        )
 
     db.add(collection)
+    db.flush()  # Get collection ID
+
+    # Add products to collection
+    if collection.rules is not None:
+        smart_collections.rebuild_collection(db, collection)
+    elif collection_data.product_ids:
+        collection_membership.replace_products(db, collection.id, collection_data.product_ids)
+
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(collection)
 
@@ -391,22 +421,39 @@ async def update_collection(
             )
 
     # Update basic fields
-    update_data = collection_data.model_dump(exclude_unset=True, exclude={"product_ids"})
+    update_data = collection_data.model_dump(exclude_unset=True, exclude={"product_ids", "rules"})
     for field, value in update_data.items():
         setattr(collection, field, value)
 
-    # Update product associations if provided
+    # Update smart collection rules if provided (null converts back to manual)
+    rules_changed = "rules" in collection_data.model_fields_set
+    if rules_changed:
+        collection.rules = (
+            collection_data.rules.model_dump(mode="json", exclude_none=True)
+            if collection_data.rules else None
+        )
+
+    if collection_data.product_ids is not None and collection.rules is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Products of a smart collection are managed by its rules",
+        )
+
+    # Update product associations if provided (only the difference is written)
     if collection_data.product_ids is not None:
-        products = db.query(Product).filter(Product.id.in_(collection_data.product_ids)).all()
-        found_ids = {p.id for p in products}
-        missing_ids = set(collection_data.product_ids) - found_ids
+        missing_ids = collection_membership.find_missing_products(db, collection_data.product_ids)
         if missing_ids:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Products with IDs {list(missing_ids)} not found",
             )
-        collection.products = products
+        collection_membership.replace_products(db, collection.id, collection_data.product_ids)
+        db.expire(collection, ["products"])
+
+    if rules_changed and collection.rules is not None:
+        smart_collections.rebuild_collection(db, collection)
 
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(collection)
 
@@ -429,11 +476,121 @@ async def delete_collection(
 
     collection_title = collection.title
     db.delete(collection)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message=f"Collection '{collection_title}' deleted successfully", id=collection_id)
 
 
+def _get_collection_for_membership(db: Session, collection_id: int, allow_smart: bool = False) -> Collection:
+    """Load a collection for a membership edit without loading its products."""
+    collection = db.query(Collection).filter(Collection.id == collection_id).first()
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Collection with ID {collection_id} not found",
+        )
+    if collection.rules is not None and not allow_smart:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Products of a smart collection are managed by its rules",
+        )
+    return collection
+
+
+@router.post("/collections/{collection_id}/products", response_model=CollectionMembershipResponse)
+async def add_collection_products(
+    collection_id: int,
+    request: CollectionProductsRequest,
+    db: Session = Depends(get_db),
+    _: bool = Depends(verify_admin_token),
+):
+    """
+    Add products to a collection.
+
+    New products are appended in the given order; products that are already
+    members are left untouched.
+    """
+    _get_collection_for_membership(db, collection_id)
+
+    missing_ids = collection_membership.find_missing_products(db, request.product_ids)
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Products with IDs {sorted(missing_ids)} not found",
+        )
+
+    added = collection_membership.add_products(db, collection_id, request.product_ids)
+    version = catalog.bump_catalog_version(db) if added else catalog.get_catalog_version(db)
+    db.commit()
+
+    return CollectionMembershipResponse(
+        collection_id=collection_id,
+        added=added,
+        product_count=collection_membership.count_members(db, collection_id),
+        catalog_version=version,
+    )
+
+
+@router.delete("/collections/{collection_id}/products", response_model=CollectionMembershipResponse)
+async def remove_collection_products(
+    collection_id: int,
+    request: CollectionProductsRequest,
+    db: Session = Depends(get_db),
+    _: bool = Depends(verify_admin_token),
+):
+    """
+    Remove products from a collection.
+
+    Product IDs that are not members are ignored.
+    """
+    _get_collection_for_membership(db, collection_id)
+
+    removed = collection_membership.remove_products(db, collection_id, request.product_ids)
+    version = catalog.bump_catalog_version(db) if removed else catalog.get_catalog_version(db)
+    db.commit()
+
+    return CollectionMembershipResponse(
+        collection_id=collection_id,
+        removed=removed,
+        product_count=collection_membership.count_members(db, collection_id),
+        catalog_version=version,
+    )
+
+
+@router.put("/collections/{collection_id}/products/order", response_model=CollectionMembershipResponse)
+async def reorder_collection_products(
+    collection_id: int,
+    request: CollectionProductsRequest,
+    db: Session = Depends(get_db),
+    _: bool = Depends(verify_admin_token),
+):
+    """
+    Reorder products within a collection.
+
+    The listed products move to the front in the given order; unlisted
+    members keep their relative order after them. Smart collections can be
+    reordered too.
+    """
+    _get_collection_for_membership(db, collection_id, allow_smart=True)
+
+    not_members = collection_membership.reorder_products(db, collection_id, request.product_ids)
+    if not_members:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Products with IDs {sorted(not_members)} are not in this collection",
+        )
+
+    version = catalog.bump_catalog_version(db)
+    db.commit()
+
+    return CollectionMembershipResponse(
+        collection_id=collection_id,
+        product_count=collection_membership.count_members(db, collection_id),
+        catalog_version=version,
+    )
+
+
 # ============================================
 # Promo Block Admin Endpoints
 # ============================================
@@ -463,6 +620,7 @@ async def create_promo_block(
         image_url=promo_data.image_url,
     )
     db.add(promo)
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(promo)
 
@@ -497,6 +655,7 @@ async def update_promo_block(
     for field, value in update_data.items():
         setattr(promo, field, value)
 
+    catalog.bump_catalog_version(db)
     db.commit()
     db.refresh(promo)
 
@@ -518,6 +677,7 @@ async def delete_promo_block(
         )
 
     db.delete(promo)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message="Promo block deleted successfully", id=promo_id)
@@ -535,11 +695,20 @@ async def list_orders(
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
     customer_email: Optional[str] = Query(None, description="Filter by customer email"),
+    q: Optional[str] = Query(
+        None,
+        max_length=200,
+        description="Search order number, customer email, name and phone, waybill and Payfast payment ID",
+    ),
+    province: Optional[str] = Query(None, description="Filter by shipping province"),
+    city: Optional[str] = Query(None, description="Filter by shipping city"),
+    postal_code: Optional[str] = Query(None, description="Filter by shipping postal code"),
 ):
     """
     List all orders with pagination and optional filters.
 
-    Returns orders sorted by creation date (newest first).
+    Returns orders sorted by creation date (newest first), or by relevance
+    when searching with q.
     """
     query = db.query(Order).options(
         joinedload(Order.items).joinedload(OrderItem.product),
@@ -551,6 +720,18 @@ async def list_orders(
         query = query.filter(Order.status == status)
     if customer_email:
         query = query.filter(Order.customer_email.ilike(f"%{customer_email}%"))
+    if province:
+        query = query.filter(Order.ship_province == province)
+    if city:
+        query = query.filter(Order.ship_city == city)
+    if postal_code:
+        query = query.filter(Order.ship_postal_code == postal_code)
+
+    ordering = [Order.created_at.desc()]
+    if q and q.strip():
+        hits = order_search.matches(q)
+        query = query.join(hits, hits.c.order_id == Order.id)
+        ordering.insert(0, hits.c.rank)
 
     # Get total count
     total = query.count()
@@ -558,7 +739,7 @@ async def list_orders(
     # Apply sorting and pagination
     orders = (
         query
-        .order_by(Order.created_at.desc())
+        .order_by(*ordering)
         .offset((page - 1) * per_page)
         .limit(per_page)
         .all()
@@ -587,6 +768,7 @@ async def list_orders(
             id=order.id,
             payfast_payment_id=order.payfast_payment_id,
             status=order.status,
+            cancel_reason=order.cancel_reason,
             customer_email=order.customer_email,
             total=order.total,
             shipping_address=order.shipping_address,
@@ -605,6 +787,57 @@ async def list_orders(
     )
 
 
+@router.get("/orders/shipping-summary", response_model=ShippingSummaryResponse)
+async def shipping_summary(
+    db: Session = Depends(get_db),
+    _: bool = Depends(verify_admin_token),
+    status: Optional[OrderStatus] = Query(None, description="Only count orders with this status"),
+):
+    """
+    Order count and value per shipping province, largest first.
+
+    Orders without a shipping address are grouped under a null province.
+    """
+    query = db.query(
+        Order.ship_province,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total), 0),
+    )
+    if status:
+        query = query.filter(Order.status == status)
+    rows = query.group_by(Order.ship_province).order_by(func.count(Order.id).desc()).all()
+
+    return ShippingSummaryResponse(
+        regions=[
+            ShippingRegionSummary(province=province, orders=count, total=total)
+            for province, count, total in rows
+        ]
+    )
+
+
+@router.get("/orders/events")
+async def order_events_firehose(
+    _: bool = Depends(verify_admin_token),
+):
+    """
+    Stream status changes for all orders as Server-Sent Events.
+
+    Sends an ``order`` event for every new order and every status or
+    shipment change, for the dashboard to apply instead of re-polling the
+    order list. Idle streams get a keep-alive comment periodically.
+    """
+    async def events():
+        async with order_events.broker.subscribe() as subscription:
+            async for chunk in order_events.stream(subscription):
+                yield chunk
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/orders/{order_id}", response_model=OrderAdminResponse)
 async def get_order(
     order_id: int,
@@ -645,6 +878,7 @@ async def get_order(
         id=order.id,
         payfast_payment_id=order.payfast_payment_id,
         status=order.status,
+        cancel_reason=order.cancel_reason,
         customer_email=order.customer_email,
         total=order.total,
         shipping_address=order.shipping_address,
@@ -708,8 +942,14 @@ async def update_order_status(
         )
 
     order.status = new_status
+    if new_status == OrderStatus.CANCELLED:
+        order.cancel_reason = "admin"
+        # Return stock still held for an unpaid order
+        inventory.release_order_holds(db, order.id)
     db.commit()
+    order_cache.invalidate(order.id)
     db.refresh(order)
+    order_events.publish_order(order)
 
     items = []
     for item in order.items:
@@ -728,6 +968,7 @@ async def update_order_status(
         id=order.id,
         payfast_payment_id=order.payfast_payment_id,
         status=order.status,
+        cancel_reason=order.cancel_reason,
         customer_email=order.customer_email,
         total=order.total,
         shipping_address=order.shipping_address,
@@ -763,6 +1004,7 @@ async def add_product_image(
         sort_order=image_data.sort_order,
     )
     db.add(image)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message="Image added successfully", id=image.id)
@@ -783,6 +1025,7 @@ async def delete_product_image(
         )
 
     db.delete(image)
+    catalog.bump_catalog_version(db)
     db.commit()
 
     return MessageResponse(message="Image deleted successfully", id=image_id)
@@ -1,28 +1,45 @@
 """Cart and Checkout API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import IO, Callable, Iterator, Optional
 from sqlalchemy.orm import Session, joinedload
 from decimal import Decimal
 import json
+import tempfile
 
-from ..core.database import get_db
+import httpx
+
+from ..core.database import get_db, get_session_factory
 from ..core.config import get_settings
-from ..models.product import Product, Variant
 from ..models.order import Order, OrderItem, OrderStatus
 from ..schemas.cart import (
     CartValidateRequest,
     CartValidateResponse,
     ValidatedCartItem,
+    CartCreateRequest,
+    CartLineUpdate,
+    CartResponse,
     PayfastCheckoutRequest,
     PayfastCheckoutResponse,
     PayfastFormField,
     OrderResponse,
     OrderItemResponse,
 )
-from ..services import payfast
+from ..models.cart import Cart
+from ..services import (
+    payfast, pricing, inventory, idempotency, carts, tcg, shipping_quotes, orders, bulk_validation,
+    order_cache, order_events,
+)
 
 router = APIRouter(tags=["Cart & Checkout"])
 settings = get_settings()
 
+# Bulk validation results stay in memory up to this size, then spill to disk
+BULK_RESULT_SPOOL_BYTES = 1024 * 1024
+
+# Keep proxies from buffering or caching event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 @router.post("/cart/validate", response_model=CartValidateResponse)
 async def validate_cart(
@@ -42,46 +59,37 @@ async def validate_cart(
     subtotal = Decimal("0.00")
     all_valid = True
 
-    for item in request.items:
-        # Fetch variant with product data
-        variant = (
-            db.query(Variant)
-            .options(joinedload(Variant.product))
-            .filter(
-                Variant.id == item.variant_id,
-                Variant.product_id == item.product_id,
-            )
-            .first()
-        )
+    for line in pricing.price_lines(db, request.items):
+        variant = line.variant
 
         if not variant:
-            errors.append(f"Product/variant combination not found: {item.product_id}/{item.variant_id}")
+            errors.append(f"Product/variant combination not found: {line.product_id}/{line.variant_id}")
             all_valid = False
             continue
 
         # Check availability
-        available = variant.inventory_qty >= item.quantity
+        available = line.available
         if not available:
             errors.append(
-                f"{variant.product.title} ({variant.sku}): Only {variant.inventory_qty} available, {item.quantity} requested"
+                f"{variant.product.title} ({variant.sku}): Only {variant.available_qty} available, {line.quantity} requested"
             )
             all_valid = False
 
         # Calculate line total
-        line_total = variant.price * item.quantity
+        line_total = line.line_total
         subtotal += line_total
 
         validated_items.append(
             ValidatedCartItem(
-                product_id=item.product_id,
-                variant_id=item.variant_id,
-                quantity=item.quantity,
+                product_id=line.product_id,
+                variant_id=line.variant_id,
+                quantity=line.quantity,
                 sku=variant.sku,
                 title=variant.product.title,
                 price=variant.price,
                 line_total=line_total,
                 available=available,
-                available_qty=variant.inventory_qty,
+                available_qty=variant.available_qty,
             )
         )
 
@@ -93,10 +101,181 @@ async def validate_cart(
     )
 
 
+@router.post("/cart/validate/bulk")
+async def validate_cart_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Validate a trade-order spreadsheet.
+
+    Send the CSV as the raw request body (Content-Type: text/csv), one
+    ``sku,quantity`` row per line; a header row is optional. The file is
+    parsed as it arrives and SKUs are looked up a chunk at a time.
+
+    Returns NDJSON: one record per row in file order, either ``"type":
+    "line"`` (pricing and availability, as in /cart/validate) or ``"type":
+    "error"``, then a final ``"type": "summary"`` record.
+    """
+    # Results are spooled and sent once the upload has been read: while a
+    # streaming response is being sent, Starlette reads the same receive
+    # channel to watch for disconnects, so the body can't be read then.
+    results = tempfile.SpooledTemporaryFile(max_size=BULK_RESULT_SPOOL_BYTES)
+    try:
+        rows = bulk_validation.iter_csv_rows(request.stream())
+        async for record in bulk_validation.validate_rows(db, rows):
+            results.write(record.model_dump_json().encode("utf-8") + b"\n")
+    except bulk_validation.TooManyLines as e:
+        results.close()
+        raise HTTPException(
+            status_code=413,
+            detail=f"CSV has more than {e.limit} lines; split it into smaller files"
+        )
+    except bulk_validation.LineTooLong as e:
+        results.close()
+        raise HTTPException(
+            status_code=413,
+            detail=f"CSV line longer than {e.limit} characters"
+        )
+    except BaseException:
+        results.close()
+        raise
+
+    results.seek(0)
+    return StreamingResponse(_read_and_close(results), media_type="application/x-ndjson")
+
+
+def _read_and_close(file: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Stream a file's contents, closing it afterwards."""
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+@router.post("/carts", response_model=CartResponse, status_code=201)
+async def create_cart(
+    request: CartCreateRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Create a server-side cart.
+
+    Returns an opaque cart token; keep it (e.g. in local storage) and use it
+    for the other /carts endpoints.
+
+    - **items**: Optional initial cart items
+    """
+    cart = carts.create_cart(db, request.items)
+    db.commit()
+    return _cart_response(cart)
+
+
+@router.get("/carts/{token}", response_model=CartResponse)
+async def get_cart(
+    token: str,
+    db: Session = Depends(get_db),
+):
+    """
+    Get a cart with current pricing.
+
+    Cached prices are returned unless the catalog changed since the cart was
+    last priced, in which case every line is re-priced in one pass. Stock
+    levels are always current.
+    """
+    cart = _get_cart_or_404(db, token)
+    if carts.refresh(db, cart):
+        db.commit()
+    return _cart_response(cart)
+
+
+@router.put("/carts/{token}/items/{variant_id}", response_model=CartResponse)
+async def set_cart_line(
+    token: str,
+    variant_id: int,
+    line: CartLineUpdate,
+    db: Session = Depends(get_db),
+):
+    """
+    Set the quantity of a cart line.
+
+    Adds the line if it's new and removes it if quantity is 0. Only this line
+    is re-priced.
+    """
+    cart = _get_cart_or_404(db, token)
+    carts.set_line(db, cart, line.product_id, variant_id, line.quantity)
+    db.commit()
+    return _cart_response(cart)
+
+
+@router.delete("/carts/{token}/items/{variant_id}", response_model=CartResponse)
+async def remove_cart_line(
+    token: str,
+    variant_id: int,
+    product_id: int,
+    db: Session = Depends(get_db),
+):
+    """Remove a line from the cart."""
+    cart = _get_cart_or_404(db, token)
+    carts.set_line(db, cart, product_id, variant_id, 0)
+    db.commit()
+    return _cart_response(cart)
+
+
+def _get_cart_or_404(db: Session, token: str) -> Cart:
+    """Look up a cart by token or raise 404."""
+    cart = carts.get_cart(db, token)
+    if not cart:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart
+
+
+def _cart_response(cart: Cart) -> CartResponse:
+    """Build the cart response from cached lines, with the same checks as /cart/validate."""
+    items: list[ValidatedCartItem] = []
+    errors: list[str] = []
+
+    for line in cart.lines:
+        if not line["found"]:
+            errors.append(f"Product/variant combination not found: {line['product_id']}/{line['variant_id']}")
+            continue
+
+        available = line["available_qty"] >= line["quantity"]
+        if not available:
+            errors.append(
+                f"{line['title']} ({line['sku']}): Only {line['available_qty']} available, {line['quantity']} requested"
+            )
+
+        items.append(
+            ValidatedCartItem(
+                product_id=line["product_id"],
+                variant_id=line["variant_id"],
+                quantity=line["quantity"],
+                sku=line["sku"],
+                title=line["title"],
+                price=Decimal(line["price"]),
+                line_total=carts.line_total(line),
+                available=available,
+                available_qty=line["available_qty"],
+            )
+        )
+
+    return CartResponse(
+        token=cart.token,
+        valid=not errors and len(items) > 0,
+        items=items,
+        subtotal=cart.subtotal,
+        errors=errors,
+        catalog_version=cart.catalog_version,
+    )
+
+
 @router.post("/checkout/payfast", response_model=PayfastCheckoutResponse)
 async def create_payfast_checkout(
     request: PayfastCheckoutRequest,
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     """
     Create a Payfast checkout for the cart.
@@ -104,50 +283,86 @@ async def create_payfast_checkout(
     Creates a pending order and returns form data for posting to Payfast.
     The frontend should create a hidden form with the returned fields and submit it.
 
+    Shipping is quoted by the server for **shipping_service** and the delivery
+    province; standard shipping is free from the free-shipping threshold.
+
     Flow:
-    1. Validate cart items
-    2. Create pending order with shipping address
+    1. Validate cart items and quote shipping for the delivery province
+    2. Create pending order with shipping address and hold its stock
     3. Generate Payfast form data with signature
     4. Return form fields for frontend to submit
 
     After successful payment, Payfast will:
     - Redirect user to return_url (order confirmation page)
     - Send ITN to notify_url (our webhook) to confirm payment
+
+    Send an **Idempotency-Key** header to make retries safe: a repeated
+    request with the same key and body returns the original response
+    instead of creating another order.
     """
+    try:
+        response, replayed = await idempotency.run(
+            db,
+            "checkout.payfast",
+            idempotency_key,
+            request,
+            lambda: _create_payfast_checkout(request, db),
+        )
+    except idempotency.IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different checkout request"
+        )
+    except idempotency.IdempotencyKeyInProgress:
+        raise HTTPException(
+            status_code=409,
+            detail="A checkout request with this Idempotency-Key is still being processed"
+        )
+
+    if replayed:
+        return JSONResponse(content=response, headers={"Idempotent-Replayed": "true"})
+    return response
+
+
+async def _create_payfast_checkout(
+    request: PayfastCheckoutRequest,
+    db: Session,
+) -> PayfastCheckoutResponse:
+    """Validate the cart, quote shipping, create the pending order and build the Payfast form."""
+    address = request.shipping_address
+    destination = tcg.Address(
+        street=address.street,
+        suburb=address.suburb,
+        city=address.city,
+        province=address.province,
+        postal_code=address.postal_code,
+        country=address.country,
+    )
+
+    priced_lines = pricing.price_lines(db, request.items)
+
     # Validate all items and calculate total
     subtotal = Decimal("0.00")
     order_items_data = []
 
-    for item in request.items:
-        variant = (
-            db.query(Variant)
-            .options(joinedload(Variant.product))
-            .filter(
-                Variant.id == item.variant_id,
-                Variant.product_id == item.product_id,
-            )
-            .first()
-        )
+    for line in priced_lines:
+        variant = line.variant
 
         if not variant:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid product/variant: {item.product_id}/{item.variant_id}"
+                detail=f"Invalid product/variant: {line.product_id}/{line.variant_id}"
             )
 
-        if variant.inventory_qty < item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock for {variant.product.title}: {variant.inventory_qty} available"
-            )
+        # Stock is checked atomically when the order's holds are taken below
 
-        line_total = variant.price * item.quantity
+        line_total = line.line_total
         subtotal += line_total
 
         order_items_data.append({
-            "product_id": item.product_id,
-            "variant_id": item.variant_id,
-            "quantity": item.quantity,
+            "product_id": line.product_id,
+            "variant_id": line.variant_id,
+            "quantity": line.quantity,
             "price": variant.price,
             "title": variant.product.title,
         })
@@ -155,25 +370,48 @@ async def create_payfast_checkout(
     if not order_items_data:
         raise HTTPException(status_code=400, detail="Cart is empty")
 
+    # Parcels come from the priced variants' SKUs; the quote the shopper
+    # fetched in the cart is usually still cached
+    parcels = shipping_quotes.parcels_for_skus((line.variant.sku, line.quantity) for line in priced_lines)
+    quotes = await _quote_shipping(destination, parcels)
+
+    quote = shipping_quotes.find_quote(quotes, request.shipping_service)
+    if not quote:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Shipping service not available for {address.province}: {request.shipping_service}"
+        )
+
     # Calculate total with shipping
-    shipping_cost = request.shipping_cost
+    shipping_cost = quote.price
+    if request.shipping_service == "standard" and subtotal >= settings.free_shipping_threshold:
+        shipping_cost = Decimal("0.00")
     total = subtotal + shipping_cost
 
     # Build shipping address JSON
     shipping_address_json = json.dumps({
-        "line1": request.shipping_address.street,
-        "suburb": request.shipping_address.suburb,
-        "city": request.shipping_address.city,
-        "state": request.shipping_address.province,
-        "province": request.shipping_address.province,
-        "postal_code": request.shipping_address.postal_code,
-        "country": request.shipping_address.country,
+        "line1": address.street,
+        "suburb": address.suburb,
+        "city": address.city,
+        "state": address.province,
+        "province": address.province,
+        "postal_code": address.postal_code,
+        "country": address.country,
         "name": f"{request.customer_first_name} {request.customer_last_name}".strip(),
     })
 
-    # Create pending order
-    order = Order(
-        status=OrderStatus.PENDING,
+    # Create pending order and its items (two statements however many lines)
+    order_id = orders.create_order(
+        db,
+        [
+            orders.NewOrderItem(
+                product_id=item_data["product_id"],
+                variant_id=item_data["variant_id"],
+                quantity=item_data["quantity"],
+                price=item_data["price"],
+            )
+            for item_data in order_items_data
+        ],
         customer_email=request.customer_email,
         customer_name=f"{request.customer_first_name} {request.customer_last_name}".strip(),
         customer_phone=request.customer_phone,
@@ -182,37 +420,41 @@ async def create_payfast_checkout(
         shipping_service=request.shipping_service,
         shipping_address=shipping_address_json,
     )
-    db.add(order)
-    db.flush()  # Get order ID
-
-    # Create order items
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item_data["product_id"],
-            variant_id=item_data["variant_id"],
-            quantity=item_data["quantity"],
-            price=item_data["price"],
+
+    # Hold stock until the payment completes or the hold expires. This is the
+    # availability check: it also frees holds whose TTL has passed.
+    try:
+        inventory.reserve_order(
+            db,
+            order_id,
+            [(item_data["variant_id"], item_data["quantity"]) for item_data in order_items_data],
+        )
+    except inventory.InsufficientStock as e:
+        db.rollback()
+        title = next(d["title"] for d in order_items_data if d["variant_id"] == e.variant_id)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for {title}: {e.available} available"
         )
-        db.add(order_item)
 
     db.commit()
+    order_events.publish(order_events.OrderEvent(order_id, OrderStatus.PENDING.value))
 
     # Build item name for Payfast
     item_count = sum(item.quantity for item in request.items)
-    item_name = f"KoosDoos Fire Pit Order #{order.id}"
+    item_name = f"KoosDoos Fire Pit Order #{order_id}"
     if item_count > 1:
-        item_name = f"KoosDoos Fire Pits ({item_count} items) - Order #{order.id}"
+        item_name = f"KoosDoos Fire Pits ({item_count} items) - Order #{order_id}"
 
     # Generate Payfast form data
     form_data = payfast.build_payment_form_data(
-        order_id=str(order.id),
+        order_id=str(order_id),
         amount=total,
         item_name=item_name,
         customer_email=request.customer_email,
         customer_first_name=request.customer_first_name,
         customer_last_name=request.customer_last_name,
-        item_description=f"Order #{order.id} - {item_count} item(s)",
+        item_description=f"Order #{order_id} - {item_count} item(s)",
         custom_str1=request.shipping_service,  # Store shipping service
     )
 
@@ -224,13 +466,27 @@ async def create_payfast_checkout(
     ]
 
     return PayfastCheckoutResponse(
-        order_id=order.id,
+        order_id=order_id,
         payfast_url=payfast.get_payfast_url(),
         form_fields=form_fields,
         total=total,
     )
 
 
+async def _quote_shipping(
+    destination: tcg.Address,
+    parcels: list[tcg.Parcel],
+) -> list[tcg.ShippingQuote]:
+    """Quote shipping for checkout."""
+    try:
+        return await shipping_quotes.get_quotes(destination, parcels)
+    except httpx.HTTPError:
+        raise HTTPException(
+            status_code=503,
+            detail="Shipping quotes are temporarily unavailable, please try again"
+        )
+
+
 @router.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
@@ -240,9 +496,16 @@ async def get_order(
     Get order details by ID.
 
     Returns full order information including items, status, and shipping address.
+    Responses are cached per order until something changes the order, so the
+    order-confirmation page can poll this cheaply.
 
     - **order_id**: The order ID to retrieve
     """
+    cached = order_cache.get(order_id)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    generation = order_cache.generation()
     order = (
         db.query(Order)
         .options(
@@ -271,7 +534,7 @@ async def get_order(
             )
         )
 
-    return OrderResponse(
+    body = OrderResponse(
         id=order.id,
         payfast_payment_id=order.payfast_payment_id,
         status=order.status.value,
@@ -285,4 +548,40 @@ async def get_order(
         tracking_url=order.tracking_url,
         items=order_items,
         created_at=order.created_at.isoformat() if order.created_at else "",
-    )
+    ).model_dump_json().encode("utf-8")
+
+    order_cache.put(order_id, body, generation)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/orders/{order_id}/events")
+async def order_events_stream(
+    order_id: int,
+    db: Session = Depends(get_db),
+    session_factory: Callable[[], Session] = Depends(get_session_factory),
+):
+    """
+    Stream an order's status changes as Server-Sent Events.
+
+    Sends the order's current state first, then an ``order`` event whenever
+    it is paid, shipped, cancelled etc. The stream ends once the order reaches
+    a final status (delivered, cancelled or refunded). An order cancelled
+    because it expired unpaid stays open, as a late payment can still complete
+    it. Use this instead of polling GET /orders/{order_id}.
+    """
+    if not db.query(Order.id).filter(Order.id == order_id).first():
+        raise HTTPException(status_code=404, detail=f"Order {order_id} not found")
+
+    async def events():
+        async with order_events.broker.subscribe(order_id) as subscription:
+            # Read the current state after subscribing so no change is missed.
+            # The request's session is closed by now; use a fresh one.
+            stream_db = session_factory()
+            try:
+                current = order_events.OrderEvent.from_order(stream_db.get(Order, order_id))
+            finally:
+                stream_db.close()
+            async for chunk in order_events.stream(subscription, (current,), stop_on_final=True):
+                yield chunk
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
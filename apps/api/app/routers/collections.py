@@ -1,32 +1,153 @@
 """Collection API endpoints."""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, distinct, and_
 from sqlalchemy.orm import Session, joinedload
+from typing import Optional
 
 from ..core.database import get_db
 from ..models.collection import Collection
-from ..models.product import Product
+from ..models.product import Product, Variant, ProductImage, collection_product
 from ..schemas.collection import CollectionList, CollectionDetail, CollectionListResponse
 
 router = APIRouter(prefix="/collections", tags=["Collections"])
 
+# Optional aggregates that can be requested on the collection index
+COLLECTION_LIST_INCLUDES = {"counts", "preview"}
+
 
 @router.get("", response_model=CollectionListResponse)
 async def list_collections(
     db: Session = Depends(get_db),
+    with_: Optional[str] = Query(
+        None,
+        alias="with",
+        description="Comma-separated extras: counts (product count and price range), preview (image URLs)",
+    ),
+    preview_limit: int = Query(3, ge=1, le=12, description="Number of preview images per collection"),
 ):
     """
     List all collections.
 
     Returns a list of all product collections without their associated products.
     Use GET /collections/{slug} to get a collection with its products.
+
+    - **with**: `counts` adds product_count, price_min and price_max;
+      `preview` adds the first image URL of up to `preview_limit` products
     """
-    collections = db.query(Collection).order_by(Collection.id.asc()).all()
+    includes = {part.strip().lower() for part in with_.split(",") if part.strip()} if with_ else set()
+    unknown = includes - COLLECTION_LIST_INCLUDES
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown 'with' value(s): {', '.join(sorted(unknown))}. Allowed: counts, preview",
+        )
+
+    if not includes:
+        collections = db.query(Collection).order_by(Collection.id.asc()).all()
+
+        return CollectionListResponse(
+            collections=[CollectionList.model_validate(c) for c in collections],
+            total=len(collections),
+        )
 
-    return CollectionListResponse(
-        collections=[CollectionList.model_validate(c) for c in collections],
-        total=len(collections),
+    collections = _list_collections_with_aggregates(
+        db,
+        counts="counts" in includes,
+        preview_limit=preview_limit if "preview" in includes else 0,
     )
 
+    return CollectionListResponse(collections=collections, total=len(collections))
+
+
+def _list_collections_with_aggregates(db: Session, counts: bool, preview_limit: int) -> list[CollectionList]:
+    """
+    Build the collection index with aggregates in a single query.
+
+    Product counts and price ranges come from a grouped subquery; preview
+    images are each member product's first image, ranked per collection with
+    window functions. Collection products are never loaded as objects.
+    """
+    columns = [Collection.id, Collection.slug, Collection.title, Collection.hero_copy]
+    query = select(*columns)
+
+    if counts:
+        stats = (
+            select(
+                collection_product.c.collection_id,
+                func.count(distinct(collection_product.c.product_id)).label("product_count"),
+                func.min(Variant.price).label("price_min"),
+                func.max(Variant.price).label("price_max"),
+            )
+            .select_from(
+                collection_product.outerjoin(Variant, Variant.product_id == collection_product.c.product_id)
+            )
+            .group_by(collection_product.c.collection_id)
+            .subquery()
+        )
+        query = query.add_columns(stats.c.product_count, stats.c.price_min, stats.c.price_max)
+        query = query.outerjoin(stats, stats.c.collection_id == Collection.id)
+
+    if preview_limit:
+        first_images = select(
+            ProductImage.product_id,
+            ProductImage.url,
+            func.row_number().over(
+                partition_by=ProductImage.product_id,
+                order_by=(ProductImage.sort_order, ProductImage.id),
+            ).label("image_rank"),
+        ).subquery()
+        previews = (
+            select(
+                collection_product.c.collection_id,
+                first_images.c.url,
+                func.row_number().over(
+                    partition_by=collection_product.c.collection_id,
+                    order_by=(collection_product.c.position, collection_product.c.product_id),
+                ).label("preview_rank"),
+            )
+            .select_from(
+                collection_product.join(
+                    first_images,
+                    and_(
+                        first_images.c.product_id == collection_product.c.product_id,
+                        first_images.c.image_rank == 1,
+                    ),
+                )
+            )
+            .subquery()
+        )
+        query = query.add_columns(previews.c.url.label("preview_url"))
+        query = query.outerjoin(
+            previews,
+            and_(previews.c.collection_id == Collection.id, previews.c.preview_rank <= preview_limit),
+        )
+        query = query.order_by(Collection.id.asc(), previews.c.preview_rank.asc())
+    else:
+        query = query.order_by(Collection.id.asc())
+
+    # One row per collection, or one per preview image when previews are joined
+    results: dict[int, CollectionList] = {}
+    for row in db.execute(query):
+        item = results.get(row.id)
+        if item is None:
+            item = CollectionList(
+                id=row.id,
+                slug=row.slug,
+                title=row.title,
+                hero_copy=row.hero_copy,
+            )
+            if counts:
+                item.product_count = row.product_count or 0
+                item.price_min = row.price_min
+                item.price_max = row.price_max
+            if preview_limit:
+                item.preview_images = []
+            results[row.id] = item
+        if preview_limit and row.preview_url:
+            item.preview_images.append(row.preview_url)
+
+    return list(results.values())
+
 
 @router.get("/{slug}", response_model=CollectionDetail)
 async def get_collection_by_slug(
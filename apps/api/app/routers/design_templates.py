@@ -1,17 +1,25 @@
 """Design template API endpoints."""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from ..core.database import get_db
-from ..models.design import DesignTemplate, DesignCategory
-from ..schemas.design import DesignTemplateBase, DesignTemplateListResponse
+from ..core.config import get_settings
+from ..models.design import DesignCategory
+from ..schemas.design import DesignTemplateListResponse
+from ..services import template_catalog
 
 router = APIRouter(prefix="/design-templates", tags=["Design Templates"])
 
 
-@router.get("", response_model=DesignTemplateListResponse)
+@router.get(
+    "",
+    response_model=DesignTemplateListResponse,
+    responses={304: {"description": "Template list unchanged since the given ETag"}},
+)
 async def list_design_templates(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     category: Optional[DesignCategory] = Query(
         None,
@@ -25,19 +33,30 @@ async def list_design_templates(
 
     Returns a list of pre-made design templates that customers can choose from
     for their personalised fire pit orders.
+
+    Served from an in-memory snapshot with an ETag and a long Cache-Control;
+    send If-None-Match to get a 304 when nothing changed.
     """
-    query = db.query(DesignTemplate)
+    snapshot = template_catalog.get_snapshot(db)
+    etag = snapshot.etag(category)
 
-    # Apply category filter if provided
-    if category:
-        query = query.filter(DesignTemplate.category == category)
+    settings = get_settings()
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.design_templates_cache_max_age}, "
+            f"stale-while-revalidate={settings.design_templates_stale_while_revalidate}"
+        ),
+    }
 
-    # Order by category then name
-    query = query.order_by(DesignTemplate.category, DesignTemplate.name)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=cache_headers)
 
-    templates = query.all()
+    response.headers.update(cache_headers)
 
+    templates = snapshot.filter(category)
     return DesignTemplateListResponse(
-        templates=[DesignTemplateBase.model_validate(t) for t in templates],
+        templates=templates,
         total=len(templates),
     )
@@ -1,5 +1,6 @@
 """Shipping API endpoints for The Courier Guy integration."""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -8,7 +9,8 @@ from datetime import datetime
 
 from ..core.database import get_db
 from ..models.order import Order, OrderStatus
-from ..services import tcg
+from ..services import tcg, idempotency, shipping_quotes, order_cache, order_events
+from ..services.shipping_quotes import PRODUCT_PARCELS, get_parcel_for_variant
 
 router = APIRouter(prefix="/shipping", tags=["Shipping"])
 
@@ -107,47 +109,6 @@ class TrackingResponse(BaseModel):
     current_status: str
 
 
-# ============================================================================
-# Default parcel sizes for KoosDoos products
-# ============================================================================
-
-# Product dimensions in flat-pack form (L x W x H in cm, weight in kg)
-PRODUCT_PARCELS = {
-    "small": {"length": 60, "width": 60, "height": 15, "weight": 15},
-    "medium": {"length": 70, "width": 70, "height": 15, "weight": 22},
-    "large": {"length": 80, "width": 80, "height": 18, "weight": 30},
-    "xl": {"length": 90, "width": 90, "height": 20, "weight": 40},
-    "personalised_medium": {"length": 70, "width": 70, "height": 15, "weight": 22},
-    "personalised_large": {"length": 80, "width": 80, "height": 18, "weight": 30},
-    "personalised_xl": {"length": 90, "width": 90, "height": 20, "weight": 40},
-}
-
-
-def get_parcel_for_variant(variant_sku: str) -> tcg.Parcel:
-    """Get parcel dimensions for a variant SKU."""
-    # Map SKU prefixes to parcel sizes
-    sku_lower = variant_sku.lower()
-
-    if "xl" in sku_lower:
-        size = "xl"
-    elif "large" in sku_lower or "lg" in sku_lower:
-        size = "large"
-    elif "medium" in sku_lower or "med" in sku_lower:
-        size = "medium"
-    else:
-        size = "small"
-
-    dims = PRODUCT_PARCELS.get(size, PRODUCT_PARCELS["medium"])
-
-    return tcg.Parcel(
-        length=dims["length"],
-        width=dims["width"],
-        height=dims["height"],
-        weight=dims["weight"],
-        description=f"KoosDoos Fire Pit ({size.title()})",
-    )
-
-
 # ============================================================================
 # API Endpoints
 # ============================================================================
@@ -187,8 +148,8 @@ async def get_shipping_quote(request: ShippingQuoteRequest):
         for p in request.parcels
     ]
 
-    # Get quotes from TCG service
-    quotes = await tcg.get_shipping_quotes(destination, parcels)
+    # Get quotes from TCG (cached briefly so checkout can reuse them)
+    quotes = await shipping_quotes.get_quotes(destination, parcels)
 
     # Get warehouse address for response
     warehouse = tcg.get_warehouse_address()
@@ -249,7 +210,7 @@ async def get_simple_shipping_quote(
     ]
 
     # Get quotes
-    quotes = await tcg.get_shipping_quotes(destination, parcels)
+    quotes = await shipping_quotes.get_quotes(destination, parcels)
 
     return {
         "province": province,
@@ -271,6 +232,7 @@ async def get_simple_shipping_quote(
 async def create_shipment(
     request: CreateShipmentRequest,
     db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     """
     Create a shipment for an order.
@@ -279,7 +241,36 @@ async def create_shipment(
     The waybill number will be stored on the order for tracking.
 
     In sandbox mode (TCG_SANDBOX=true), returns a mock waybill and tracking URL.
+
+    Send an **Idempotency-Key** header so a retried request replays the
+    original waybill instead of booking a second collection.
     """
+    try:
+        response, replayed = await idempotency.run(
+            db,
+            "shipping.create",
+            idempotency_key,
+            request,
+            lambda: _create_shipment(request, db),
+        )
+    except idempotency.IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different shipment request"
+        )
+    except idempotency.IdempotencyKeyInProgress:
+        raise HTTPException(
+            status_code=409,
+            detail="A shipment request with this Idempotency-Key is still being processed"
+        )
+
+    if replayed:
+        return JSONResponse(content=response, headers={"Idempotent-Replayed": "true"})
+    return response
+
+
+async def _create_shipment(request: CreateShipmentRequest, db: Session) -> ShipmentResponse:
+    """Book the courier collection for a paid order and store the waybill."""
     # Get the order
     order = db.query(Order).filter(Order.id == request.order_id).first()
     if not order:
@@ -299,24 +290,17 @@ async def create_shipment(
             detail=f"Shipment already created for this order (waybill: {order.waybill})"
         )
 
-    # Parse shipping address
-    import json
-    try:
-        address_data = json.loads(order.shipping_address) if order.shipping_address else {}
-    except json.JSONDecodeError:
-        address_data = {}
-
-    if not address_data:
+    if not (order.ship_line1 or order.ship_city or order.ship_province):
         raise HTTPException(status_code=400, detail="Order has no shipping address")
 
     destination = tcg.Address(
-        street=address_data.get("line1", "") + " " + address_data.get("line2", ""),
-        suburb=address_data.get("suburb", address_data.get("city", "")),
-        city=address_data.get("city", ""),
-        province=address_data.get("state", address_data.get("province", "")),
-        postal_code=address_data.get("postal_code", ""),
-        country=address_data.get("country", "ZA"),
-        contact_name=address_data.get("name", order.customer_name),
+        street=" ".join(filter(None, [order.ship_line1, order.ship_line2])),
+        suburb=order.ship_suburb or order.ship_city or "",
+        city=order.ship_city or "",
+        province=order.ship_province or "",
+        postal_code=order.ship_postal_code or "",
+        country=order.ship_country or "ZA",
+        contact_name=order.ship_name or order.customer_name,
         contact_phone=order.customer_phone,
         contact_email=order.customer_email,
     )
@@ -346,6 +330,8 @@ async def create_shipment(
     order.shipping_service = request.service_type
     order.status = OrderStatus.PROCESSING
     db.commit()
+    order_cache.invalidate(order.id)
+    order_events.publish_order(order)
 
     return ShipmentResponse(
         waybill=shipment.waybill,
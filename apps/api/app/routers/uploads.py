@@ -1,15 +1,22 @@
 """Upload endpoints for design files."""
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from typing import Optional
+from sqlalchemy.orm import Session
 from datetime import datetime
-import io
 
+from ..core.config import get_settings
+from ..core.database import get_db
+from ..models.job import Job
+from ..models.upload import DesignUpload, DesignUploadStatus
 from ..schemas.upload import (
     UploadDesignResponse,
     DXFValidationResult,
     UploadErrorResponse,
+    PresignUploadRequest,
+    PresignUploadResponse,
+    DesignUploadStatusResponse,
 )
-from ..services.storage import StorageService
+from ..services import design_uploads, jobs, upload_blobs, upload_spool
+from ..services.storage import StorageService, get_storage
 from ..services.dxf_validator import DXFValidator, ImageValidator
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
@@ -28,13 +35,13 @@ ALLOWED_MIME_TYPES = {
     "application/octet-stream": None,  # Need to check extension
 }
 
-# Maximum file size (10MB)
-MAX_FILE_SIZE = 10 * 1024 * 1024
+# Maximum file size (10MB by default)
+MAX_FILE_SIZE = get_settings().upload_max_bytes
 
 
 def get_storage_service() -> StorageService:
     """Dependency to get storage service."""
-    return StorageService()
+    return get_storage()
 
 
 def get_dxf_validator() -> DXFValidator:
@@ -60,8 +67,7 @@ def get_image_validator() -> ImageValidator:
 async def upload_design(
     file: UploadFile = File(..., description="Design file to upload"),
     storage_service: StorageService = Depends(get_storage_service),
-    dxf_validator: DXFValidator = Depends(get_dxf_validator),
-    image_validator: ImageValidator = Depends(get_image_validator),
+    db: Session = Depends(get_db),
 ) -> UploadDesignResponse:
     """
     Upload a custom design file for personalised fire pit.
@@ -74,6 +80,13 @@ async def upload_design(
 
     DXF files undergo additional validation to ensure compatibility
     with laser cutting equipment.
+
+    The response is sent once the file is stored, with status
+    "uploaded"; validation and the thumbnail follow in the background.
+    Poll `GET /uploads/{file_id}/status` for the result.
+
+    Files are stored by content hash: uploading the same file again
+    returns the stored file, thumbnail and validation result straight away.
     """
     # Check filename
     if not file.filename:
@@ -82,83 +95,130 @@ async def upload_design(
             detail="File must have a filename"
         )
 
-    # Get file extension
-    filename_lower = file.filename.lower()
-    file_ext = "." + filename_lower.split(".")[-1] if "." in filename_lower else ""
+    _check_extension(file.filename)
 
-    # Validate extension
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File type '{file_ext}' is not allowed. Allowed types: PNG, JPG, SVG, DXF"
-        )
+    upload = await _spool_upload(file)
+    try:
+        try:
+            design_uploads.check(upload, file.filename)
+        except design_uploads.InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        blob = upload_blobs.find(db, upload.sha256)
+        if blob is not None:
+            return _upload_response(design_uploads.record_duplicate(db, blob, file.filename))
 
-    # Read file content
-    file_content = await file.read()
-    file_size = len(file_content)
+        record, job = await design_uploads.stage(db, storage_service, upload, file.filename)
+    finally:
+        upload.close()
+
+    await _run_inline(db, record, job)
+    return _upload_response(record)
+
+
+@router.post(
+    "/design/presign",
+    response_model=PresignUploadResponse,
+    responses={
+        400: {"model": UploadErrorResponse, "description": "Invalid file"},
+        413: {"model": UploadErrorResponse, "description": "File too large"},
+        503: {"model": UploadErrorResponse, "description": "Direct uploads unavailable"},
+    },
+    summary="Start a direct-to-storage design upload",
+    description="Get a presigned URL to upload a design file straight to storage.",
+)
+async def presign_design_upload(
+    request: PresignUploadRequest,
+    storage_service: StorageService = Depends(get_storage_service),
+    db: Session = Depends(get_db),
+) -> PresignUploadResponse:
+    """
+    Start a direct-to-storage design upload.
 
-    # Check file size
-    if file_size > MAX_FILE_SIZE:
+    PUT the file to the returned URL with the returned headers, then call
+    `POST /uploads/design/{file_id}/complete`. The file is then validated
+    and stored the same way as a file sent to `POST /uploads/design`.
+    """
+    _check_extension(request.file_name)
+    if request.file_size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=413,
-            detail=f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed ({MAX_FILE_SIZE / 1024 / 1024}MB)"
+            detail=f"File size exceeds maximum allowed ({MAX_FILE_SIZE / 1024 / 1024}MB)"
         )
+    if not storage_service.s3_enabled:
+        raise HTTPException(status_code=503, detail="Direct uploads are not available")
+
+    record, upload_url = design_uploads.presign(db, storage_service, request.file_name, request.file_size)
+    return PresignUploadResponse(
+        file_id=record.file_id,
+        upload_url=upload_url,
+        headers={"Content-Type": design_uploads.upload_content_type(record)},
+        expires_at=record.expires_at,
+    )
 
-    if file_size == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="File is empty"
-        )
 
-    # Determine content type
-    content_type = file.content_type or "application/octet-stream"
-
-    # Validate file based on type
-    validation_errors = []
-    validation_warnings = []
-
-    if file_ext == ".dxf":
-        # DXF validation
-        validation_result = await dxf_validator.validate(file_content, file.filename)
-        validation_errors = validation_result.get("errors", [])
-        validation_warnings = validation_result.get("warnings", [])
-    else:
-        # Image validation
-        validation_result = await image_validator.validate(file_content, file.filename, content_type)
-        validation_errors = validation_result.get("errors", [])
-        validation_warnings = validation_result.get("warnings", [])
-
-    # If validation fails, still upload but mark as invalid
-    is_valid = len(validation_errors) == 0
-
-    # Upload file to storage
-    upload_result = await storage_service.upload_file(
-        file_content=file_content,
-        original_filename=file.filename,
-        content_type=content_type,
-        prefix="designs"
-    )
+@router.post(
+    "/design/{file_id}/complete",
+    response_model=DesignUploadStatusResponse,
+    status_code=202,
+    responses={
+        404: {"model": UploadErrorResponse, "description": "Upload not found"},
+        409: {"model": UploadErrorResponse, "description": "File not uploaded yet"},
+        410: {"model": UploadErrorResponse, "description": "Upload URL expired"},
+    },
+    summary="Complete a direct-to-storage design upload",
+    description="Report that a presigned upload has finished, queueing the file for validation.",
+)
+async def complete_design_upload(
+    file_id: str,
+    storage_service: StorageService = Depends(get_storage_service),
+    db: Session = Depends(get_db),
+) -> DesignUploadStatusResponse:
+    """
+    Complete a direct-to-storage design upload.
 
-    # Generate thumbnail for images (not for DXF)
-    thumbnail_url = None
-    if is_valid and file_ext in {".png", ".jpg", ".jpeg"}:
-        thumbnail_url = await _generate_thumbnail(
-            file_content,
-            upload_result["storage_key"],
-            storage_service
-        )
+    The file is validated, thumbnailed and stored in the background; poll
+    `GET /uploads/{file_id}/status` for the result. Completing an upload
+    again just returns its status.
+    """
+    record = design_uploads.get(db, file_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
 
-    return UploadDesignResponse(
-        file_id=upload_result["file_id"],
-        file_url=upload_result["file_url"],
-        thumbnail_url=thumbnail_url,
-        file_name=file.filename,
-        file_type=content_type,
-        file_size=file_size,
-        is_valid=is_valid,
-        validation_errors=validation_errors + validation_warnings,
-        uploaded_at=datetime.utcnow(),
-    )
+    if record.status == DesignUploadStatus.PENDING and datetime.utcnow() > record.expires_at:
+        raise HTTPException(status_code=410, detail="Upload URL has expired")
+
+    try:
+        job = await design_uploads.complete(db, storage_service, record)
+    except design_uploads.InvalidUpload as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if job is not None:
+        await _run_inline(db, record, job)
+    return _status_response(record)
+
+
+@router.get(
+    "/{file_id}/status",
+    response_model=DesignUploadStatusResponse,
+    responses={
+        404: {"model": UploadErrorResponse, "description": "Upload not found"},
+    },
+    summary="Design upload status",
+    description="Poll a design upload's processing status and, once ready, its stored file.",
+)
+async def get_upload_status(file_id: str, db: Session = Depends(get_db)) -> DesignUploadStatusResponse:
+    """
+    Processing status of a design upload.
+
+    Status is one of pending (awaiting a direct upload), uploaded (queued),
+    processing, ready or failed. A ready upload includes the stored file,
+    thumbnail and validation result.
+    """
+    record = design_uploads.get(db, file_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return _status_response(record)
 
 
 @router.post(
@@ -192,12 +252,14 @@ async def validate_dxf(
     if not file.filename.lower().endswith(".dxf"):
         raise HTTPException(status_code=400, detail="File must be a DXF file")
 
-    file_content = await file.read()
-
-    if len(file_content) == 0:
-        raise HTTPException(status_code=400, detail="File is empty")
+    upload = await _spool_upload(file)
+    try:
+        if upload.size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
 
-    result = await dxf_validator.validate(file_content, file.filename)
+        result = await dxf_validator.validate(upload.rewind(), file.filename)
+    finally:
+        upload.close()
 
     return DXFValidationResult(
         is_valid=result["is_valid"],
@@ -209,48 +271,81 @@ async def validate_dxf(
     )
 
 
-async def _generate_thumbnail(
-    file_content: bytes,
-    original_key: str,
-    storage_service: StorageService,
-    max_size: int = 200
-) -> Optional[str]:
-    """
-    Generate a thumbnail for an image file.
+def _blob_response(record: DesignUpload) -> UploadDesignResponse:
+    """Upload response for a processed upload, from its stored blob."""
+    blob = record.blob
+    return UploadDesignResponse(
+        file_id=record.file_id,
+        file_url=blob.file_url,
+        thumbnail_url=blob.thumbnail_url,
+        thumbnails=blob.thumbnails or [],
+        file_name=record.file_name,
+        file_type=blob.content_type,
+        file_size=blob.size,
+        sha256=blob.sha256,
+        is_valid=blob.is_valid,
+        validation_errors=upload_blobs.errors(blob),
+        uploaded_at=datetime.utcnow(),
+    )
 
-    Args:
-        file_content: Original image content
-        original_key: Storage key of original file
-        storage_service: Storage service instance
-        max_size: Maximum dimension for thumbnail
 
-    Returns:
-        URL to thumbnail or None if generation fails
-    """
-    try:
-        from PIL import Image
+def _upload_response(record: DesignUpload) -> UploadDesignResponse:
+    """Upload response for a staged upload, complete if already processed."""
+    if record.blob is not None:
+        return _blob_response(record)
+    return UploadDesignResponse(
+        file_id=record.file_id,
+        status=record.status.value,
+        file_name=record.file_name,
+        file_type=design_uploads.upload_content_type(record),
+        file_size=record.declared_size,
+        validation_errors=[record.error] if record.error else [],
+        uploaded_at=record.completed_at,
+    )
+
+
+def _status_response(record: DesignUpload) -> DesignUploadStatusResponse:
+    """Status response for a direct-to-storage upload."""
+    return DesignUploadStatusResponse(
+        file_id=record.file_id,
+        file_name=record.file_name,
+        status=record.status.value,
+        error=record.error,
+        upload=_blob_response(record) if record.blob is not None else None,
+    )
+
+
+def _check_extension(file_name: str) -> None:
+    """Refuse file types that can't be used as designs."""
+    file_ext = design_uploads.file_extension(file_name)
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type '{file_ext}' is not allowed. Allowed types: PNG, JPG, SVG, DXF"
+        )
 
-        # Open image
-        img = Image.open(io.BytesIO(file_content))
 
-        # Convert to RGB if necessary (for PNG with transparency)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
+async def _run_inline(db: Session, record: DesignUpload, job: Job) -> None:
+    """
+    Process an upload in the request when inline processing is enabled.
 
-        # Calculate thumbnail size maintaining aspect ratio
-        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    If a job worker claimed the job first, it is left to the worker and the
+    response reports the upload as still in progress.
+    """
+    if get_settings().upload_jobs_inline:
+        await jobs.run_now(db, job)
+        db.refresh(record)
 
-        # Save to bytes
-        thumb_buffer = io.BytesIO()
-        img.save(thumb_buffer, format="PNG", optimize=True)
-        thumb_content = thumb_buffer.getvalue()
 
-        # Upload thumbnail
-        return await storage_service.upload_thumbnail(thumb_content, original_key)
+async def _spool_upload(file: UploadFile) -> upload_spool.SpooledUpload:
+    """Copy an uploaded file into a spool, enforcing MAX_FILE_SIZE as it is read."""
+    try:
+        return await upload_spool.spool(upload_spool.iter_upload(file), MAX_FILE_SIZE)
+    except upload_spool.UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File size exceeds maximum allowed ({MAX_FILE_SIZE / 1024 / 1024}MB)"
+        )
+    finally:
+        await file.close()
 
-    except ImportError:
-        # Pillow not installed
-        return None
-    except Exception:
-        # Failed to generate thumbnail
-        return None
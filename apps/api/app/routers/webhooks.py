@@ -9,8 +9,7 @@ import logging
 from ..core.database import get_db
 from ..core.config import get_settings
 from ..models.order import Order, OrderItem, OrderStatus
-from ..models.product import Variant
-from ..services import payfast
+from ..services import payfast, inventory, order_cache, order_events
 
 router = APIRouter(tags=["Webhooks"])
 settings = get_settings()
@@ -113,6 +112,9 @@ async def payfast_itn(
         order.payfast_payment_id = pf_payment_id
         db.commit()
 
+    order_cache.invalidate(order.id)
+    order_events.publish_order(order)
+
     # Always return 200 OK to acknowledge receipt
     return {"status": "ok"}
 
@@ -121,21 +123,27 @@ async def handle_payfast_complete(order: Order, itn_data: dict, db: Session):
     """Handle successful Payfast payment."""
     logger.info(f"Payfast payment complete for order {order.id}")
 
-    # Update order status
-    order.status = OrderStatus.paid
+    # Mark paid, convert holds and decrement stock in one transaction; a
+    # repeated ITN for an already-paid order changes nothing
+    oversold = inventory.complete_order(db, order.id)
+    if oversold is None:
+        logger.info(f"Order {order.id} already processed (status {order.status.value}), inventory unchanged")
+        db.commit()
+        return
+
     order.payfast_payment_id = itn_data.get("pf_payment_id")
 
     # Store customer email if not already set
     if not order.customer_email:
         order.customer_email = itn_data.get("email_address")
 
-    # Update inventory for order items
-    for item in order.items:
-        variant = db.query(Variant).filter(Variant.id == item.variant_id).first()
-        if variant:
-            variant.inventory_qty = max(0, variant.inventory_qty - item.quantity)
-
     db.commit()
+
+    for line in oversold:
+        logger.error(
+            f"Oversold variant {line.variant_id} on order {order.id}: "
+            f"sold {line.sold}, short by {line.shortfall}"
+        )
     logger.info(f"Order {order.id} marked as paid, inventory updated")
 
 
@@ -153,7 +161,9 @@ async def handle_payfast_cancelled(order: Order, itn_data: dict, db: Session):
     """Handle cancelled Payfast payment."""
     logger.info(f"Payfast payment cancelled for order {order.id}")
 
-    # Mark order as cancelled
-    order.status = OrderStatus.cancelled
+    # Mark order as cancelled and return its held stock
+    order.status = OrderStatus.CANCELLED
+    order.cancel_reason = "payment_cancelled"
+    inventory.release_order_holds(db, order.id)
 
     db.commit()
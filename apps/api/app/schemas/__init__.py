@@ -18,12 +18,19 @@ from .collection import (
 from .design import (
     DesignTemplateBase,
     DesignTemplateListResponse,
+    TemplatePreview,
 )
 from .cart import (
     CartItem,
     CartValidateRequest,
     CartValidateResponse,
     ValidatedCartItem,
+    BulkValidatedLine,
+    BulkValidationError,
+    BulkValidationSummary,
+    CartCreateRequest,
+    CartLineUpdate,
+    CartResponse,
     PayfastCheckoutRequest,
     PayfastCheckoutResponse,
     OrderItemResponse,
@@ -42,9 +49,12 @@ from .admin import (
     VariantUpdate,
     ProductImageCreate,
     ReviewSummaryCreate,
+    CollectionRules,
     CollectionCreate,
     CollectionUpdate,
     CollectionResponse,
+    CollectionProductsRequest,
+    CollectionMembershipResponse,
     PromoBlockCreate,
     PromoBlockUpdate,
     PromoBlockResponse,
@@ -73,11 +83,18 @@ __all__ = [
     # Design schemas
     "DesignTemplateBase",
     "DesignTemplateListResponse",
+    "TemplatePreview",
     # Cart & Checkout schemas
     "CartItem",
     "CartValidateRequest",
     "CartValidateResponse",
     "ValidatedCartItem",
+    "BulkValidatedLine",
+    "BulkValidationError",
+    "BulkValidationSummary",
+    "CartCreateRequest",
+    "CartLineUpdate",
+    "CartResponse",
     "PayfastCheckoutRequest",
     "PayfastCheckoutResponse",
     "OrderItemResponse",
@@ -94,9 +111,12 @@ __all__ = [
     "VariantUpdate",
     "ProductImageCreate",
     "ReviewSummaryCreate",
+    "CollectionRules",
     "CollectionCreate",
     "CollectionUpdate",
     "CollectionResponse",
+    "CollectionProductsRequest",
+    "CollectionMembershipResponse",
     "PromoBlockCreate",
     "PromoBlockUpdate",
     "PromoBlockResponse",
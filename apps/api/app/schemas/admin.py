@@ -93,12 +93,23 @@ class ProductResponse(BaseModel):
 # Collection Admin Schemas
 # ============================================
 
+class CollectionRules(BaseModel):
+    """Rules for a smart collection (all conditions must match)."""
+    badges_any: list[str] = Field(default_factory=list, description="Match products with any of these badges")
+    min_price: Optional[Decimal] = Field(None, ge=0, description="Minimum variant price")
+    max_price: Optional[Decimal] = Field(None, ge=0, description="Maximum variant price")
+    seats: Optional[int] = Field(None, ge=1, description="Number of people the fire pit must seat")
+    material: Optional[str] = Field(None, max_length=100, description="Material contains (case-insensitive)")
+    in_stock: Optional[bool] = Field(None, description="Only products with a variant in stock")
+
+
 class CollectionCreate(BaseModel):
     """Schema for creating a new collection."""
     slug: str = Field(..., min_length=1, max_length=255)
     title: str = Field(..., min_length=1, max_length=255)
     hero_copy: Optional[str] = None
     product_ids: list[int] = Field(default_factory=list)
+    rules: Optional[CollectionRules] = None
 
 
 class CollectionUpdate(BaseModel):
@@ -107,6 +118,7 @@ class CollectionUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     hero_copy: Optional[str] = None
     product_ids: Optional[list[int]] = None
+    rules: Optional[CollectionRules] = None
 
 
 class CollectionResponse(BaseModel):
@@ -115,11 +127,26 @@ class CollectionResponse(BaseModel):
     slug: str
     title: str
     hero_copy: Optional[str] = None
+    rules: Optional[CollectionRules] = None
 
     class Config:
         from_attributes = True
 
 
+class CollectionProductsRequest(BaseModel):
+    """Schema for adding, removing or reordering collection products."""
+    product_ids: list[int] = Field(..., min_length=1)
+
+
+class CollectionMembershipResponse(BaseModel):
+    """Result of an incremental collection membership edit."""
+    collection_id: int
+    added: int = 0
+    removed: int = 0
+    product_count: int
+    catalog_version: int = Field(..., description="Catalog version after the edit, for cache invalidation")
+
+
 # ============================================
 # Promo Block Admin Schemas
 # ============================================
@@ -189,6 +216,7 @@ class OrderAdminResponse(BaseModel):
     id: int
     payfast_payment_id: Optional[str] = None
     status: OrderStatus
+    cancel_reason: Optional[str] = None
     customer_email: str
     total: Decimal
     shipping_address: Optional[str] = None
@@ -209,6 +237,18 @@ class OrderListResponse(BaseModel):
     total_pages: int
 
 
+class ShippingRegionSummary(BaseModel):
+    """Order count and value for one shipping province."""
+    province: Optional[str] = None
+    orders: int
+    total: Decimal
+
+
+class ShippingSummaryResponse(BaseModel):
+    """Response schema for orders grouped by shipping province."""
+    regions: list[ShippingRegionSummary]
+
+
 # ============================================
 # Admin Authentication Schemas
 # ============================================
@@ -1,7 +1,7 @@
 """Pydantic schemas for cart and checkout."""
 from pydantic import BaseModel, EmailStr, Field
 from decimal import Decimal
-from typing import Optional
+from typing import Literal, Optional
 
 
 class CartItem(BaseModel):
@@ -37,6 +37,59 @@ class CartValidateResponse(BaseModel):
     errors: list[str] = []
 
 
+# ============================================================================
+# Bulk (CSV) Validation Schemas
+# ============================================================================
+
+class BulkValidatedLine(ValidatedCartItem):
+    """NDJSON record for a CSV row whose SKU was found."""
+    type: Literal["line"] = "line"
+    line: int
+
+
+class BulkValidationError(BaseModel):
+    """NDJSON record for a CSV row that couldn't be priced."""
+    type: Literal["error"] = "error"
+    line: int
+    sku: str
+    error: str
+
+
+class BulkValidationSummary(BaseModel):
+    """Final NDJSON record of a bulk validation."""
+    type: Literal["summary"] = "summary"
+    valid: bool = False
+    lines: int = 0
+    errors: int = 0
+    unavailable: int = 0
+    subtotal: Decimal = Decimal("0.00")
+
+
+# ============================================================================
+# Server-side Cart Schemas
+# ============================================================================
+
+class CartCreateRequest(BaseModel):
+    """Request body for creating a server-side cart."""
+    items: list[CartItem] = []
+
+
+class CartLineUpdate(BaseModel):
+    """Request body for setting a cart line's quantity (0 removes it)."""
+    product_id: int
+    quantity: int = Field(..., ge=0)
+
+
+class CartResponse(BaseModel):
+    """Server-side cart with its priced lines."""
+    token: str
+    valid: bool
+    items: list[ValidatedCartItem]
+    subtotal: Decimal
+    errors: list[str] = []
+    catalog_version: int
+
+
 # ============================================================================
 # Payfast Checkout Schemas
 # ============================================================================
@@ -60,7 +113,11 @@ class PayfastCheckoutRequest(BaseModel):
     customer_phone: Optional[str] = Field(None, max_length=20)
     shipping_address: ShippingAddress
     shipping_service: str = Field(default="standard", description="standard, express, or overnight")
-    shipping_cost: Decimal = Field(default=Decimal("0"), ge=0)
+    shipping_cost: Optional[Decimal] = Field(
+        default=None,
+        ge=0,
+        description="Deprecated and ignored: shipping is quoted by the server",
+    )
 
 
 class PayfastFormField(BaseModel):
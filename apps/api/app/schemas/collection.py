@@ -1,5 +1,6 @@
 """Pydantic schemas for collections."""
 from pydantic import BaseModel, Field
+from decimal import Decimal
 from .product import ProductList
 
 
@@ -28,6 +29,11 @@ class CollectionBase(BaseModel):
 
 class CollectionList(CollectionBase):
     """Collection schema for list view."""
+    # Only populated when requested via ?with=counts,preview
+    product_count: int | None = None
+    price_min: Decimal | None = None
+    price_max: Decimal | None = None
+    preview_images: list[str] | None = None
 
     class Config:
         from_attributes = True
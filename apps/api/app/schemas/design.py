@@ -3,6 +3,13 @@ from pydantic import BaseModel
 from ..models.design import DesignCategory
 
 
+class TemplatePreview(BaseModel):
+    """Pre-rendered raster preview of a design template."""
+    size: int  # Width and height in pixels
+    format: str  # "webp" or "png"
+    url: str
+
+
 class DesignTemplateBase(BaseModel):
     """Base design template schema."""
     id: int
@@ -10,6 +17,7 @@ class DesignTemplateBase(BaseModel):
     category: DesignCategory
     thumbnail: str | None = None
     svg_path: str | None = None
+    previews: list[TemplatePreview] | None = None
 
     class Config:
         from_attributes = True
@@ -10,6 +10,7 @@ class VariantBase(BaseModel):
     price: Decimal
     compare_at_price: Decimal | None = None
     inventory_qty: int
+    available_qty: int = 0  # inventory_qty minus stock held by pending orders
     weight: float | None = None
     dimensions_mm: str | None = None
 
@@ -4,19 +4,59 @@ from typing import Optional
 from datetime import datetime
 
 
+class UploadThumbnail(BaseModel):
+    """Thumbnail of an uploaded image."""
+    size: int = Field(..., description="Longest side in pixels")
+    format: str = Field(..., description="avif, webp, png or jpeg")
+    url: str
+
+
 class UploadDesignResponse(BaseModel):
     """Response for design file upload."""
     file_id: str = Field(..., description="Unique identifier for the uploaded file")
-    file_url: str = Field(..., description="URL to access the uploaded file")
-    thumbnail_url: Optional[str] = Field(None, description="URL to the generated thumbnail")
+    status: str = Field(
+        "ready",
+        description="ready once validated; until then uploaded or processing (failed if it couldn't be); "
+        "poll GET /uploads/{file_id}/status",
+    )
+    file_url: Optional[str] = Field(None, description="URL to access the uploaded file, once ready")
+    thumbnail_url: Optional[str] = Field(None, description="URL to the smallest PNG/JPEG thumbnail")
+    thumbnails: list[UploadThumbnail] = Field(
+        default_factory=list, description="Thumbnails in every size and format, smallest first, best format first"
+    )
     file_name: str = Field(..., description="Original file name")
     file_type: str = Field(..., description="MIME type of the file")
     file_size: int = Field(..., description="File size in bytes")
-    is_valid: bool = Field(..., description="Whether the file passed validation")
+    sha256: Optional[str] = Field(None, description="SHA-256 of the file content, hex encoded")
+    is_valid: Optional[bool] = Field(None, description="Whether the file passed validation, once ready")
     validation_errors: list[str] = Field(default_factory=list, description="List of validation errors if any")
     uploaded_at: datetime = Field(default_factory=datetime.utcnow, description="Upload timestamp")
 
 
+class PresignUploadRequest(BaseModel):
+    """Request for a direct-to-storage upload URL."""
+    file_name: str = Field(..., min_length=1, max_length=255, description="Name of the file to upload")
+    file_size: int = Field(..., gt=0, description="File size in bytes")
+
+
+class PresignUploadResponse(BaseModel):
+    """Where and how to upload a design file directly to storage."""
+    file_id: str = Field(..., description="Identifier to complete the upload with")
+    upload_url: str = Field(..., description="Presigned URL to upload the file to")
+    method: str = Field("PUT", description="HTTP method to upload with")
+    headers: dict[str, str] = Field(default_factory=dict, description="Headers the upload must be sent with")
+    expires_at: datetime = Field(..., description="When the upload URL stops working")
+
+
+class DesignUploadStatusResponse(BaseModel):
+    """Processing status of an upload."""
+    file_id: str = Field(..., description="Upload identifier")
+    file_name: str = Field(..., description="Original file name")
+    status: str = Field(..., description="pending, uploaded, processing, ready or failed")
+    error: Optional[str] = Field(None, description="Why processing failed")
+    upload: Optional[UploadDesignResponse] = Field(None, description="The stored file, once ready")
+
+
 class DXFValidationResult(BaseModel):
     """Result of DXF file validation."""
     is_valid: bool = Field(..., description="Whether the DXF file is valid")
@@ -1,7 +1,29 @@
 """Application services."""
-from .storage import StorageService
+from .storage import StorageService, get_storage
 from .dxf_validator import DXFValidator
 from . import payfast
 from . import tcg
+from . import smart_collections
+from . import catalog
+from . import collection_membership
+from . import template_catalog
+from . import template_previews
+from . import pricing
+from . import inventory
+from . import idempotency
+from . import order_expiry
+from . import carts
+from . import shipping_quotes
+from . import orders
+from . import bulk_validation
+from . import order_cache
+from . import order_events
+from . import order_search
+from . import upload_spool
+from . import validation_pool
+from . import upload_blobs
+from . import thumbnails
+from . import jobs
+from . import design_uploads
 
-__all__ = ["StorageService", "DXFValidator", "payfast", "tcg"]
+__all__ = ["StorageService", "get_storage", "DXFValidator", "payfast", "tcg", "smart_collections", "catalog", "collection_membership", "template_catalog", "template_previews", "pricing", "inventory", "idempotency", "order_expiry", "carts", "shipping_quotes", "orders", "bulk_validation", "order_cache", "order_events", "order_search", "upload_spool", "validation_pool", "upload_blobs", "thumbnails", "jobs", "design_uploads"]
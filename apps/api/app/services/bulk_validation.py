@@ -0,0 +1,217 @@
+"""Bulk validation of trade-order spreadsheets.
+
+Trade customers send ``sku,quantity`` CSVs that can run to thousands of
+lines. The upload is parsed as it arrives, rows are grouped into chunks of
+``bulk_validation_chunk_size`` and each chunk's SKUs are resolved with one
+query on the unique SKU index, so memory use is bounded by the chunk size
+rather than the file size.
+
+Availability is checked against the running total requested per variant,
+so a SKU listed on several rows is only reported available while the whole
+quantity so far can be supplied.
+"""
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+import asyncio
+import codecs
+import csv
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..core.config import get_settings
+from ..models.product import Variant
+from ..schemas.cart import BulkValidatedLine, BulkValidationError, BulkValidationSummary
+
+BulkRecord = Union[BulkValidatedLine, BulkValidationError, BulkValidationSummary]
+
+# Longest CSV line accepted, in characters; bounds the partial line buffered
+# between chunks (a sku,quantity row is a few dozen characters)
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class LineTooLong(Exception):
+    """A CSV line is longer than MAX_LINE_LENGTH."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"CSV line longer than {limit} characters")
+        self.limit = limit
+
+
+class TooManyLines(Exception):
+    """The CSV has more rows than bulk_validation_max_lines."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"CSV has more than {limit} lines")
+        self.limit = limit
+
+
+async def iter_csv_rows(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, list[str]]]:
+    """
+    Parse CSV rows from a byte stream without buffering the whole body.
+
+    Only the newly decoded text is split, and the partial line carried
+    between chunks is capped, so time is linear in the body size and memory
+    is bounded by the chunk and line sizes.
+
+    Yields:
+        (line number, cells) for each row; blank rows have no cells
+
+    Raises:
+        LineTooLong: A line is longer than MAX_LINE_LENGTH
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    line_number = 0
+
+    async for chunk in chunks:
+        lines = decoder.decode(chunk).split("\n")
+        lines[0] = pending + lines[0]
+        pending = lines.pop()
+        if len(pending) > MAX_LINE_LENGTH:
+            raise LineTooLong(MAX_LINE_LENGTH)
+        for line in lines:
+            if len(line) > MAX_LINE_LENGTH:
+                raise LineTooLong(MAX_LINE_LENGTH)
+            line_number += 1
+            yield line_number, _parse_line(line)
+
+    pending += decoder.decode(b"", final=True)
+    if len(pending) > MAX_LINE_LENGTH:
+        raise LineTooLong(MAX_LINE_LENGTH)
+    if pending:
+        yield line_number + 1, _parse_line(pending)
+
+
+def load_variants_by_sku(db: Session, skus: Iterable[str]) -> dict[str, Variant]:
+    """Fetch variants with their products for a set of SKUs in one query."""
+    skus = set(skus)
+    if not skus:
+        return {}
+    variants = (
+        db.query(Variant)
+        .options(joinedload(Variant.product))
+        .filter(Variant.sku.in_(skus))
+        .all()
+    )
+    return {variant.sku: variant for variant in variants}
+
+
+async def validate_rows(
+    db: Session,
+    rows: AsyncIterable[tuple[int, list[str]]],
+) -> AsyncIterator[BulkRecord]:
+    """
+    Validate and price CSV rows chunk by chunk.
+
+    Yields one BulkValidatedLine or BulkValidationError per non-blank row,
+    in order, followed by a BulkValidationSummary. Blank rows are skipped
+    but still count towards bulk_validation_max_lines, so a body of empty
+    lines can't run on without limit. Each chunk is validated in a thread,
+    off the event loop.
+
+    Raises:
+        TooManyLines: More than bulk_validation_max_lines rows
+    """
+    settings = get_settings()
+    chunk_size = settings.bulk_validation_chunk_size
+    max_lines = settings.bulk_validation_max_lines
+
+    requested: dict[int, int] = {}
+    summary = BulkValidationSummary()
+    chunk: list[tuple[int, list[str]]] = []
+    row_count = 0
+    header_checked = False
+
+    async for line_number, cells in rows:
+        if cells and not header_checked:
+            header_checked = True
+            if cells[0].strip().lower() == "sku":
+                continue
+
+        row_count += 1
+        if row_count > max_lines:
+            raise TooManyLines(max_lines)
+        if not cells:
+            continue
+
+        chunk.append((line_number, cells))
+        if len(chunk) >= chunk_size:
+            for record in await asyncio.to_thread(_validate_chunk, db, chunk, requested, summary):
+                yield record
+            chunk = []
+
+    for record in await asyncio.to_thread(_validate_chunk, db, chunk, requested, summary):
+        yield record
+
+    summary.valid = summary.lines > 0 and summary.errors == 0 and summary.unavailable == 0
+    yield summary
+
+
+def _parse_line(line: str) -> list[str]:
+    """Split one CSV line into cells, dropping a trailing \\r."""
+    cells = next(csv.reader([line.rstrip("\r")]), [])
+    return cells if any(cell.strip() for cell in cells) else []
+
+
+def _validate_chunk(
+    db: Session,
+    chunk: list[tuple[int, list[str]]],
+    requested: dict[int, int],
+    summary: BulkValidationSummary,
+) -> Iterable[BulkRecord]:
+    """Resolve one chunk's SKUs and build its records."""
+    if not chunk:
+        return []
+
+    variants = load_variants_by_sku(db, (cells[0].strip() for _, cells in chunk))
+    records: list[BulkRecord] = []
+
+    for line_number, cells in chunk:
+        summary.lines += 1
+        sku = cells[0].strip()
+        error = None
+        quantity = 0
+
+        if len(cells) < 2 or not cells[1].strip():
+            error = "Missing quantity"
+        else:
+            try:
+                quantity = int(cells[1].strip())
+            except ValueError:
+                error = f"Invalid quantity: {cells[1].strip()}"
+            else:
+                if quantity < 1:
+                    error = f"Quantity must be at least 1: {quantity}"
+
+        variant = variants.get(sku)
+        if error is None and variant is None:
+            error = f"Unknown SKU: {sku}"
+
+        if error is not None:
+            summary.errors += 1
+            records.append(BulkValidationError(line=line_number, sku=sku, error=error))
+            continue
+
+        requested[variant.id] = requested.get(variant.id, 0) + quantity
+        available = variant.available_qty >= requested[variant.id]
+        line_total = variant.price * quantity
+
+        summary.subtotal += line_total
+        if not available:
+            summary.unavailable += 1
+
+        records.append(
+            BulkValidatedLine(
+                line=line_number,
+                product_id=variant.product_id,
+                variant_id=variant.id,
+                quantity=quantity,
+                sku=variant.sku,
+                title=variant.product.title,
+                price=variant.price,
+                line_total=line_total,
+                available=available,
+                available_qty=variant.available_qty,
+            )
+        )
+
+    return records
@@ -0,0 +1,188 @@
+"""Server-side carts with cached pricing.
+
+A cart stores its lines already priced, together with the catalog version
+they were priced against. Reading a cart compares that version with the
+current one: if nothing in the catalog changed the cached prices are kept
+and only stock levels are re-read; otherwise every line is re-priced. Either
+way a read costs one batched variant query. Adding, changing or removing a
+line only prices that line.
+
+Stock isn't part of the catalog version (holds, payments and the expiry
+sweep change it constantly), which is why it is re-read on every read.
+Checkout still re-checks stock atomically when it takes holds.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+import secrets
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.cart import Cart
+from ..models.product import Variant
+from . import catalog, pricing
+
+# Reads bump updated_at (so read-only carts aren't purged) at most this often
+TOUCH_INTERVAL = timedelta(hours=1)
+
+
+def new_token() -> str:
+    """Generate an unguessable cart token."""
+    return secrets.token_urlsafe(24)
+
+
+def get_cart(db: Session, token: str) -> Optional[Cart]:
+    """Find a cart by token."""
+    return db.execute(select(Cart).where(Cart.token == token)).scalar_one_or_none()
+
+
+def create_cart(db: Session, items: Iterable[pricing.CartLineInput] = ()) -> Cart:
+    """Create a cart, pricing any initial items."""
+    cart = Cart(
+        token=new_token(),
+        catalog_version=catalog.get_catalog_version(db),
+    )
+    _set_lines(cart, _price(db, items))
+    db.add(cart)
+    return cart
+
+
+def refresh(db: Session, cart: Cart) -> bool:
+    """
+    Bring the cart up to date for a read.
+
+    Re-prices every line if the catalog changed since it was last priced,
+    otherwise re-reads stock levels only. Also marks the cart as recently
+    used so ``purge_stale`` keeps carts that are read but not edited.
+
+    Returns:
+        True if the cart was modified and should be committed
+    """
+    touched = _touch(cart)
+    if _reprice_if_stale(db, cart):
+        return True
+    return _refresh_stock(db, cart) or touched
+
+
+def set_line(db: Session, cart: Cart, product_id: int, variant_id: int, quantity: int) -> None:
+    """
+    Set a line's quantity, adding or removing the line as needed.
+
+    Only the changed line is priced (after bringing the rest of the cart up
+    to date with the catalog if needed).
+    """
+    refresh(db, cart)
+
+    lines = [
+        line for line in cart.lines
+        if (line["product_id"], line["variant_id"]) != (product_id, variant_id)
+    ]
+    if quantity > 0:
+        priced = _price(db, [_LineRef(product_id, variant_id, quantity)])[0]
+        # Keep the line's position if it was already in the cart
+        position = next(
+            (i for i, line in enumerate(cart.lines)
+             if (line["product_id"], line["variant_id"]) == (product_id, variant_id)),
+            len(lines),
+        )
+        lines.insert(position, priced)
+    _set_lines(cart, lines)
+
+
+def purge_stale(db: Session) -> int:
+    """Delete carts not updated within cart_ttl_days. Returns carts deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=get_settings().cart_ttl_days)
+    result = db.execute(delete(Cart).where(Cart.updated_at < cutoff))
+    return result.rowcount
+
+
+def line_total(line: dict) -> Decimal:
+    """Total for a cached line."""
+    return Decimal(line["price"]) * line["quantity"]
+
+
+class _LineRef:
+    """Minimal CartLineInput for re-pricing cached lines."""
+    __slots__ = ("product_id", "variant_id", "quantity")
+
+    def __init__(self, product_id: int, variant_id: int, quantity: int):
+        self.product_id = product_id
+        self.variant_id = variant_id
+        self.quantity = quantity
+
+    @classmethod
+    def from_dict(cls, line: dict) -> "_LineRef":
+        return cls(line["product_id"], line["variant_id"], line["quantity"])
+
+
+def _price(db: Session, items: Iterable[pricing.CartLineInput]) -> list[dict]:
+    """Price lines into the cached JSON form."""
+    lines = []
+    for priced in pricing.price_lines(db, items):
+        variant = priced.variant
+        lines.append({
+            "product_id": priced.product_id,
+            "variant_id": priced.variant_id,
+            "quantity": priced.quantity,
+            "found": variant is not None,
+            "sku": variant.sku if variant else None,
+            "title": variant.product.title if variant else None,
+            "price": str(variant.price) if variant else "0",
+            "available_qty": variant.available_qty if variant else 0,
+        })
+    return lines
+
+
+def _reprice_if_stale(db: Session, cart: Cart) -> bool:
+    """Re-price every line if the catalog changed. Returns True if re-priced."""
+    version = catalog.get_catalog_version(db)
+    if cart.catalog_version == version:
+        return False
+
+    cart.catalog_version = version
+    _set_lines(cart, _price(db, [_LineRef.from_dict(line) for line in cart.lines]))
+    return True
+
+
+def _refresh_stock(db: Session, cart: Cart) -> bool:
+    """
+    Re-read available stock for the cart's lines with one query.
+
+    Returns:
+        True if any line's available_qty changed
+    """
+    variant_ids = {line["variant_id"] for line in cart.lines if line["found"]}
+    if not variant_ids:
+        return False
+
+    available = {
+        row.id: max(0, (row.inventory_qty or 0) - (row.reserved_qty or 0))
+        for row in db.execute(
+            select(Variant.id, Variant.inventory_qty, Variant.reserved_qty).where(Variant.id.in_(variant_ids))
+        )
+    }
+    lines = [
+        {**line, "available_qty": available.get(line["variant_id"], 0)} if line["found"] else line
+        for line in cart.lines
+    ]
+    if lines == cart.lines:
+        return False
+    cart.lines = lines
+    return True
+
+
+def _touch(cart: Cart) -> bool:
+    """Bump updated_at if it is older than TOUCH_INTERVAL. Returns True if bumped."""
+    now = datetime.utcnow()
+    if cart.updated_at is not None and cart.updated_at > now - TOUCH_INTERVAL:
+        return False
+    cart.updated_at = now
+    return True
+
+
+def _set_lines(cart: Cart, lines: list[dict]) -> None:
+    """Replace the cart's lines and recompute its subtotal."""
+    cart.lines = lines
+    cart.subtotal = sum((line_total(line) for line in lines if line["found"]), Decimal("0.00"))
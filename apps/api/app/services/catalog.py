@@ -0,0 +1,52 @@
+"""Catalog version tracking.
+
+The catalog version is a single monotonically increasing counter that is
+bumped whenever products, variants, images, collections or promo blocks
+change. Caches keyed on the version (storefront pages, priced carts) can
+compare a single integer instead of re-reading the catalog.
+"""
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.catalog import CatalogState
+
+CATALOG_STATE_ID = 1
+
+
+def get_catalog_version(db: Session) -> int:
+    """Get the current catalog version (0 if the catalog was never changed)."""
+    version = db.execute(
+        select(CatalogState.version).where(CatalogState.id == CATALOG_STATE_ID)
+    ).scalar()
+    return version or 0
+
+
+def bump_catalog_version(db: Session) -> int:
+    """
+    Atomically increment the catalog version within the current transaction.
+
+    Returns:
+        The new catalog version
+    """
+    version = _increment(db)
+    if version is not None:
+        return version
+
+    # First write ever: create the state row, tolerating a concurrent creator
+    try:
+        with db.begin_nested():
+            db.execute(insert(CatalogState).values(id=CATALOG_STATE_ID, version=1))
+        return 1
+    except IntegrityError:
+        return _increment(db)
+
+
+def _increment(db: Session) -> int | None:
+    """Increment the version row in place, returning None if it doesn't exist."""
+    return db.execute(
+        update(CatalogState)
+        .where(CatalogState.id == CATALOG_STATE_ID)
+        .values(version=CatalogState.version + 1)
+        .returning(CatalogState.version)
+    ).scalar()
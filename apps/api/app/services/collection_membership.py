@@ -0,0 +1,191 @@
+"""Incremental collection membership edits.
+
+Membership changes are applied as set differences directly against the
+collection_product association table with bulk INSERT / DELETE / UPDATE
+statements, so large collections are never loaded into the ORM and
+concurrent edits only touch the rows they name.
+"""
+from sqlalchemy import select, insert, delete, update, func, bindparam
+from sqlalchemy.orm import Session
+
+from ..models.product import Product, collection_product
+
+
+def _unique(product_ids: list[int]) -> list[int]:
+    """De-duplicate product IDs, keeping first-seen order."""
+    return list(dict.fromkeys(product_ids))
+
+
+def find_missing_products(db: Session, product_ids: list[int]) -> set[int]:
+    """Return the subset of product IDs that don't exist."""
+    if not product_ids:
+        return set()
+    found = set(db.execute(select(Product.id).where(Product.id.in_(product_ids))).scalars())
+    return set(product_ids) - found
+
+
+def member_ids(db: Session, collection_id: int) -> list[int]:
+    """Get a collection's product IDs in display order."""
+    return list(
+        db.execute(
+            select(collection_product.c.product_id)
+            .where(collection_product.c.collection_id == collection_id)
+            .order_by(collection_product.c.position, collection_product.c.product_id)
+        ).scalars()
+    )
+
+
+def _member_positions(db: Session, collection_id: int) -> dict[int, int]:
+    """Get a collection's current positions, keyed by product ID."""
+    return dict(
+        db.execute(
+            select(collection_product.c.product_id, collection_product.c.position)
+            .where(collection_product.c.collection_id == collection_id)
+        ).all()
+    )
+
+
+def count_members(db: Session, collection_id: int) -> int:
+    """Count products in a collection."""
+    return db.execute(
+        select(func.count())
+        .select_from(collection_product)
+        .where(collection_product.c.collection_id == collection_id)
+    ).scalar_one()
+
+
+def add_products(db: Session, collection_id: int, product_ids: list[int]) -> int:
+    """
+    Append products to the end of a collection, skipping existing members.
+
+    Returns:
+        Number of products added
+    """
+    product_ids = _unique(product_ids)
+    if not product_ids:
+        return 0
+
+    existing = set(
+        db.execute(
+            select(collection_product.c.product_id).where(
+                collection_product.c.collection_id == collection_id,
+                collection_product.c.product_id.in_(product_ids),
+            )
+        ).scalars()
+    )
+    to_add = [pid for pid in product_ids if pid not in existing]
+    if not to_add:
+        return 0
+
+    max_position = db.execute(
+        select(func.max(collection_product.c.position))
+        .where(collection_product.c.collection_id == collection_id)
+    ).scalar()
+    start = (max_position + 1) if max_position is not None else 0
+
+    db.execute(
+        # A concurrent add of the same product is a no-op rather than a conflict
+        insert(collection_product).prefix_with("OR IGNORE", dialect="sqlite"),
+        [
+            {"collection_id": collection_id, "product_id": pid, "position": start + offset}
+            for offset, pid in enumerate(to_add)
+        ],
+    )
+    return len(to_add)
+
+
+def remove_products(db: Session, collection_id: int, product_ids: list[int]) -> int:
+    """
+    Remove products from a collection.
+
+    Returns:
+        Number of products removed
+    """
+    product_ids = _unique(product_ids)
+    if not product_ids:
+        return 0
+
+    result = db.execute(
+        delete(collection_product).where(
+            collection_product.c.collection_id == collection_id,
+            collection_product.c.product_id.in_(product_ids),
+        )
+    )
+    return result.rowcount
+
+
+def reorder_products(db: Session, collection_id: int, product_ids: list[int]) -> set[int]:
+    """
+    Move the given products to the front of a collection in the given order.
+
+    Members not listed keep their relative order after the listed ones.
+
+    Returns:
+        IDs that were listed but are not members (nothing is changed if any)
+    """
+    product_ids = _unique(product_ids)
+    current = member_ids(db, collection_id)
+    not_members = set(product_ids) - set(current)
+    if not_members:
+        return not_members
+
+    listed = set(product_ids)
+    ordered = product_ids + [pid for pid in current if pid not in listed]
+    _write_positions(db, collection_id, ordered, _member_positions(db, collection_id))
+    return set()
+
+
+def replace_products(db: Session, collection_id: int, product_ids: list[int]) -> tuple[int, int]:
+    """
+    Set a collection's products to exactly the given list, in order.
+
+    Only the difference is written: removed members are deleted, new members
+    inserted at their positions, and kept members whose position changed
+    updated in one batch.
+
+    Returns:
+        Tuple of (added, removed) counts
+    """
+    product_ids = _unique(product_ids)
+    current = _member_positions(db, collection_id)
+    wanted = set(product_ids)
+
+    removed = remove_products(db, collection_id, [pid for pid in current if pid not in wanted])
+    to_add = [(position, pid) for position, pid in enumerate(product_ids) if pid not in current]
+    if to_add:
+        db.execute(
+            insert(collection_product),
+            [{"collection_id": collection_id, "product_id": pid, "position": position} for position, pid in to_add],
+        )
+    kept = {pid: position for pid, position in current.items() if pid in wanted}
+    _write_positions(db, collection_id, product_ids, kept)
+    return len(to_add), removed
+
+
+def _write_positions(
+    db: Session, collection_id: int, ordered_ids: list[int], current: dict[int, int]
+) -> None:
+    """
+    Write display positions with a single executemany UPDATE.
+
+    Only members listed in ``current`` (product ID -> stored position) whose
+    position differs are written.
+    """
+    changed = [
+        (position, pid) for position, pid in enumerate(ordered_ids)
+        if pid in current and current[pid] != position
+    ]
+    if not changed:
+        return
+    db.execute(
+        update(collection_product)
+        .where(
+            collection_product.c.collection_id == bindparam("cid"),
+            collection_product.c.product_id == bindparam("pid"),
+        )
+        .values(position=bindparam("pos")),
+        [
+            {"cid": collection_id, "pid": pid, "pos": position}
+            for position, pid in changed
+        ],
+    )
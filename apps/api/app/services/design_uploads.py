@@ -0,0 +1,458 @@
+"""Design file processing, for both upload flows.
+
+A design file reaches storage in one of two ways:
+
+- Posted to ``POST /uploads/design``. The API worker spools it, checks its
+  type and stores it under a staging key (``stage()``).
+- Uploaded by the client straight to S3 with a presigned PUT URL from
+  ``presign()``, so no API worker carries its bytes at all. The client
+  then reports completion (``complete()``).
+
+Either way a DesignUpload records the staged file, and a
+``process_design_upload`` job is queued (see ``jobs``). The job worker
+runs ``process_staged()``: ``process()`` validates the file, stores it
+under its content key with its thumbnails, and records it as an
+UploadBlob. Clients poll the upload's status for the result.
+
+Content that is already stored skips all of this: ``record_duplicate()``
+gives the upload its own record, already ready, pointing at the stored blob.
+Each upload has its own file ID, so one customer's ID never reveals another
+customer's upload record.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.job import Job
+from ..models.upload import DesignUpload, DesignUploadStatus, UploadBlob
+from . import jobs, thumbnails, upload_blobs, upload_spool, validation_pool
+from .dxf_validator import DXFValidator, ImageValidator
+from .storage import StorageService, get_storage
+
+# Content type each extension's files must sniff as
+EXTENSION_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".svg": "image/svg+xml",
+    ".dxf": "application/dxf",
+}
+
+# Extensions that get thumbnails
+THUMBNAIL_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+# Where uploads are stored before processing
+STAGING_PREFIX = "incoming"
+
+PROCESS_JOB = "process_design_upload"
+
+
+class InvalidUpload(Exception):
+    """The file can't be accepted as a design."""
+
+
+def file_extension(file_name: str) -> str:
+    """Lower-cased extension of a file name, with its dot, or ''."""
+    name = file_name.lower()
+    return "." + name.split(".")[-1] if "." in name else ""
+
+
+def check(upload: upload_spool.SpooledUpload, file_name: str) -> str:
+    """
+    Check that a file is a design of the type its extension says.
+
+    Returns:
+        The file's content type
+
+    Raises:
+        InvalidUpload: If the file is empty or its content isn't of the
+            type its extension says
+    """
+    file_ext = file_extension(file_name)
+    if upload.size == 0:
+        raise InvalidUpload("File is empty")
+
+    # The sniffed type, not the client's Content-Type, decides how the
+    # file is handled
+    content_type = EXTENSION_TYPES[file_ext]
+    if upload.detected_type != content_type:
+        raise InvalidUpload(f"File content does not match its '{file_ext}' extension")
+    return content_type
+
+
+async def process(
+    db: Session,
+    upload: upload_spool.SpooledUpload,
+    file_name: str,
+    storage: StorageService,
+    dxf_validator: DXFValidator,
+    image_validator: ImageValidator,
+    staged_key: Optional[str] = None,
+    file_id: Optional[str] = None,
+) -> UploadBlob:
+    """
+    Validate and store a design file.
+
+    Content already stored is reused without validating it again.
+
+    Args:
+        upload: The file, spooled
+        file_name: Original file name; its extension must be allowed
+        staged_key: S3 key the file is already stored under, if any; the
+            stored file is copied from there instead of uploaded again
+        file_id: ID to record the stored file under; a new one by default
+
+    Returns:
+        The stored upload
+
+    Raises:
+        InvalidUpload: See check()
+    """
+    file_ext = file_extension(file_name)
+    content_type = check(upload, file_name)
+
+    blob = upload_blobs.find(db, upload.sha256)
+    if blob is not None:
+        upload_blobs.record_reuse(db, blob)
+        return blob
+
+    if file_ext == ".dxf":
+        validation_result = await dxf_validator.validate(upload.rewind(), file_name)
+    else:
+        validation_result = await image_validator.validate(upload.rewind(), file_name, content_type)
+    validation_errors = validation_result.get("errors", [])
+    validation_warnings = validation_result.get("warnings", [])
+
+    # If validation fails, still store but mark as invalid
+    is_valid = len(validation_errors) == 0
+
+    # Store the file, and generate and upload thumbnails for images (not
+    # for DXF) at the same time
+    file_key = storage.content_key(upload.sha256, file_name, prefix="designs")
+    if is_valid and file_ext in THUMBNAIL_EXTENSIONS:
+        # The original's upload reads the same handle from a thread, so it
+        # waits until the thumbnail task has read the file
+        thumbnail_read = asyncio.Event()
+        uploads = [
+            _store(upload, file_name, content_type, file_key, storage, staged_key, after=thumbnail_read),
+            _generate_thumbnails(upload, file_key, storage, thumbnail_read),
+        ]
+    else:
+        uploads = [_store(upload, file_name, content_type, file_key, storage, staged_key)]
+
+    upload_result, *generated = await asyncio.gather(*uploads)
+    if file_id:
+        upload_result["file_id"] = file_id
+
+    return upload_blobs.save(
+        db,
+        sha256=upload.sha256,
+        upload_result=upload_result,
+        thumbnails=generated[0] if generated else [],
+        content_type=content_type,
+        size=upload.size,
+        is_valid=is_valid,
+        validation_errors=validation_errors + validation_warnings,
+    )
+
+
+async def _store(
+    upload: upload_spool.SpooledUpload,
+    file_name: str,
+    content_type: str,
+    file_key: str,
+    storage: StorageService,
+    staged_key: Optional[str],
+    after: Optional[asyncio.Event] = None,
+) -> dict:
+    """
+    Store a file under file_key; returns a StorageService.upload_file() result.
+
+    If the file has to be uploaded rather than copied, its handle isn't read
+    until ``after`` is set.
+    """
+    if staged_key is not None:
+        file_url = await storage.copy_object(staged_key, file_key, content_type)
+        if file_url:
+            return {
+                "file_id": uuid.uuid4().hex,
+                "file_url": file_url,
+                "storage_key": file_key,
+                "storage_type": "s3",
+            }
+
+    if after is not None:
+        await after.wait()
+    return await storage.upload_file(
+        file=upload.rewind(),
+        original_filename=file_name,
+        content_type=content_type,
+        file_key=file_key,
+    )
+
+
+async def stage(
+    db: Session,
+    storage: StorageService,
+    upload: upload_spool.SpooledUpload,
+    file_name: str,
+) -> tuple[DesignUpload, Job]:
+    """
+    Store a checked upload under a staging key and queue its processing.
+
+    Returns:
+        The upload record and its processing job
+    """
+    file_id = uuid.uuid4().hex
+    result = await storage.upload_file(
+        file=upload.rewind(),
+        original_filename=file_name,
+        content_type=upload.detected_type,
+        file_key=f"{STAGING_PREFIX}/{file_id}{file_extension(file_name)}",
+    )
+    now = datetime.utcnow()
+    record = DesignUpload(
+        file_id=file_id,
+        file_name=file_name,
+        storage_key=result["storage_key"],
+        storage_type=result["storage_type"],
+        declared_size=upload.size,
+        status=DesignUploadStatus.UPLOADED,
+        expires_at=now,
+        completed_at=now,
+    )
+    db.add(record)
+    db.flush()
+    job = _enqueue_processing(db, record)
+    db.commit()
+    return record, job
+
+
+def record_duplicate(db: Session, blob: UploadBlob, file_name: str) -> DesignUpload:
+    """
+    Record an upload of content that is already stored.
+
+    Returns:
+        A new, ready upload record for the stored blob
+    """
+    upload_blobs.record_reuse(db, blob)
+    now = datetime.utcnow()
+    record = DesignUpload(
+        file_id=uuid.uuid4().hex,
+        file_name=file_name,
+        storage_key=blob.storage_key,
+        storage_type=blob.storage_type,
+        declared_size=blob.size,
+        status=DesignUploadStatus.READY,
+        blob_id=blob.id,
+        expires_at=now,
+        completed_at=now,
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+
+def presign(db: Session, storage: StorageService, file_name: str, size: int) -> tuple[DesignUpload, str]:
+    """
+    Start a direct-to-storage upload.
+
+    The caller checks the extension and size first.
+
+    Returns:
+        The upload record and the presigned URL to PUT the file to
+    """
+    settings = get_settings()
+    file_id = uuid.uuid4().hex
+    record = DesignUpload(
+        file_id=file_id,
+        file_name=file_name,
+        storage_key=f"{STAGING_PREFIX}/{file_id}{file_extension(file_name)}",
+        storage_type="s3",
+        declared_size=size,
+        status=DesignUploadStatus.PENDING,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.presigned_upload_expiry_seconds),
+    )
+    url = storage.presign_put(
+        record.storage_key,
+        content_type=upload_content_type(record),
+        content_length=size,
+        expires_in=settings.presigned_upload_expiry_seconds,
+    )
+    db.add(record)
+    db.commit()
+    return record, url
+
+
+def upload_content_type(record: DesignUpload) -> str:
+    """Content type the client must upload a file with."""
+    return EXTENSION_TYPES[file_extension(record.file_name)]
+
+
+def get(db: Session, file_id: str) -> Optional[DesignUpload]:
+    """An upload by file ID."""
+    return db.execute(select(DesignUpload).where(DesignUpload.file_id == file_id)).scalar_one_or_none()
+
+
+async def complete(db: Session, storage: StorageService, record: DesignUpload) -> Optional[Job]:
+    """
+    Mark a direct-to-storage upload as uploaded, once its object exists.
+
+    Returns:
+        The job now queued to process it; None if it was already reported
+        complete
+
+    Raises:
+        InvalidUpload: If the file isn't in storage
+    """
+    if record.status != DesignUploadStatus.PENDING:
+        return None
+
+    if await storage.head(record.storage_key) is None:
+        raise InvalidUpload("File has not been uploaded")
+
+    record.status = DesignUploadStatus.UPLOADED
+    record.completed_at = datetime.utcnow()
+    job = _enqueue_processing(db, record)
+    db.commit()
+    return job
+
+
+def _enqueue_processing(db: Session, record: DesignUpload) -> Job:
+    return jobs.enqueue(db, PROCESS_JOB, {"upload_id": record.id})
+
+
+async def process_staged(
+    db: Session,
+    record: DesignUpload,
+    storage: StorageService,
+    dxf_validator: DXFValidator,
+    image_validator: ImageValidator,
+    max_size: int,
+) -> None:
+    """
+    Process a staged upload.
+
+    Streams the staged file into a spool, processes it, and records the
+    outcome on the upload record. The staged file is deleted once the
+    outcome is recorded. Safe to run again for the same upload.
+
+    Raises:
+        Errors reading or storing files, which are worth retrying
+    """
+    if record.status not in (DesignUploadStatus.READY, DesignUploadStatus.FAILED):
+        record.status = DesignUploadStatus.PROCESSING
+        db.commit()
+        await _process_record(db, record, storage, dxf_validator, image_validator, max_size)
+
+    await storage.delete_file(record.storage_key, record.storage_type)
+
+
+async def _process_record(
+    db: Session,
+    record: DesignUpload,
+    storage: StorageService,
+    dxf_validator: DXFValidator,
+    image_validator: ImageValidator,
+    max_size: int,
+) -> None:
+    try:
+        upload = await upload_spool.spool(
+            storage.iter_object(record.storage_key, record.storage_type), max_size
+        )
+        try:
+            blob = await process(
+                db, upload, record.file_name, storage, dxf_validator, image_validator,
+                staged_key=record.storage_key if record.storage_type == "s3" else None,
+                file_id=record.file_id,
+            )
+        finally:
+            upload.close()
+    except InvalidUpload as e:
+        _fail(db, record, str(e))
+    except upload_spool.UploadTooLarge:
+        _fail(db, record, f"File size exceeds maximum allowed ({max_size / 1024 / 1024}MB)")
+    else:
+        record.blob_id = blob.id
+        record.status = DesignUploadStatus.READY
+        db.commit()
+
+
+@jobs.handler(PROCESS_JOB)
+async def _process_job(db: Session, job: Job, payload: dict) -> None:
+    """Job handler: process a staged upload."""
+    record = db.get(DesignUpload, payload["upload_id"])
+    if record is None:
+        raise jobs.PermanentError(f"Design upload {payload['upload_id']} not found")
+
+    try:
+        await process_staged(
+            db, record, get_storage(), DXFValidator(), ImageValidator(), get_settings().upload_max_bytes
+        )
+    except Exception:
+        if jobs.last_attempt(job):
+            db.rollback()
+            _fail(db, record, "The file could not be processed")
+        raise
+
+
+def _fail(db: Session, record: DesignUpload, error: str) -> None:
+    record.status = DesignUploadStatus.FAILED
+    record.error = error
+    db.commit()
+
+
+async def _generate_thumbnails(
+    upload: upload_spool.SpooledUpload,
+    original_key: str,
+    storage: StorageService,
+    read: asyncio.Event,
+) -> list[dict]:
+    """
+    Render and store an image's thumbnails next to it (see ``thumbnails``).
+
+    The file is read once the validation pool has a slot for the render;
+    ``read`` is set once it has been read, or once rendering has failed.
+
+    Returns:
+        [{"size", "format", "url"}], smallest size first and best format
+        first within a size; empty if rendering fails
+    """
+    settings = get_settings()
+
+    def load() -> bytes:
+        try:
+            return upload.rewind().read()
+        finally:
+            read.set()
+
+    try:
+        # Rendering is CPU-bound, so it runs in the validation pool
+        images = await validation_pool.run(
+            thumbnails.render,
+            settings.thumbnail_sizes,
+            thumbnails.supported_formats(settings.thumbnail_formats),
+            load=load,
+        )
+        keys = {(size, fmt): storage.thumbnail_key(original_key, size, fmt) for size, fmt in images}
+        urls = await asyncio.gather(*(
+            storage.put_object(content, keys[size, fmt], thumbnails.CONTENT_TYPES[fmt])
+            for (size, fmt), content in images.items()
+        ))
+    except Exception:
+        # Failed to generate thumbnails (including timing out)
+        return []
+    finally:
+        read.set()
+
+    stored = [
+        {"size": size, "format": fmt, "url": url}
+        for ((size, fmt), _), url in zip(images.items(), urls)
+    ]
+    # render() yields each size's formats in preference order
+    return sorted(stored, key=lambda thumbnail: thumbnail["size"])
@@ -1,6 +1,35 @@
-"""DXF file validation service."""
-from typing import Optional
+"""DXF file validation service.
+
+Validators read from a binary file handle (e.g. a spooled upload) rather
+than bytes, and scan it line by line or let the parser stream it, so no
+decoded copy of the whole file is made.
+
+The checks are CPU-bound, so ``validate()`` runs ``check()`` in the
+validation process pool and the event loop stays free for other requests.
+"""
+from typing import BinaryIO, Iterator, Optional
+import codecs
 import io
+import os
+
+from . import validation_pool
+
+
+def _file_size(file: BinaryIO) -> int:
+    """Size of a seekable file, leaving it at the start."""
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    return size
+
+
+def _text_lines(file: BinaryIO) -> Iterator[str]:
+    """Decode a binary file line by line without closing it afterwards."""
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding="utf-8", errors="ignore")
+    try:
+        yield from text
+    finally:
+        text.detach()
 
 
 class DXFValidator:
@@ -27,12 +56,34 @@ class DXFValidator:
         except ImportError:
             pass
 
-    async def validate(self, file_content: bytes, filename: str) -> dict:
+    # Entity types counted when ezdxf is unavailable
+    BASIC_ENTITY_TYPES = {"LINE", "CIRCLE", "ARC", "POLYLINE", "LWPOLYLINE"}
+
+    async def validate(self, file: BinaryIO, filename: str) -> dict:
+        """
+        Validate a DXF file for laser cutting compatibility in the validation pool.
+
+        Args:
+            file: The DXF file, opened in binary mode and seekable
+            filename: Original filename
+
+        Returns:
+            dict with validation results
+        """
+        file.seek(0)
+        try:
+            return await validation_pool.run(_check_dxf, filename, load=file.read)
+        except validation_pool.ValidationTimeout:
+            return self._build_result(
+                False, ["DXF validation timed out: the drawing is too complex"], [], 0, [], None
+            )
+
+    def check(self, file: BinaryIO, filename: str) -> dict:
         """
         Validate a DXF file for laser cutting compatibility.
 
         Args:
-            file_content: The DXF file content as bytes
+            file: The DXF file, opened in binary mode and seekable
             filename: Original filename
 
         Returns:
@@ -45,7 +96,7 @@ class DXFValidator:
         bounding_box = None
 
         # Check file size
-        file_size = len(file_content)
+        file_size = _file_size(file)
         if file_size > self.MAX_FILE_SIZE:
             errors.append(f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed ({self.MAX_FILE_SIZE / 1024 / 1024}MB)")
 
@@ -53,35 +104,48 @@ class DXFValidator:
         if not filename.lower().endswith('.dxf'):
             errors.append("File must have .dxf extension")
 
-        # Basic structure validation
-        try:
-            content_str = file_content.decode('utf-8', errors='ignore')
-        except Exception:
-            try:
-                content_str = file_content.decode('latin-1', errors='ignore')
-            except Exception:
-                errors.append("Unable to decode file content")
-                return self._build_result(False, errors, warnings, entity_count, layers, bounding_box)
+        # Basic structure validation: DXF is group code / value line pairs
+        has_section = has_endsec = has_eof = has_entities = False
+        basic_entity_count = 0
+        previous = None
+        for raw_line in _text_lines(file):
+            line = raw_line.strip()
+            if line == "SECTION" and previous == "0":
+                has_section = True
+            elif line == "ENDSEC":
+                has_endsec = True
+            elif line == "EOF":
+                has_eof = True
+            elif line == "ENTITIES":
+                has_entities = True
+            elif line in self.BASIC_ENTITY_TYPES:
+                basic_entity_count += 1
+            previous = line
 
         # Check for DXF header markers
-        if "0\nSECTION" not in content_str and "0\r\nSECTION" not in content_str:
+        if not has_section:
             errors.append("Invalid DXF format: Missing SECTION markers")
 
-        if "ENDSEC" not in content_str:
+        if not has_endsec:
             errors.append("Invalid DXF format: Missing ENDSEC markers")
 
-        if "EOF" not in content_str:
+        if not has_eof:
             warnings.append("DXF file may be incomplete: Missing EOF marker")
 
         # Check for ENTITIES section (required for laser cutting)
-        if "ENTITIES" not in content_str:
+        if not has_entities:
             errors.append("DXF file must contain ENTITIES section for laser cutting")
 
         # Try advanced validation with ezdxf if available
         if self._ezdxf_available and not errors:
             try:
                 import ezdxf
-                doc = ezdxf.read(io.BytesIO(file_content))
+                file.seek(0)
+                text = io.TextIOWrapper(file, encoding="utf-8", errors="ignore")
+                try:
+                    doc = ezdxf.read(text)
+                finally:
+                    text.detach()
 
                 # Count entities
                 modelspace = doc.modelspace()
@@ -123,10 +187,8 @@ class DXFValidator:
                 errors.append(f"Failed to parse DXF file: {str(e)}")
         elif not self._ezdxf_available:
             warnings.append("Advanced DXF validation unavailable (ezdxf not installed)")
-            # Basic entity count from string parsing
-            entity_count = content_str.count("\nLINE\n") + content_str.count("\nCIRCLE\n") + \
-                          content_str.count("\nARC\n") + content_str.count("\nPOLYLINE\n") + \
-                          content_str.count("\nLWPOLYLINE\n")
+            # Basic entity count from the line scan
+            entity_count = basic_entity_count
 
         return self._build_result(
             is_valid=len(errors) == 0,
@@ -173,12 +235,33 @@ class ImageValidator:
         "image/svg+xml": [".svg"],
     }
 
-    async def validate(self, file_content: bytes, filename: str, content_type: str) -> dict:
+    # Longest marker searched for in SVG text, less one; kept between chunks
+    SVG_SCAN_OVERLAP = len("<script") - 1
+
+    async def validate(self, file: BinaryIO, filename: str, content_type: str) -> dict:
+        """
+        Validate an image file for design upload in the validation pool.
+
+        Args:
+            file: The image file, opened in binary mode and seekable
+            filename: Original filename
+            content_type: MIME type of the file
+
+        Returns:
+            dict with validation results
+        """
+        file.seek(0)
+        try:
+            return await validation_pool.run(_check_image, filename, content_type, load=file.read)
+        except validation_pool.ValidationTimeout:
+            return {"is_valid": False, "errors": ["Image validation timed out"], "warnings": []}
+
+    def check(self, file: BinaryIO, filename: str, content_type: str) -> dict:
         """
         Validate an image file for design upload.
 
         Args:
-            file_content: The image file content as bytes
+            file: The image file, opened in binary mode and seekable
             filename: Original filename
             content_type: MIME type of the file
 
@@ -189,7 +272,7 @@ class ImageValidator:
         warnings = []
 
         # Check file size
-        file_size = len(file_content)
+        file_size = _file_size(file)
         if file_size > self.MAX_FILE_SIZE:
             errors.append(f"File size ({file_size / 1024 / 1024:.2f}MB) exceeds maximum allowed ({self.MAX_FILE_SIZE / 1024 / 1024}MB)")
 
@@ -206,10 +289,10 @@ class ImageValidator:
         # SVG-specific validation
         if content_type == "image/svg+xml":
             try:
-                content_str = file_content.decode('utf-8')
-                if "<svg" not in content_str.lower():
+                has_svg, has_script = self._scan_svg(file)
+                if not has_svg:
                     errors.append("Invalid SVG file: Missing <svg> element")
-                if "<script" in content_str.lower():
+                if has_script:
                     errors.append("SVG file contains script elements which are not allowed")
             except UnicodeDecodeError:
                 errors.append("Invalid SVG file: Unable to decode as UTF-8")
@@ -218,8 +301,10 @@ class ImageValidator:
         if content_type in ["image/png", "image/jpeg"]:
             try:
                 from PIL import Image
-                img = Image.open(io.BytesIO(file_content))
-                width, height = img.size
+                file.seek(0)
+                # Only the header is read to get the size
+                with Image.open(file) as img:
+                    width, height = img.size
 
                 if width < self.MIN_DIMENSION or height < self.MIN_DIMENSION:
                     warnings.append(
@@ -236,3 +321,35 @@ class ImageValidator:
             "errors": errors,
             "warnings": warnings,
         }
+
+    def _scan_svg(self, file: BinaryIO, chunk_size: int = 64 * 1024) -> tuple[bool, bool]:
+        """
+        Look for <svg and <script in an SVG, a chunk at a time.
+
+        Returns:
+            (has <svg> element, has <script> element)
+
+        Raises:
+            UnicodeDecodeError: The file isn't UTF-8
+        """
+        file.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        has_svg = has_script = False
+        tail = ""
+        while chunk := file.read(chunk_size):
+            text = tail + decoder.decode(chunk).lower()
+            has_svg = has_svg or "<svg" in text
+            has_script = has_script or "<script" in text
+            tail = text[-self.SVG_SCAN_OVERLAP:]
+        decoder.decode(b"", final=True)
+        return has_svg, has_script
+
+
+def _check_dxf(data: bytes, filename: str) -> dict:
+    """Validation pool task for DXFValidator.validate."""
+    return DXFValidator().check(io.BytesIO(data), filename)
+
+
+def _check_image(data: bytes, filename: str, content_type: str) -> dict:
+    """Validation pool task for ImageValidator.validate."""
+    return ImageValidator().check(io.BytesIO(data), filename, content_type)
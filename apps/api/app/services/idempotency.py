@@ -0,0 +1,273 @@
+"""Idempotency-Key support for non-idempotent POST endpoints.
+
+The web client retries POSTs on timeouts and 5xx responses, so the same
+checkout or shipment request can arrive more than once. A request carrying
+an ``Idempotency-Key`` header claims the key by inserting a row (the
+unique constraint on (scope, key) arbitrates concurrent claims), runs,
+and stores its response. Retries with the same key and body get the
+stored response back instead of running again.
+
+- same key, different body: IdempotencyKeyReused
+- same key while the first request is still running: IdempotencyKeyInProgress
+- the first request failed before committing anything: the key is released
+  so a retry runs again
+- the first request committed (e.g. created the order) and then failed: its
+  error is stored and replayed, so a retry can't repeat the committed work
+
+Completed keys are kept for ``idempotency_key_ttl_hours``; an in-flight
+key whose request died is reclaimable after ``idempotency_lock_seconds``,
+which must outlast the slowest handler (checkout makes several TCG calls).
+Expired rows are deleted by ``purge_expired()``.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+import hashlib
+import json
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.idempotency import IdempotencyKey
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request body."""
+
+
+class IdempotencyKeyInProgress(Exception):
+    """A request with this key is still being processed."""
+
+
+@dataclass(frozen=True)
+class Claim:
+    """
+    An in-flight claim owned by one request.
+
+    SQLite can reuse the id of a deleted row, so a claim that was taken over
+    is told apart from its successor by its lock expiry as well.
+    """
+    id: int
+    expires_at: datetime
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """Response recorded for a completed key."""
+    status_code: int
+    body: Any
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable hash of a request body."""
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def claim(
+    db: Session, scope: str, key: str, request_fingerprint: str
+) -> tuple[Optional[Claim], Optional[StoredResponse]]:
+    """
+    Claim a key for a new request, or find the response it already produced.
+
+    The claim is committed immediately so concurrent retries see it.
+
+    Returns:
+        Tuple of (claimed, stored). If the caller now owns the key, claimed
+        is its claim and stored is None; otherwise claimed is None and
+        stored is the response to replay
+
+    Raises:
+        IdempotencyKeyReused: The key was used for a different request body
+        IdempotencyKeyInProgress: The original request hasn't finished
+    """
+    settings = get_settings()
+    for _ in range(2):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.idempotency_lock_seconds)
+        try:
+            with db.begin_nested():
+                result = db.execute(
+                    insert(IdempotencyKey).values(
+                        scope=scope,
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        expires_at=expires_at,
+                    )
+                )
+            db.commit()
+            return Claim(result.inserted_primary_key[0], expires_at), None
+        except IntegrityError:
+            pass
+
+        existing = db.execute(
+            select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        ).scalar_one_or_none()
+        if existing is None:
+            continue  # Purged between our insert and select; claim again
+
+        if existing.expires_at <= now:
+            # Abandoned in-flight claim or stale response: take it over
+            db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.id == existing.id,
+                    IdempotencyKey.expires_at <= now,
+                )
+            )
+            db.commit()
+            continue
+
+        if existing.fingerprint != request_fingerprint:
+            raise IdempotencyKeyReused()
+        if existing.status_code is None:
+            raise IdempotencyKeyInProgress()
+        return None, StoredResponse(existing.status_code, json.loads(existing.response_body))
+
+    raise IdempotencyKeyInProgress()
+
+
+def store_response(db: Session, claimed: Claim, status_code: int, body: Any) -> bool:
+    """
+    Record the response for a claimed key and keep it for the TTL.
+
+    Only the claim this request made is updated, and only while it is still
+    in flight, so a request whose claim was taken over can't overwrite the
+    response of the request that took it.
+
+    Returns:
+        True if the response was stored
+    """
+    ttl = timedelta(hours=get_settings().idempotency_key_ttl_hours)
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.id == claimed.id,
+            IdempotencyKey.expires_at == claimed.expires_at,
+            IdempotencyKey.status_code.is_(None),
+        )
+        .values(
+            status_code=status_code,
+            response_body=json.dumps(jsonable_encoder(body)),
+            expires_at=datetime.utcnow() + ttl,
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def store_error(db: Session, claimed: Claim, error: BaseException) -> bool:
+    """
+    Record a failed request's error as its response.
+
+    Used when the request committed before failing: rerunning it would
+    repeat that work, so retries get the error instead.
+
+    Returns:
+        True if the error was stored
+    """
+    db.rollback()
+    if isinstance(error, HTTPException):
+        return store_response(db, claimed, error.status_code, {"detail": error.detail})
+    return store_response(db, claimed, 500, {"detail": "Internal Server Error"})
+
+
+def release(db: Session, claimed: Claim) -> None:
+    """Drop an in-flight claim after a failed request so a retry runs again."""
+    db.rollback()
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.id == claimed.id,
+            IdempotencyKey.expires_at == claimed.expires_at,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    db.commit()
+
+
+async def run(
+    db: Session,
+    scope: str,
+    key: Optional[str],
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+) -> tuple[Any, bool]:
+    """
+    Run a request handler at most once per idempotency key.
+
+    Successful results are stored. If the handler raises, the exception
+    propagates and the key is released, unless the handler had already
+    committed; then the error is stored and replayed to retries.
+
+    Args:
+        db: Database session
+        scope: Endpoint name the key is scoped to
+        key: Idempotency-Key header value (None runs the handler unguarded)
+        payload: Request body, fingerprinted to detect key reuse
+        handler: Coroutine function producing the response model
+
+    Returns:
+        Tuple of (response, replayed). A replayed response is the stored
+        JSON body rather than the response model.
+
+    Raises:
+        HTTPException: Replay of a stored error
+    """
+    if key is None:
+        return await handler(), False
+
+    claimed, stored = claim(db, scope, key, fingerprint(payload))
+    if stored is not None:
+        if stored.status_code >= 400:
+            raise HTTPException(
+                status_code=stored.status_code,
+                detail=stored.body["detail"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+        return stored.body, True
+
+    commits = []
+
+    def on_commit(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", on_commit)
+    try:
+        result = await handler()
+    except BaseException as error:
+        event.remove(db, "after_commit", on_commit)
+        if commits:
+            store_error(db, claimed, error)
+        else:
+            release(db, claimed)
+        raise
+    event.remove(db, "after_commit", on_commit)
+
+    store_response(db, claimed, 200, result)
+    return result, False
+
+
+def purge_expired(db: Session, batch_size: int = 500) -> int:
+    """
+    Delete expired keys in small batches.
+
+    Returns:
+        Number of keys deleted
+    """
+    total = 0
+    while True:
+        ids = list(
+            db.execute(
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            return total
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+        db.commit()
+        total += len(ids)
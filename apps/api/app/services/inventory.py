@@ -0,0 +1,305 @@
+"""Inventory reservations.
+
+Checkout reserves stock for a pending order by bumping
+``Variant.reserved_qty`` with a conditional UPDATE that only succeeds while
+``inventory_qty - reserved_qty`` still covers the quantity, so two shoppers
+can never both hold the last unit. Each reservation is recorded as an
+``InventoryHold`` that expires after ``inventory_hold_ttl_minutes``.
+
+Holds end in one of three ways:
+- converted when Payfast reports the payment COMPLETE
+- released when the order is cancelled
+- expired when the TTL passes first. Due holds are expired lazily, just
+  before new reservations for the same variants, and in bulk by the
+  periodic ``expire_holds()`` job.
+
+When an order is paid its stock is decremented by ``complete_order()``
+with one set-based UPDATE, guarded by a conditional status transition so
+repeated or concurrent ITNs for the same order only decrement once.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, insert, bindparam, case, func, and_, or_
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.inventory import InventoryHold, HoldStatus
+from ..models.order import Order, OrderItem, OrderStatus
+from ..models.product import Variant
+
+
+class InsufficientStock(Exception):
+    """Raised when a variant can't cover a reservation."""
+
+    def __init__(self, variant_id: int, requested: int, available: int):
+        self.variant_id = variant_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Variant {variant_id}: {available} available, {requested} requested")
+
+
+@dataclass(frozen=True)
+class Oversell:
+    """Paid quantity the variant's stock couldn't cover."""
+    variant_id: int
+    sold: int
+    shortfall: int
+
+
+# cancel_reason of an order the expiry sweep cancelled before it was paid
+EXPIRED_REASON = "expired"
+
+# A COMPLETE payment may move a pending order to PAID, or an expired one: a
+# late payment for it is still a sale. Orders cancelled for any other reason
+# (e.g. by an admin after payment) stay cancelled.
+PAYABLE = or_(
+    Order.status == OrderStatus.PENDING,
+    and_(Order.status == OrderStatus.CANCELLED, Order.cancel_reason == EXPIRED_REASON),
+)
+
+
+def reserve_order(
+    db: Session,
+    order_id: int,
+    lines: Iterable[tuple[int, int]],
+    ttl_minutes: Optional[int] = None,
+) -> list[int]:
+    """
+    Hold stock for every line of a pending order.
+
+    Runs inside the caller's transaction; on InsufficientStock the caller
+    must roll back so holds already taken for earlier lines are undone.
+
+    Args:
+        db: Database session
+        order_id: The pending order
+        lines: (variant_id, quantity) pairs
+        ttl_minutes: Hold lifetime (defaults to inventory_hold_ttl_minutes)
+
+    Returns:
+        IDs of the created holds
+    """
+    merged: dict[int, int] = defaultdict(int)
+    for variant_id, quantity in lines:
+        merged[variant_id] += quantity
+    if not merged:
+        return []
+
+    expire_holds(db, variant_ids=merged.keys())
+
+    # Lock rows in a consistent order so concurrent reservations can't deadlock
+    for variant_id in sorted(merged):
+        quantity = merged[variant_id]
+        result = db.execute(
+            update(Variant)
+            .where(
+                Variant.id == variant_id,
+                Variant.inventory_qty - Variant.reserved_qty >= quantity,
+            )
+            .values(reserved_qty=Variant.reserved_qty + quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStock(variant_id, quantity, available_qty(db, variant_id))
+
+    ttl = ttl_minutes if ttl_minutes is not None else get_settings().inventory_hold_ttl_minutes
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl)
+    return list(
+        db.execute(
+            insert(InventoryHold).returning(InventoryHold.id),
+            [
+                {
+                    "variant_id": variant_id,
+                    "order_id": order_id,
+                    "quantity": quantity,
+                    "status": HoldStatus.ACTIVE,
+                    "expires_at": expires_at,
+                }
+                for variant_id, quantity in sorted(merged.items())
+            ],
+        ).scalars()
+    )
+
+
+def available_qty(db: Session, variant_id: int) -> int:
+    """Get a variant's available-to-sell quantity from the database."""
+    row = db.execute(
+        select(Variant.inventory_qty, Variant.reserved_qty).where(Variant.id == variant_id)
+    ).first()
+    if row is None:
+        return 0
+    return max(0, (row.inventory_qty or 0) - (row.reserved_qty or 0))
+
+
+def expire_holds(
+    db: Session,
+    variant_ids: Optional[Iterable[int]] = None,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Expire active holds whose TTL has passed and return their stock.
+
+    Args:
+        db: Database session
+        variant_ids: Only expire holds for these variants (all if None)
+        now: Current time (for tests)
+
+    Returns:
+        Number of holds expired
+    """
+    now = now or datetime.utcnow()
+    conditions = [InventoryHold.status == HoldStatus.ACTIVE, InventoryHold.expires_at <= now]
+    if variant_ids is not None:
+        conditions.append(InventoryHold.variant_id.in_(list(variant_ids)))
+
+    hold_ids = list(db.execute(select(InventoryHold.id).where(*conditions)).scalars())
+    return _end_holds(db, hold_ids, HoldStatus.EXPIRED)
+
+
+def release_order_holds(db: Session, order_id: int) -> int:
+    """Release an order's active holds (order cancelled). Returns holds released."""
+    return release_holds_for_orders(db, [order_id])
+
+
+def release_holds_for_orders(db: Session, order_ids: list[int]) -> int:
+    """Release the active holds of several cancelled orders. Returns holds released."""
+    if not order_ids:
+        return 0
+    hold_ids = list(
+        db.execute(
+            select(InventoryHold.id).where(
+                InventoryHold.order_id.in_(order_ids),
+                InventoryHold.status == HoldStatus.ACTIVE,
+            )
+        ).scalars()
+    )
+    return _end_holds(db, hold_ids, HoldStatus.RELEASED)
+
+
+def convert_order_holds(db: Session, order_id: int) -> int:
+    """
+    Mark an order's active holds as converted (order paid).
+
+    The reserved quantity is handed back to the variant's counter; the caller
+    decrements inventory_qty for the sold items in the same transaction.
+
+    Returns:
+        Number of holds converted
+    """
+    return _end_holds(db, _active_hold_ids(db, order_id), HoldStatus.CONVERTED)
+
+
+def _active_hold_ids(db: Session, order_id: int) -> list[int]:
+    """Get IDs of an order's active holds."""
+    return list(
+        db.execute(
+            select(InventoryHold.id).where(
+                InventoryHold.order_id == order_id,
+                InventoryHold.status == HoldStatus.ACTIVE,
+            )
+        ).scalars()
+    )
+
+
+def _end_holds(db: Session, hold_ids: list[int], status: HoldStatus) -> int:
+    """
+    Move active holds to a final status and un-reserve their stock.
+
+    The status UPDATE is conditional on the hold still being ACTIVE, so a hold
+    ended concurrently (e.g. expired by the sweep while the ITN converts it)
+    only gives its stock back once.
+    """
+    if not hold_ids:
+        return 0
+
+    ended = db.execute(
+        update(InventoryHold)
+        .where(InventoryHold.id.in_(hold_ids), InventoryHold.status == HoldStatus.ACTIVE)
+        .values(status=status)
+        .returning(InventoryHold.variant_id, InventoryHold.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    released: dict[int, int] = defaultdict(int)
+    for variant_id, quantity in ended:
+        released[variant_id] += quantity
+    if released:
+        variants = Variant.__table__
+        db.execute(
+            update(variants)
+            .where(variants.c.id == bindparam("vid"))
+            .values(reserved_qty=variants.c.reserved_qty - bindparam("qty")),
+            [{"vid": variant_id, "qty": quantity} for variant_id, quantity in released.items()],
+        )
+    return len(ended)
+
+
+def complete_order(db: Session, order_id: int) -> Optional[list[Oversell]]:
+    """
+    Mark an order paid and take its items out of stock.
+
+    The status UPDATE comes first and only matches a payable order, so it
+    both takes the write lock and makes the call idempotent: a duplicate or
+    concurrent completion of the same order matches nothing and returns
+    None without touching stock. Runs in the caller's transaction.
+
+    Returns:
+        Oversold lines (empty if stock covered everything), or None if the
+        order was already paid or isn't payable
+    """
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order_id, PAYABLE)
+        .values(status=OrderStatus.PAID, cancel_reason=None)
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount != 1:
+        return None
+
+    convert_order_holds(db, order_id)
+    return decrement_order_stock(db, order_id)
+
+
+def decrement_order_stock(db: Session, order_id: int) -> list[Oversell]:
+    """
+    Decrement stock for all of an order's items with one UPDATE.
+
+    Stock that goes negative is clamped to zero and reported as oversold.
+
+    Returns:
+        Oversold lines (empty if stock covered everything)
+    """
+    quantities = dict(
+        db.execute(
+            select(OrderItem.variant_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.order_id == order_id)
+            .group_by(OrderItem.variant_id)
+        ).all()
+    )
+    if not quantities:
+        return []
+
+    variants = Variant.__table__
+    sold = case(quantities, value=variants.c.id, else_=0)
+    remaining = db.execute(
+        update(variants)
+        .where(variants.c.id.in_(list(quantities)))
+        .values(inventory_qty=func.coalesce(variants.c.inventory_qty, 0) - sold)
+        .returning(variants.c.id, variants.c.inventory_qty)
+    ).all()
+
+    oversold = [
+        Oversell(variant_id=variant_id, sold=quantities[variant_id], shortfall=-qty)
+        for variant_id, qty in remaining
+        if qty < 0
+    ]
+    if oversold:
+        db.execute(
+            update(variants)
+            .where(variants.c.id.in_([o.variant_id for o in oversold]))
+            .values(inventory_qty=0)
+        )
+    return oversold
@@ -0,0 +1,237 @@
+"""Durable background job queue.
+
+Work that must not be lost with a request, such as processing an uploaded
+design, is queued as a row in the ``jobs`` table, in the same transaction
+as the change that needs it. Job workers claim due jobs one at a time and
+run them; several workers can share the queue. Each API process runs one
+(see ``job_worker_in_app``), and ``scripts/run_jobs.py`` runs more on
+their own.
+
+A claimed job is leased to its worker for ``job_lease_seconds``. If the
+worker dies mid-job, the job is claimed again once the lease runs out, so
+handlers must be safe to run more than once. A failed job is retried with
+exponential backoff and jitter until ``job_max_attempts`` runs; a handler
+raises ``PermanentError`` to give up straight away.
+
+Handlers are registered by job kind with ``@handler(kind)``. They are
+coroutines taking a session, the job and its decoded payload, and commit
+their own changes.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import json
+import logging
+import random
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Session, Job, dict], Awaitable[None]]
+
+HANDLERS: dict[str, Handler] = {}
+
+# Longest last_error kept on a job
+MAX_ERROR_LENGTH = 2000
+
+
+class PermanentError(Exception):
+    """The job can't succeed; fail it without retrying."""
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register a coroutine as the handler for a job kind."""
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: dict[str, Any], delay: float = 0) -> Job:
+    """
+    Queue a job.
+
+    The caller commits, so the job is queued together with the change that
+    needs it.
+    """
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=get_settings().job_max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    Seconds to wait before retrying after a job's attempt-th failure.
+
+    Doubles with each attempt up to job_retry_max_seconds, and is spread
+    over the upper half of that so retries of jobs that failed together
+    don't all land at once.
+    """
+    settings = get_settings()
+    delay = min(settings.job_retry_base_seconds * 2 ** (attempt - 1), settings.job_retry_max_seconds)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def last_attempt(job: Job) -> bool:
+    """Whether a failure of this run will fail the job for good."""
+    return job.attempts >= job.max_attempts
+
+
+def claim(db: Session) -> Optional[Job]:
+    """
+    Claim the next due job, leasing it to this worker.
+
+    Due jobs are queued jobs whose run_at has passed, and running jobs
+    whose lease has run out.
+    """
+    now = datetime.utcnow()
+    due = (
+        select(Job.id)
+        .where(_is_due(now))
+        .order_by(Job.run_at)
+        .limit(1)
+        .scalar_subquery()
+    )
+    job_id = _lease(db, Job.id == due, now)
+    return db.get(Job, job_id) if job_id is not None else None
+
+
+def _is_due(now: datetime):
+    """Condition matching jobs a worker may claim at now."""
+    return or_(
+        and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),
+    )
+
+
+def _lease(db: Session, condition, now: datetime) -> Optional[int]:
+    """Lease the job matching condition; returns its id, or None if none matched."""
+    # One statement, so two workers can't claim the same job
+    job_id = db.execute(
+        update(Job)
+        .where(condition)
+        .values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            locked_until=now + timedelta(seconds=get_settings().job_lease_seconds),
+        )
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    db.commit()
+    return job_id
+
+
+async def run(db: Session, job: Job) -> None:
+    """Run a claimed job, recording success, a retry or failure."""
+    fn = HANDLERS.get(job.kind)
+    try:
+        if fn is None:
+            raise PermanentError(f"No handler for job kind '{job.kind}'")
+        await fn(db, job, json.loads(job.payload))
+    except Exception as e:
+        db.rollback()
+        _record_failure(db, job, e)
+    else:
+        job.status = JobStatus.DONE
+        job.locked_until = None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+
+async def run_now(db: Session, job: Job) -> bool:
+    """
+    Claim and run a job in this process, without waiting for a worker.
+
+    The claim is the same conditional UPDATE workers use, so a job a worker
+    picked up first is left to it.
+
+    Returns:
+        True if the job was run here, False if a worker had claimed it
+    """
+    now = datetime.utcnow()
+    if _lease(db, and_(Job.id == job.id, _is_due(now)), now) is None:
+        return False
+    db.refresh(job)
+    await run(db, job)
+    return True
+
+
+def _record_failure(db: Session, job: Job, error: Exception) -> None:
+    job.last_error = f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+    job.locked_until = None
+    if isinstance(error, PermanentError) or last_attempt(job):
+        job.status = JobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        logger.error(f"Job {job.id} ({job.kind}) failed after {job.attempts} attempts: {job.last_error}")
+    else:
+        job.status = JobStatus.QUEUED
+        job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, retrying: {job.last_error}")
+    db.commit()
+
+
+async def run_once(session_factory: Callable[[], Session]) -> bool:
+    """
+    Claim and run one due job in a fresh session.
+
+    Returns:
+        True if a job was run, False if none was due
+    """
+    db = session_factory()
+    try:
+        job = claim(db)
+        if job is None:
+            return False
+        await run(db, job)
+        return True
+    finally:
+        db.close()
+
+
+async def run_pending(session_factory: Callable[[], Session]) -> int:
+    """Run jobs until none is due; returns how many were run."""
+    count = 0
+    while await run_once(session_factory):
+        count += 1
+    return count
+
+
+async def work(session_factory: Callable[[], Session], stop: asyncio.Event) -> None:
+    """Run jobs as they fall due until stop is set."""
+    poll_seconds = get_settings().job_poll_seconds
+    while not stop.is_set():
+        try:
+            ran = await run_once(session_factory)
+        except Exception:
+            logger.exception("Job worker failed to claim a job")
+            ran = False
+        if not ran:
+            try:
+                await asyncio.wait_for(stop.wait(), poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+def purge_finished(db: Session) -> int:
+    """Delete jobs finished more than job_retention_days ago."""
+    cutoff = datetime.utcnow() - timedelta(days=get_settings().job_retention_days)
+    result = db.execute(
+        delete(Job).where(
+            Job.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+            Job.finished_at < cutoff,
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,91 @@
+"""Process-local cache of serialized order responses.
+
+The order-confirmation page polls GET /orders/{id} until the Payfast ITN
+arrives. Responses are cached as JSON bytes per order so repeated polls
+skip the database, and every code path that changes an order calls
+``invalidate()`` after committing: the Payfast webhook, shipment creation,
+admin status changes and the pending-order expiry sweep.
+
+A read that started before an invalidation must not put its (possibly
+stale) result in the cache afterwards. ``generation()`` is taken before
+reading the database and ``put()`` only stores the response if no
+invalidation happened since. The counter is global rather than per order so
+it needs no per-order bookkeeping; invalidations are rare next to polls, so
+the occasional skipped put costs little.
+
+Entries also expire after ``order_cache_ttl_seconds``. That bounds
+staleness for changes made by another worker process and for catalog
+edits (product titles, SKUs) shown in the response.
+"""
+from collections import OrderedDict
+from typing import Iterable, Optional
+import threading
+import time
+
+from ..core.config import get_settings
+
+# Upper bound on cached orders; the least recently used are dropped first
+MAX_CACHED_ORDERS = 2048
+
+_entries: "OrderedDict[int, tuple[float, bytes]]" = OrderedDict()
+_generation = 0
+_lock = threading.Lock()
+
+
+def get(order_id: int) -> Optional[bytes]:
+    """Get the cached response body for an order, if fresh."""
+    with _lock:
+        entry = _entries.get(order_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _entries[order_id]
+            return None
+        _entries.move_to_end(order_id)
+        return entry[1]
+
+
+def generation() -> int:
+    """Current generation; take it before reading and pass it to put()."""
+    with _lock:
+        return _generation
+
+
+def put(order_id: int, body: bytes, read_generation: int) -> bool:
+    """
+    Cache a response body read at read_generation.
+
+    Returns:
+        False if anything was invalidated since, in which case nothing is cached
+    """
+    ttl = get_settings().order_cache_ttl_seconds
+    with _lock:
+        if _generation != read_generation:
+            return False
+        _entries[order_id] = (time.monotonic() + ttl, body)
+        _entries.move_to_end(order_id)
+        while len(_entries) > MAX_CACHED_ORDERS:
+            _entries.popitem(last=False)
+        return True
+
+
+def invalidate(order_id: int) -> None:
+    """Drop an order's cached response. Call after committing the change."""
+    invalidate_many([order_id])
+
+
+def invalidate_many(order_ids: Iterable[int]) -> None:
+    """Drop several orders' cached responses."""
+    global _generation
+    with _lock:
+        for order_id in order_ids:
+            _entries.pop(order_id, None)
+        _generation += 1
+
+
+def clear() -> None:
+    """Drop every cached response."""
+    global _generation
+    with _lock:
+        _entries.clear()
+        _generation += 1
@@ -0,0 +1,275 @@
+"""Order status events for Server-Sent Events streams.
+
+The Payfast webhook, shipment creation, admin status changes and the
+pending-order expiry sweep publish an ``OrderEvent`` after committing.
+Subscribers are SSE connections: each one is an asyncio queue on the event
+loop, so thousands of idle streams cost a queue each rather than a thread.
+
+Two brokers share one interface:
+
+- ``LocalBroker`` delivers events published in this process. That is all a
+  single-worker deployment needs.
+- ``PollingBroker`` also polls the orders table for rows updated by other
+  workers (``order_events_broker = "db"``), so subscribers see every change
+  within ``order_events_poll_seconds`` without an external message bus.
+  Changes already published locally aren't delivered twice.
+
+A slow subscriber whose queue fills up is dropped rather than allowed to
+hold events in memory; its stream ends and the client reconnects.
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Optional
+import asyncio
+import json
+import logging
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.order import Order, OrderStatus
+from .inventory import EXPIRED_REASON
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which an order's stream has nothing more to report
+FINAL_STATUSES = {OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value, OrderStatus.REFUNDED.value}
+
+# Events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Client reconnect delay sent to EventSource
+RECONNECT_MS = 3000
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    """A change to an order's status or shipment."""
+    order_id: int
+    status: str
+    waybill: Optional[str] = None
+    tracking_url: Optional[str] = None
+    cancel_reason: Optional[str] = None
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderEvent":
+        return cls(
+            order_id=order.id,
+            status=order.status.value,
+            waybill=order.waybill,
+            tracking_url=order.tracking_url,
+            cancel_reason=order.cancel_reason,
+        )
+
+    @property
+    def is_final(self) -> bool:
+        """
+        True once the order can't change any more.
+
+        An order cancelled because it expired unpaid can still be paid by a
+        late ITN, so it isn't final.
+        """
+        if self.status == OrderStatus.CANCELLED.value and self.cancel_reason == EXPIRED_REASON:
+            return False
+        return self.status in FINAL_STATUSES
+
+    def to_sse(self) -> bytes:
+        """Encode as an SSE ``order`` event."""
+        return f"event: order\ndata: {json.dumps(asdict(self))}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One subscriber's queue, optionally limited to a single order."""
+
+    def __init__(self, order_id: Optional[int]):
+        self.order_id = order_id
+        self.queue: asyncio.Queue[Optional[OrderEvent]] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.loop = asyncio.get_running_loop()
+
+    def wants(self, event: OrderEvent) -> bool:
+        return self.order_id is None or self.order_id == event.order_id
+
+    def deliver(self, event: Optional[OrderEvent]) -> bool:
+        """Queue an event (None ends the stream). Runs on the subscriber's loop."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class LocalBroker:
+    """In-process publish/subscribe for order events."""
+
+    def __init__(self):
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, order_id: Optional[int] = None) -> AsyncIterator[Subscription]:
+        """Subscribe to one order's events, or all orders' if order_id is None."""
+        subscription = Subscription(order_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, event: OrderEvent) -> None:
+        """Send an event to matching subscribers. Safe to call from any thread."""
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.wants(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, event)
+            except RuntimeError:
+                # The subscriber's event loop has closed
+                with self._lock:
+                    self._subscriptions.discard(subscription)
+
+    def _deliver(self, subscription: Subscription, event: OrderEvent) -> None:
+        if subscription.deliver(event):
+            return
+        # Too slow: drop it and make room for the end-of-stream marker
+        logger.warning(f"Dropping slow order event subscriber (order {subscription.order_id})")
+        with self._lock:
+            self._subscriptions.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.deliver(None)
+
+
+class PollingBroker(LocalBroker):
+    """LocalBroker that also picks up order changes made by other workers."""
+
+    # Orders whose last published state is remembered, to skip repeats
+    MAX_TRACKED_ORDERS = 10000
+
+    def __init__(self):
+        super().__init__()
+        self._last_seen: "OrderedDict[int, OrderEvent]" = OrderedDict()
+        self._since = datetime.utcnow()
+
+    def publish(self, event: OrderEvent) -> None:
+        with self._lock:
+            if self._last_seen.get(event.order_id) == event:
+                return
+            self._last_seen[event.order_id] = event
+            self._last_seen.move_to_end(event.order_id)
+            while len(self._last_seen) > self.MAX_TRACKED_ORDERS:
+                self._last_seen.popitem(last=False)
+        super().publish(event)
+
+    def poll_once(self, db: Session) -> int:
+        """
+        Publish changes to orders updated since the last poll.
+
+        Returns:
+            Number of orders that changed
+        """
+        # updated_at has one-second resolution on SQLite, so re-read the last
+        # second; repeats are filtered out in publish()
+        since = self._since - timedelta(seconds=1)
+        orders = db.execute(
+            select(Order).where(Order.updated_at >= since).order_by(Order.updated_at)
+        ).scalars().all()
+
+        changed = 0
+        for order in orders:
+            event = OrderEvent.from_order(order)
+            with self._lock:
+                seen = self._last_seen.get(order.id) == event
+            if not seen:
+                self.publish(event)
+                changed += 1
+            if order.updated_at and order.updated_at > self._since:
+                self._since = order.updated_at
+        return changed
+
+    async def run(self, session_factory: Callable[[], Session]) -> None:
+        """Poll every order_events_poll_seconds until cancelled."""
+        interval = get_settings().order_events_poll_seconds
+        while True:
+            await asyncio.sleep(interval)
+            if not self.subscriber_count():
+                # Nobody to tell; don't let the backlog build up meanwhile
+                self._since = datetime.utcnow()
+                continue
+            try:
+                await asyncio.to_thread(self._poll_in_session, session_factory)
+            except Exception:
+                logger.exception("Order event poll failed")
+
+    def _poll_in_session(self, session_factory: Callable[[], Session]) -> int:
+        db = session_factory()
+        try:
+            return self.poll_once(db)
+        finally:
+            db.close()
+
+
+def _create_broker() -> LocalBroker:
+    if get_settings().order_events_broker == "db":
+        return PollingBroker()
+    return LocalBroker()
+
+
+broker = _create_broker()
+
+
+def publish(event: OrderEvent) -> None:
+    """Publish an order event to the configured broker."""
+    broker.publish(event)
+
+
+def publish_order(order: Order) -> None:
+    """Publish an order's current state. Call after committing the change."""
+    broker.publish(OrderEvent.from_order(order))
+
+
+async def stream(
+    subscription: Subscription,
+    initial: tuple[OrderEvent, ...] = (),
+    stop_on_final: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Encode a subscription as an SSE byte stream.
+
+    Sends ``initial`` first, then events as they are published, with a
+    comment line every order_events_keepalive_seconds so proxies keep idle
+    connections open.
+
+    Args:
+        subscription: Subscription to read from
+        initial: Events to send before any published ones (e.g. current state)
+        stop_on_final: End the stream once an order reaches a final status
+    """
+    keepalive = get_settings().order_events_keepalive_seconds
+    yield f"retry: {RECONNECT_MS}\n\n".encode("utf-8")
+
+    for event in initial:
+        yield event.to_sse()
+        if stop_on_final and event.is_final:
+            return
+
+    while True:
+        try:
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+        except asyncio.TimeoutError:
+            yield b": keepalive\n\n"
+            continue
+        if event is None:
+            return
+        yield event.to_sse()
+        if stop_on_final and event.is_final:
+            return
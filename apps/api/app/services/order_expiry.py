@@ -0,0 +1,95 @@
+"""Expiry of abandoned pending orders.
+
+Every checkout creates a PENDING order before the shopper is redirected to
+Payfast; abandoned redirects leave those orders behind. The sweep cancels
+PENDING orders older than ``pending_order_ttl_minutes`` with
+``cancel_reason="expired"`` and releases their stock holds.
+
+Work is done in batches of ``pending_order_sweep_batch_size`` orders, each
+in its own short transaction, so the SQLite write lock is never held for
+long and checkout requests interleave with the sweep. A late Payfast
+COMPLETE for a swept order still marks it paid (see inventory.complete_order).
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.order import Order, OrderStatus
+from . import inventory, order_cache, order_events
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_REASON = inventory.EXPIRED_REASON
+
+
+def expire_pending_orders(
+    db: Session,
+    older_than: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Cancel stale pending orders in bounded batches.
+
+    Args:
+        db: Database session (committed after each batch)
+        older_than: Cutoff for created_at (defaults to now minus the TTL)
+        batch_size: Orders per transaction
+        max_batches: Upper bound on batches this run; the rest waits for the
+            next run
+
+    Returns:
+        Number of orders cancelled
+    """
+    settings = get_settings()
+    cutoff = older_than or datetime.utcnow() - timedelta(minutes=settings.pending_order_ttl_minutes)
+    batch_size = batch_size or settings.pending_order_sweep_batch_size
+    max_batches = max_batches or settings.pending_order_sweep_max_batches
+
+    total = 0
+    for _ in range(max_batches):
+        candidate_ids = list(
+            db.execute(
+                select(Order.id)
+                .where(Order.status == OrderStatus.PENDING, Order.created_at < cutoff)
+                .order_by(Order.created_at, Order.id)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not candidate_ids:
+            break
+
+        # Re-check the status in the UPDATE so an order paid since the
+        # SELECT is left alone
+        cancelled_ids = list(
+            db.execute(
+                update(Order)
+                .where(Order.id.in_(candidate_ids), Order.status == OrderStatus.PENDING)
+                .values(status=OrderStatus.CANCELLED, cancel_reason=EXPIRED_REASON)
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            ).scalars()
+        )
+        released = inventory.release_holds_for_orders(db, cancelled_ids)
+        db.commit()
+        order_cache.invalidate_many(cancelled_ids)
+        for order_id in cancelled_ids:
+            order_events.publish(
+                order_events.OrderEvent(order_id, OrderStatus.CANCELLED.value, cancel_reason=EXPIRED_REASON)
+            )
+
+        if cancelled_ids:
+            logger.info(
+                f"Expired {len(cancelled_ids)} pending orders created before {cutoff:%Y-%m-%d %H:%M} "
+                f"(released {released} holds): {cancelled_ids}"
+            )
+        total += len(cancelled_ids)
+
+        if len(candidate_ids) < batch_size:
+            break
+
+    return total
@@ -0,0 +1,86 @@
+"""Admin order search.
+
+One search box covers order number, customer email, name and phone, waybill
+and Payfast payment ID. Text terms of three or more characters go through
+the ``orders_search`` FTS5 trigram index (see models/order.py), which
+answers substring queries from the index instead of scanning orders, and
+matches are ranked with bm25. A purely numeric query also matches the
+order with that ID, ahead of text matches.
+
+Trigrams can't match anything shorter than three characters, so shorter
+queries fall back to LIKE. That is a scan, but such queries are rare and
+would match too many orders to be useful anyway.
+"""
+from sqlalchemy import ColumnElement, Select, Subquery, column, func, literal, literal_column, or_, select, table, union_all
+
+from ..models.order import Order, SEARCH_COLUMNS
+
+# Shortest term the trigram tokenizer can match
+MIN_INDEXED_LENGTH = 3
+
+# Rank given to an exact order number match; bm25 scores are negative and
+# lower is better, so this sorts first
+ORDER_NUMBER_RANK = -1e9
+
+_search_table = table("orders_search", column("rowid"))
+_search_match = literal_column("orders_search")
+
+
+def match_expression(query: str) -> str:
+    """Quote a search query as one FTS5 phrase, i.e. a substring match."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def matches(query: str) -> Subquery:
+    """
+    Orders matching a search query with their rank.
+
+    Returns:
+        Subquery with ``order_id`` and ``rank`` columns; lower ranks are
+        better matches
+    """
+    query = query.strip()
+    selects: list[Select] = []
+
+    if query.lstrip("#").isdigit():
+        selects.append(
+            select(Order.id.label("order_id"), literal(ORDER_NUMBER_RANK).label("rank"))
+            .where(Order.id == int(query.lstrip("#")))
+        )
+
+    if len(query) >= MIN_INDEXED_LENGTH:
+        # bm25() only works in the query that runs the MATCH, so keep SQLite
+        # from flattening it into the outer joins and grouping
+        fts_hits = (
+            select(
+                _search_table.c.rowid.label("order_id"),
+                func.bm25(_search_match).label("rank"),
+            )
+            .select_from(_search_table)
+            .where(_search_match.op("MATCH")(match_expression(query)))
+            .cte("order_search_hits")
+            .prefix_with("MATERIALIZED")
+        )
+        selects.append(select(fts_hits.c.order_id, fts_hits.c.rank))
+    elif query:
+        selects.append(
+            select(Order.id.label("order_id"), literal(0.0).label("rank"))
+            .where(_like_any(query))
+        )
+
+    if not selects:
+        return select(Order.id.label("order_id"), literal(0.0).label("rank")).where(literal(False)).subquery()
+
+    combined = selects[0] if len(selects) == 1 else union_all(*selects)
+    # An order can match both as a number and as text; keep its best rank
+    ranked = combined.subquery()
+    return (
+        select(ranked.c.order_id, func.min(ranked.c.rank).label("rank"))
+        .group_by(ranked.c.order_id)
+        .subquery("order_search")
+    )
+
+
+def _like_any(query: str) -> ColumnElement[bool]:
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(*(getattr(Order, name).ilike(pattern, escape="\\") for name in SEARCH_COLUMNS))
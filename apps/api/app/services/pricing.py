@@ -0,0 +1,89 @@
+"""Bulk cart pricing.
+
+Cart validation and checkout both price every line against the current
+catalog. Lines are merged per (product_id, variant_id) and all variants are
+fetched with their products in one query, so the cost of pricing a cart is
+constant in the number of lines.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Optional, Protocol
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.product import Variant
+
+
+class CartLineInput(Protocol):
+    """Anything with product_id, variant_id and quantity (e.g. schemas.CartItem)."""
+    product_id: int
+    variant_id: int
+    quantity: int
+
+
+@dataclass(frozen=True)
+class PricedLine:
+    """A merged cart line with its variant, or None if the pair doesn't exist."""
+    product_id: int
+    variant_id: int
+    quantity: int
+    variant: Optional[Variant]
+
+    @property
+    def found(self) -> bool:
+        return self.variant is not None
+
+    @property
+    def available(self) -> bool:
+        return self.variant is not None and self.variant.available_qty >= self.quantity
+
+    @property
+    def line_total(self) -> Decimal:
+        return self.variant.price * self.quantity
+
+
+def merge_lines(items: Iterable[CartLineInput]) -> list[tuple[int, int, int]]:
+    """
+    Merge duplicate lines for the same product/variant.
+
+    Returns:
+        List of (product_id, variant_id, quantity) in first-seen order
+    """
+    merged: dict[tuple[int, int], int] = {}
+    for item in items:
+        key = (item.product_id, item.variant_id)
+        merged[key] = merged.get(key, 0) + item.quantity
+    return [(product_id, variant_id, qty) for (product_id, variant_id), qty in merged.items()]
+
+
+def load_variants(db: Session, variant_ids: Iterable[int]) -> dict[int, Variant]:
+    """Fetch variants with their products in a single query, keyed by ID."""
+    variant_ids = set(variant_ids)
+    if not variant_ids:
+        return {}
+    variants = (
+        db.query(Variant)
+        .options(joinedload(Variant.product))
+        .filter(Variant.id.in_(variant_ids))
+        .all()
+    )
+    return {variant.id: variant for variant in variants}
+
+
+def price_lines(db: Session, items: Iterable[CartLineInput]) -> list[PricedLine]:
+    """
+    Merge and price cart lines with one database round trip.
+
+    A line whose variant doesn't exist or belongs to a different product
+    comes back with ``variant=None``.
+    """
+    lines = merge_lines(items)
+    variants = load_variants(db, (variant_id for _, variant_id, _ in lines))
+
+    priced = []
+    for product_id, variant_id, quantity in lines:
+        variant = variants.get(variant_id)
+        if variant is not None and variant.product_id != product_id:
+            variant = None
+        priced.append(PricedLine(product_id, variant_id, quantity, variant))
+    return priced
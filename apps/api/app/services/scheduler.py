@@ -0,0 +1,42 @@
+"""In-process periodic maintenance jobs.
+
+Each job is a plain function taking a database session. The scheduler runs
+it in a worker thread with its own session every ``interval`` seconds for
+the lifetime of the app. With several API workers each runs its own copy;
+jobs must therefore be safe to run concurrently, e.g. by re-checking the
+row's state in the UPDATE/DELETE that changes it.
+"""
+from typing import Callable
+import asyncio
+import logging
+
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], int]
+
+
+async def run_periodically(name: str, interval: float, job: Job) -> None:
+    """Run a job every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            count = await asyncio.to_thread(run_job, job)
+            if count:
+                logger.info(f"{name}: processed {count}")
+        except Exception:
+            logger.exception(f"{name} failed")
+
+
+def run_job(job: Job) -> int:
+    """Run a job once in a fresh session, committing its changes."""
+    db = SessionLocal()
+    try:
+        count = job(db)
+        db.commit()
+        return count
+    finally:
+        db.close()
@@ -0,0 +1,128 @@
+"""Shipping quotes for carts, with a short-lived quote cache.
+
+Checkout prices shipping itself instead of trusting the client, which costs
+a TCG round trip. To keep that off the checkout's critical path, quotes are
+cached for ``shipping_quote_cache_ttl_seconds`` keyed by the destination area
+(postal code, suburb, city, province and country; TCG adds outlying and
+regional surcharges on these) and parcel dimensions. /shipping/quote fills
+the same cache, so the quote the shopper picked in the cart is usually
+reused. Parcels come from the SKUs of the priced cart lines.
+"""
+from collections import OrderedDict
+from typing import Iterable, Optional
+import threading
+import time
+
+from ..core.config import get_settings
+from . import tcg
+
+# Product dimensions in flat-pack form (L x W x H in cm, weight in kg)
+PRODUCT_PARCELS = {
+    "small": {"length": 60, "width": 60, "height": 15, "weight": 15},
+    "medium": {"length": 70, "width": 70, "height": 15, "weight": 22},
+    "large": {"length": 80, "width": 80, "height": 18, "weight": 30},
+    "xl": {"length": 90, "width": 90, "height": 20, "weight": 40},
+    "personalised_medium": {"length": 70, "width": 70, "height": 15, "weight": 22},
+    "personalised_large": {"length": 80, "width": 80, "height": 18, "weight": 30},
+    "personalised_xl": {"length": 90, "width": 90, "height": 20, "weight": 40},
+}
+
+# Upper bound on cached quote sets; the oldest are dropped first
+MAX_CACHED_QUOTES = 1024
+
+QuoteKey = tuple[tuple[str, ...], tuple[tuple[float, float, float, float], ...]]
+
+_quotes: "OrderedDict[QuoteKey, tuple[float, list[tcg.ShippingQuote]]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_parcel_for_variant(variant_sku: str) -> tcg.Parcel:
+    """Get parcel dimensions for a variant SKU."""
+    # Map SKU prefixes to parcel sizes
+    sku_lower = variant_sku.lower()
+
+    if "xl" in sku_lower:
+        size = "xl"
+    elif "large" in sku_lower or "lg" in sku_lower:
+        size = "large"
+    elif "medium" in sku_lower or "med" in sku_lower:
+        size = "medium"
+    else:
+        size = "small"
+
+    dims = PRODUCT_PARCELS.get(size, PRODUCT_PARCELS["medium"])
+
+    return tcg.Parcel(
+        length=dims["length"],
+        width=dims["width"],
+        height=dims["height"],
+        weight=dims["weight"],
+        description=f"KoosDoos Fire Pit ({size.title()})",
+    )
+
+
+def parcels_for_skus(lines: Iterable[tuple[str, int]]) -> list[tcg.Parcel]:
+    """One parcel per unit for (sku, quantity) lines."""
+    return [
+        get_parcel_for_variant(sku)
+        for sku, quantity in lines
+        for _ in range(quantity)
+    ]
+
+
+def _normalise(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of an address field."""
+    return " ".join((value or "").split()).casefold()
+
+
+def cache_key(destination: tcg.Address, parcels: Iterable[tcg.Parcel]) -> QuoteKey:
+    """
+    Cache key: what a quote's price depends on.
+
+    The destination area is normalised; the street is left out, as TCG
+    prices by area. Parcel order and descriptions are ignored.
+    """
+    return (
+        tuple(
+            _normalise(field)
+            for field in (
+                destination.postal_code,
+                destination.suburb,
+                destination.city,
+                destination.province,
+                destination.country,
+            )
+        ),
+        tuple(sorted((p.length, p.width, p.height, p.weight) for p in parcels)),
+    )
+
+
+async def get_quotes(destination: tcg.Address, parcels: list[tcg.Parcel]) -> list[tcg.ShippingQuote]:
+    """Get shipping quotes, from the cache if this shipment was quoted recently."""
+    key = cache_key(destination, parcels)
+    now = time.monotonic()
+    with _lock:
+        cached = _quotes.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+    quotes = await tcg.get_shipping_quotes(destination, parcels)
+
+    ttl = get_settings().shipping_quote_cache_ttl_seconds
+    with _lock:
+        _quotes[key] = (time.monotonic() + ttl, quotes)
+        _quotes.move_to_end(key)
+        while len(_quotes) > MAX_CACHED_QUOTES:
+            _quotes.popitem(last=False)
+    return quotes
+
+
+def find_quote(quotes: Iterable[tcg.ShippingQuote], service_type: str) -> Optional[tcg.ShippingQuote]:
+    """Pick the quote for a service type."""
+    return next((q for q in quotes if q.service_type == service_type), None)
+
+
+def invalidate() -> None:
+    """Forget cached quotes."""
+    with _lock:
+        _quotes.clear()
@@ -0,0 +1,169 @@
+"""Rule-based smart collections.
+
+A smart collection stores its rules in ``Collection.rules`` and its evaluated
+membership in the regular ``collection_product`` table, so storefront reads
+stay a plain join. Membership is kept current incrementally: when a product
+or one of its variants changes, only that product is re-evaluated against the
+smart collections.
+
+Supported rules (all optional, combined with AND):
+- badges_any: product has at least one of these badges
+- min_price / max_price: at least one variant priced within the range
+- seats: product seats_min..seats_max covers this number of people
+- material: case-insensitive substring of the product material
+- in_stock: at least one variant with inventory (when true)
+"""
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import Session, selectinload
+
+from ..models.collection import Collection
+from ..models.product import Product, collection_product
+
+
+def _variant_in_price_range(product: Product, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> bool:
+    """Check whether any variant of the product falls within the price range."""
+    for variant in product.variants:
+        price = Decimal(str(variant.price))
+        if min_price is not None and price < min_price:
+            continue
+        if max_price is not None and price > max_price:
+            continue
+        return True
+    return False
+
+
+def product_matches(rules: dict, product: Product) -> bool:
+    """
+    Evaluate smart collection rules against a single product.
+
+    Args:
+        rules: Rules dict as stored on Collection.rules
+        product: Product with variants loaded
+
+    Returns:
+        True if the product belongs in the collection
+    """
+    badges_any = [b.lower() for b in rules.get("badges_any") or []]
+    if badges_any:
+        product_badges = {b.lower() for b in product.badges or []}
+        if not product_badges.intersection(badges_any):
+            return False
+
+    min_price = rules.get("min_price")
+    max_price = rules.get("max_price")
+    if min_price is not None or max_price is not None:
+        if not _variant_in_price_range(
+            product,
+            Decimal(str(min_price)) if min_price is not None else None,
+            Decimal(str(max_price)) if max_price is not None else None,
+        ):
+            return False
+
+    seats = rules.get("seats")
+    if seats is not None:
+        seats_min = product.seats_min if product.seats_min is not None else product.seats_max
+        seats_max = product.seats_max if product.seats_max is not None else product.seats_min
+        if seats_min is None or not (seats_min <= seats <= seats_max):
+            return False
+
+    material = rules.get("material")
+    if material:
+        if not product.material or material.lower() not in product.material.lower():
+            return False
+
+    if rules.get("in_stock"):
+        if not any((v.inventory_qty or 0) > 0 for v in product.variants):
+            return False
+
+    return True
+
+
+def rebuild_collection(db: Session, collection: Collection) -> int:
+    """
+    Fully re-evaluate a smart collection's membership.
+
+    Used when a collection's rules are created or changed. Applies the
+    difference to collection_product rather than rewriting every row.
+
+    Returns:
+        Number of member products after the rebuild
+    """
+    db.flush()
+    if collection.rules is None:
+        return 0
+
+    products = db.query(Product).options(selectinload(Product.variants)).all()
+    wanted = {p.id for p in products if product_matches(collection.rules, p)}
+    current = set(
+        db.execute(
+            select(collection_product.c.product_id)
+            .where(collection_product.c.collection_id == collection.id)
+        ).scalars()
+    )
+
+    _apply_membership_diff(db, collection.id, wanted - current, current - wanted)
+    db.expire(collection, ["products"])
+    return len(wanted)
+
+
+def refresh_product(db: Session, product_id: int) -> None:
+    """
+    Incrementally update smart collection membership for one product.
+
+    Call after a product or any of its variants changed, before commit.
+    """
+    db.flush()
+    smart_collections = db.execute(
+        select(Collection.id, Collection.rules).where(Collection.rules.isnot(None))
+    ).all()
+    if not smart_collections:
+        return
+
+    product = (
+        db.query(Product)
+        .options(selectinload(Product.variants))
+        .filter(Product.id == product_id)
+        .first()
+    )
+    if not product:
+        return
+
+    smart_ids = [collection_id for collection_id, _ in smart_collections]
+    current = set(
+        db.execute(
+            select(collection_product.c.collection_id).where(
+                collection_product.c.product_id == product_id,
+                collection_product.c.collection_id.in_(smart_ids),
+            )
+        ).scalars()
+    )
+    wanted = {
+        collection_id
+        for collection_id, rules in smart_collections
+        if product_matches(rules, product)
+    }
+
+    for collection_id in wanted - current:
+        _apply_membership_diff(db, collection_id, {product_id}, set())
+    for collection_id in current - wanted:
+        _apply_membership_diff(db, collection_id, set(), {product_id})
+    db.expire(product, ["collections"])
+
+
+def _apply_membership_diff(db: Session, collection_id: int, to_add: set[int], to_remove: set[int]) -> None:
+    """Apply membership additions and removals to collection_product."""
+    if to_remove:
+        db.execute(
+            delete(collection_product).where(
+                collection_product.c.collection_id == collection_id,
+                collection_product.c.product_id.in_(to_remove),
+            )
+        )
+    if to_add:
+        db.execute(
+            insert(collection_product),
+            [{"collection_id": collection_id, "product_id": pid} for pid in sorted(to_add)],
+        )
@@ -1,12 +1,28 @@
-"""S3-compatible storage service for file uploads."""
+"""S3-compatible storage service for file uploads.
+
+One StorageService is shared for the application's lifetime (see
+``get_storage()``), so its boto3 client, and the client's pool of HTTP
+connections, is reused across requests instead of being rebuilt per
+upload. boto3 and local file writes block, so every call runs in a worker
+thread and the event loop stays free while bytes go over the network.
+"""
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Optional, BinaryIO
+from functools import lru_cache
+from typing import AsyncIterator, Optional, BinaryIO, Union
+import asyncio
+import threading
 import uuid
 import os
+import shutil
 from datetime import datetime
 from ..core.config import get_settings
 
+# Uploads above this size go to S3 as multipart uploads
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+
 
 class StorageService:
     """Service for uploading files to S3-compatible storage."""
@@ -15,26 +31,57 @@ class StorageService:
         """Initialize storage service with settings."""
         self.settings = get_settings()
         self._client = None
+        self._client_lock = threading.Lock()
         self._local_storage_path = "/tmp/koosdoos-uploads"
+        self._transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            max_concurrency=self.settings.s3_transfer_concurrency,
+        )
 
     @property
     def client(self):
         """Lazy-load S3 client."""
         if self._client is None and self.settings.s3_access_key:
-            self._client = boto3.client(
-                "s3",
-                endpoint_url=self.settings.s3_endpoint_url or None,
-                aws_access_key_id=self.settings.s3_access_key,
-                aws_secret_access_key=self.settings.s3_secret_key,
-            )
+            # Creating a client isn't thread-safe, and calls run in threads
+            with self._client_lock:
+                if self._client is None:
+                    self._client = boto3.client(
+                        "s3",
+                        endpoint_url=self.settings.s3_endpoint_url or None,
+                        aws_access_key_id=self.settings.s3_access_key,
+                        aws_secret_access_key=self.settings.s3_secret_key,
+                        config=Config(
+                            max_pool_connections=self.settings.s3_max_pool_connections,
+                            connect_timeout=5,
+                            read_timeout=60,
+                            retries={"max_attempts": 3, "mode": "standard"},
+                            tcp_keepalive=True,
+                        ),
+                    )
         return self._client
 
+    @property
+    def s3_enabled(self) -> bool:
+        """Whether S3 is configured; direct-to-storage uploads need it."""
+        return bool(self.client and self.settings.s3_bucket)
+
     def _ensure_local_storage(self) -> str:
         """Ensure local storage directory exists."""
         if not os.path.exists(self._local_storage_path):
             os.makedirs(self._local_storage_path, exist_ok=True)
         return self._local_storage_path
 
+    def content_key(self, sha256: str, original_filename: str, prefix: str = "designs") -> str:
+        """Storage key addressed by content hash, so identical files share one object."""
+        file_ext = os.path.splitext(original_filename)[1].lower()
+        return f"{prefix}/sha256/{sha256[:2]}/{sha256}{file_ext}"
+
+    def thumbnail_key(self, file_key: str, size: int, fmt: str) -> str:
+        """Key of a file's thumbnail, next to the file, e.g. "<key>_thumb_400.webp"."""
+        base_name = os.path.splitext(file_key)[0]
+        file_ext = "jpg" if fmt == "jpeg" else fmt
+        return f"{base_name}_thumb_{size}.{file_ext}"
+
     def _generate_file_key(self, original_filename: str, prefix: str = "designs") -> str:
         """Generate unique file key for storage."""
         file_ext = os.path.splitext(original_filename)[1].lower()
@@ -42,60 +89,102 @@ class StorageService:
         timestamp = datetime.utcnow().strftime("%Y%m%d")
         return f"{prefix}/{timestamp}/{unique_id}{file_ext}"
 
+    def _object_url(self, file_key: str) -> str:
+        """Public URL of an S3 object."""
+        if self.settings.s3_endpoint_url:
+            return f"{self.settings.s3_endpoint_url}/{self.settings.s3_bucket}/{file_key}"
+        return f"https://{self.settings.s3_bucket}.s3.amazonaws.com/{file_key}"
+
+    def _put_s3(
+        self,
+        file_key: str,
+        body: Union[bytes, BinaryIO],
+        content_type: str,
+        cache_control: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Store an object in S3. Blocking; run it in a thread.
+
+        Returns:
+            The object's URL, or None if S3 isn't configured or the upload failed
+        """
+        if not (self.client and self.settings.s3_bucket):
+            return None
+
+        extra_args = {"ContentType": content_type}
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        try:
+            if isinstance(body, bytes):
+                self.client.put_object(Bucket=self.settings.s3_bucket, Key=file_key, Body=body, **extra_args)
+            else:
+                # Streams from the handle, in parallel parts when large
+                body.seek(0)
+                self.client.upload_fileobj(
+                    body,
+                    self.settings.s3_bucket,
+                    file_key,
+                    ExtraArgs=extra_args,
+                    Config=self._transfer_config,
+                )
+        except (ClientError, NoCredentialsError):
+            # Fall through to local storage
+            return None
+        return self._object_url(file_key)
+
+    def _write_local(self, file_key: str, body: Union[bytes, BinaryIO]) -> str:
+        """Write to local storage. Blocking; run it in a thread. Returns the path."""
+        storage_path = self._ensure_local_storage()
+        local_path = os.path.join(storage_path, file_key.replace("/", "_"))
+
+        with open(local_path, "wb") as f:
+            if isinstance(body, bytes):
+                f.write(body)
+            else:
+                body.seek(0)
+                shutil.copyfileobj(body, f)
+        return local_path
+
     async def upload_file(
         self,
-        file_content: bytes,
+        file: BinaryIO,
         original_filename: str,
         content_type: str,
-        prefix: str = "designs"
+        prefix: str = "designs",
+        file_key: Optional[str] = None,
     ) -> dict:
         """
         Upload file to storage (S3 or local fallback).
 
+        The file is streamed from its handle (multipart to S3 when large),
+        not read into memory.
+
         Args:
-            file_content: The file content as bytes
+            file: The file, opened in binary mode and seekable
             original_filename: Original name of the file
             content_type: MIME type of the file
             prefix: Storage prefix/folder
+            file_key: Storage key to use, e.g. from content_key(); a new
+                unique key under prefix by default
 
         Returns:
             dict with file_id, file_url, and storage_key
         """
-        file_key = self._generate_file_key(original_filename, prefix)
+        file_key = file_key or self._generate_file_key(original_filename, prefix)
         file_id = uuid.uuid4().hex
 
         # Try S3 upload if configured
-        if self.client and self.settings.s3_bucket:
-            try:
-                self.client.put_object(
-                    Bucket=self.settings.s3_bucket,
-                    Key=file_key,
-                    Body=file_content,
-                    ContentType=content_type,
-                )
-
-                # Generate URL
-                if self.settings.s3_endpoint_url:
-                    file_url = f"{self.settings.s3_endpoint_url}/{self.settings.s3_bucket}/{file_key}"
-                else:
-                    file_url = f"https://{self.settings.s3_bucket}.s3.amazonaws.com/{file_key}"
-
-                return {
-                    "file_id": file_id,
-                    "file_url": file_url,
-                    "storage_key": file_key,
-                    "storage_type": "s3",
-                }
-            except (ClientError, NoCredentialsError) as e:
-                # Fall through to local storage
-                pass
+        file_url = await asyncio.to_thread(self._put_s3, file_key, file, content_type)
+        if file_url:
+            return {
+                "file_id": file_id,
+                "file_url": file_url,
+                "storage_key": file_key,
+                "storage_type": "s3",
+            }
 
         # Local storage fallback
-        storage_path = self._ensure_local_storage()
-        local_file_path = os.path.join(storage_path, file_key.replace("/", "_"))
-
-        with open(local_file_path, "wb") as f:
-            f.write(file_content)
+        local_file_path = await asyncio.to_thread(self._write_local, file_key, file)
 
         # Return local file URL (for development)
         file_url = f"/uploads/{os.path.basename(local_file_path)}"
@@ -107,50 +196,139 @@ class StorageService:
             "storage_type": "local",
         }
 
-    async def upload_thumbnail(
+    async def put_object(
         self,
         file_content: bytes,
-        original_file_key: str,
-    ) -> Optional[str]:
+        file_key: str,
+        content_type: str,
+    ) -> str:
         """
-        Upload thumbnail image.
+        Store content under a caller-chosen key, overwriting any existing object.
+
+        Used for derived assets with deterministic (content-hashed) keys.
 
         Args:
-            file_content: PNG thumbnail content
-            original_file_key: Key of the original file
+            file_content: The content to store
+            file_key: Storage key, e.g. "template-previews/<hash>/96.webp"
+            content_type: MIME type of the content
 
         Returns:
-            URL to the thumbnail or None if upload fails
+            URL to the stored object
         """
-        # Generate thumbnail key
-        base_name = os.path.splitext(original_file_key)[0]
-        thumb_key = f"{base_name}_thumb.png"
-
         # Try S3 upload if configured
-        if self.client and self.settings.s3_bucket:
+        url = await asyncio.to_thread(
+            self._put_s3, file_key, file_content, content_type, "public, max-age=31536000, immutable"
+        )
+        if url:
+            return url
+
+        # Local storage fallback
+        local_path = await asyncio.to_thread(self._write_local, file_key, file_content)
+        return f"/uploads/{os.path.basename(local_path)}"
+
+    def presign_put(
+        self,
+        file_key: str,
+        content_type: str,
+        content_length: int,
+        expires_in: int,
+    ) -> str:
+        """
+        Presigned URL the client can PUT a file to directly.
+
+        Signing is local (no request to S3). The content type and length are
+        part of the signature, so the client must send exactly those headers.
+
+        Args:
+            file_key: Key the file will be stored under
+            content_type: Content-Type the client must send
+            content_length: Content-Length the client must send
+            expires_in: Seconds the URL stays valid
+
+        Returns:
+            The presigned URL
+        """
+        return self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.settings.s3_bucket,
+                "Key": file_key,
+                "ContentType": content_type,
+                "ContentLength": content_length,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    async def head(self, file_key: str) -> Optional[int]:
+        """
+        Size of an S3 object.
+
+        Returns:
+            The size in bytes, or None if the object doesn't exist
+        """
+        def _head() -> Optional[int]:
             try:
-                self.client.put_object(
-                    Bucket=self.settings.s3_bucket,
-                    Key=thumb_key,
-                    Body=file_content,
-                    ContentType="image/png",
-                )
+                response = self.client.head_object(Bucket=self.settings.s3_bucket, Key=file_key)
+            except ClientError:
+                return None
+            return response["ContentLength"]
 
-                if self.settings.s3_endpoint_url:
-                    return f"{self.settings.s3_endpoint_url}/{self.settings.s3_bucket}/{thumb_key}"
-                else:
-                    return f"https://{self.settings.s3_bucket}.s3.amazonaws.com/{thumb_key}"
-            except (ClientError, NoCredentialsError):
-                pass
+        return await asyncio.to_thread(_head)
 
-        # Local storage fallback
-        storage_path = self._ensure_local_storage()
-        local_thumb_path = os.path.join(storage_path, thumb_key.replace("/", "_"))
+    async def iter_object(
+        self,
+        file_key: str,
+        storage_type: str = "s3",
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a stored file in chunks, reading each in a worker thread.
+
+        Args:
+            file_key: The storage key/path of the file
+            storage_type: Type of storage ('s3' or 'local')
 
-        with open(local_thumb_path, "wb") as f:
-            f.write(file_content)
+        Raises:
+            ClientError: If an S3 object can't be read
+            OSError: If a local file can't be read
+        """
+        if storage_type == "local":
+            body = await asyncio.to_thread(open, file_key, "rb")
+        else:
+            response = await asyncio.to_thread(
+                self.client.get_object, Bucket=self.settings.s3_bucket, Key=file_key
+            )
+            body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
 
-        return f"/uploads/{os.path.basename(local_thumb_path)}"
+    async def copy_object(self, source_key: str, file_key: str, content_type: str) -> Optional[str]:
+        """
+        Copy an S3 object within the bucket, server-side.
+
+        Returns:
+            URL of the copy, or None if S3 isn't configured or the copy failed
+        """
+        if not self.s3_enabled:
+            return None
+
+        def _copy() -> Optional[str]:
+            try:
+                self.client.copy(
+                    {"Bucket": self.settings.s3_bucket, "Key": source_key},
+                    self.settings.s3_bucket,
+                    file_key,
+                    ExtraArgs={"ContentType": content_type, "MetadataDirective": "REPLACE"},
+                    Config=self._transfer_config,
+                )
+            except (ClientError, NoCredentialsError):
+                return None
+            return self._object_url(file_key)
+
+        return await asyncio.to_thread(_copy)
 
     async def delete_file(self, file_key: str, storage_type: str = "s3") -> bool:
         """
@@ -163,6 +341,9 @@ class StorageService:
         Returns:
             True if deletion was successful
         """
+        return await asyncio.to_thread(self._delete, file_key, storage_type)
+
+    def _delete(self, file_key: str, storage_type: str) -> bool:
         if storage_type == "s3" and self.client and self.settings.s3_bucket:
             try:
                 self.client.delete_object(
@@ -180,3 +361,9 @@ class StorageService:
             except OSError:
                 return False
         return False
+
+
+@lru_cache
+def get_storage() -> StorageService:
+    """The storage service shared by the whole app."""
+    return StorageService()
@@ -0,0 +1,84 @@
+"""In-memory snapshot of the design template catalog.
+
+Design templates change a few times a year, so the personaliser's template
+list is served from a process-local snapshot instead of the database. The
+snapshot is reloaded after ``design_templates_snapshot_ttl_seconds`` (so
+out-of-band edits such as a reseed are picked up) or when invalidated
+explicitly, and carries an ETag so clients can revalidate with
+If-None-Match.
+"""
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
+import json
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.design import DesignTemplate, DesignCategory
+from ..schemas.design import DesignTemplateBase
+
+
+@dataclass(frozen=True)
+class TemplateCatalogSnapshot:
+    """Immutable snapshot of all design templates."""
+    templates: tuple[DesignTemplateBase, ...]
+    digest: str
+    loaded_at: float
+
+    def filter(self, category: Optional[DesignCategory] = None) -> list[DesignTemplateBase]:
+        """Get templates, optionally restricted to one category."""
+        if category is None:
+            return list(self.templates)
+        return [t for t in self.templates if t.category == category]
+
+    def etag(self, category: Optional[DesignCategory] = None) -> str:
+        """Strong ETag for the (optionally filtered) template list."""
+        suffix = category.value if category else "all"
+        return f'"{self.digest}-{suffix}"'
+
+
+_snapshot: Optional[TemplateCatalogSnapshot] = None
+_lock = threading.Lock()
+
+
+def get_snapshot(db: Session) -> TemplateCatalogSnapshot:
+    """Get the current snapshot, loading it from the database if stale."""
+    global _snapshot
+
+    ttl = get_settings().design_templates_snapshot_ttl_seconds
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - snapshot.loaded_at < ttl:
+        return snapshot
+
+    with _lock:
+        # Another request may have reloaded while we waited for the lock
+        snapshot = _snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < ttl:
+            return snapshot
+        _snapshot = _load_snapshot(db)
+        return _snapshot
+
+
+def invalidate() -> None:
+    """Drop the snapshot so the next request reloads it."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def _load_snapshot(db: Session) -> TemplateCatalogSnapshot:
+    """Load all templates ordered by category then name."""
+    rows = (
+        db.query(DesignTemplate)
+        .order_by(DesignTemplate.category, DesignTemplate.name)
+        .all()
+    )
+    templates = tuple(DesignTemplateBase.model_validate(t) for t in rows)
+
+    payload = json.dumps([t.model_dump(mode="json") for t in templates], sort_keys=True)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    return TemplateCatalogSnapshot(templates=templates, digest=digest, loaded_at=time.monotonic())
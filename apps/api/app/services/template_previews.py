@@ -0,0 +1,159 @@
+"""Raster preview rendering for design templates.
+
+Each template SVG is rasterized once to a fixed set of square preview sizes
+in WebP and PNG, and stored under keys derived from the SVG's content hash.
+Templates whose SVG hasn't changed since the last run are skipped, so the
+job is cheap to run on every startup. The personaliser can then show a
+sized bitmap instead of downloading and rendering the full SVG.
+
+Rasterizing needs cairosvg (and the native cairo library). When it isn't
+installed the job logs a warning and leaves templates without previews;
+clients fall back to ``svg_path``.
+"""
+from pathlib import Path
+from typing import Callable, Optional
+import asyncio
+import hashlib
+import io
+import logging
+
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.design import DesignTemplate
+from .storage import StorageService, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Square preview sizes in pixels (1x/2x/4x of the 96px picker tile)
+PREVIEW_SIZES = (96, 192, 384)
+
+# Formats in order of preference; PNG is the fallback for old browsers
+PREVIEW_FORMATS = ("webp", "png")
+
+PREVIEW_CONTENT_TYPES = {"webp": "image/webp", "png": "image/png"}
+
+PREVIEW_KEY_PREFIX = "template-previews"
+
+# (svg bytes, size in pixels) -> PNG bytes
+Rasterizer = Callable[[bytes, int], bytes]
+
+
+def cairosvg_rasterizer() -> Optional[Rasterizer]:
+    """Get the cairosvg-based rasterizer, or None if cairosvg is unavailable."""
+    try:
+        import cairosvg
+    except (ImportError, OSError):  # OSError: cairosvg installed without libcairo
+        return None
+
+    def rasterize(svg: bytes, size: int) -> bytes:
+        return cairosvg.svg2png(bytestring=svg, output_width=size, output_height=size)
+
+    return rasterize
+
+
+def public_dir() -> Path:
+    """Directory that template svg_path URLs are relative to."""
+    configured = get_settings().design_templates_public_dir
+    if configured:
+        return Path(configured)
+    return Path(__file__).resolve().parents[3] / "web" / "public"
+
+
+def load_svg(svg_path: Optional[str]) -> Optional[bytes]:
+    """Read a template SVG from the web app's public directory."""
+    if not svg_path or not svg_path.endswith(".svg"):
+        return None
+    root = public_dir().resolve()
+    path = (root / svg_path.lstrip("/")).resolve()
+    if not path.is_relative_to(root) or not path.is_file():
+        return None
+    return path.read_bytes()
+
+
+def render_previews(svg: bytes, rasterize: Rasterizer) -> dict[tuple[int, str], bytes]:
+    """
+    Render an SVG to every preview size and format.
+
+    Returns:
+        Mapping of (size, format) to encoded image bytes
+    """
+    from PIL import Image
+
+    rendered = {}
+    for size in PREVIEW_SIZES:
+        png = rasterize(svg, size)
+        image = Image.open(io.BytesIO(png))
+        image.load()
+        if image.mode not in ("RGBA", "RGB"):
+            image = image.convert("RGBA")
+
+        for fmt in PREVIEW_FORMATS:
+            buffer = io.BytesIO()
+            if fmt == "webp":
+                image.save(buffer, format="WEBP", quality=85, method=6)
+            else:
+                image.save(buffer, format="PNG", optimize=True)
+            rendered[(size, fmt)] = buffer.getvalue()
+    return rendered
+
+
+async def render_template_previews(
+    db: Session,
+    storage: Optional[StorageService] = None,
+    rasterize: Optional[Rasterizer] = None,
+    force: bool = False,
+) -> int:
+    """
+    Render and store previews for templates whose SVG changed.
+
+    Args:
+        db: Database session (committed after each template)
+        storage: Storage service for the rendered images
+        rasterize: SVG-to-PNG function; defaults to cairosvg
+        force: Re-render even if the SVG hash is unchanged
+
+    Returns:
+        Number of templates that got new previews
+    """
+    rasterize = rasterize or cairosvg_rasterizer()
+    if rasterize is None:
+        logger.warning("cairosvg not available; skipping design template preview rendering")
+        return 0
+    storage = storage or get_storage()
+
+    # Queries, file reads and commits block; run them in a thread so the
+    # startup job doesn't stall the event loop
+    templates = await asyncio.to_thread(
+        lambda: db.query(DesignTemplate).order_by(DesignTemplate.id).all()
+    )
+
+    rendered_count = 0
+    for template in templates:
+        svg = await asyncio.to_thread(load_svg, template.svg_path)
+        if svg is None:
+            continue
+
+        svg_hash = hashlib.sha256(svg).hexdigest()
+        if not force and template.preview_hash == svg_hash and template.previews:
+            continue
+
+        try:
+            # Rasterizing is CPU-bound; keep it off the event loop
+            images = await asyncio.to_thread(render_previews, svg, rasterize)
+        except Exception:
+            logger.exception(f"Failed to render previews for design template {template.id}")
+            continue
+
+        previews = []
+        for (size, fmt), content in images.items():
+            key = f"{PREVIEW_KEY_PREFIX}/{svg_hash[:16]}/{size}.{fmt}"
+            url = await storage.put_object(content, key, PREVIEW_CONTENT_TYPES[fmt])
+            previews.append({"size": size, "format": fmt, "url": url})
+
+        template.preview_hash = svg_hash
+        template.previews = previews
+        await asyncio.to_thread(db.commit)
+        rendered_count += 1
+
+    return rendered_count
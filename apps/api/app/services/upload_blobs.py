@@ -0,0 +1,109 @@
+"""Content-addressed design uploads.
+
+Customers re-upload the same logo many times while adjusting a design.
+Each distinct file content is validated, thumbnailed and stored once,
+under a key derived from its SHA-256 (``StorageService.content_key``),
+and the outcome is recorded in ``upload_blobs``. A later upload with the
+same hash gets the stored file URL, thumbnail URL and validation result
+back without any of that work.
+
+Results recorded under an older ``VALIDATION_VERSION`` are ignored, so
+bump it when validation rules change and files are checked again on their
+next upload.
+"""
+from datetime import datetime
+from typing import Optional
+import json
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.upload import UploadBlob
+
+# Bump when DXF/image validation or thumbnailing changes
+VALIDATION_VERSION = 2
+
+
+def find(db: Session, sha256: str) -> Optional[UploadBlob]:
+    """The stored upload with this content, if validated by the current rules."""
+    return db.execute(
+        select(UploadBlob).where(
+            UploadBlob.sha256 == sha256,
+            UploadBlob.validation_version == VALIDATION_VERSION,
+        )
+    ).scalar_one_or_none()
+
+
+def record_reuse(db: Session, blob: UploadBlob) -> None:
+    """Count another upload of an existing blob."""
+    db.execute(
+        update(UploadBlob)
+        .where(UploadBlob.id == blob.id)
+        .values(upload_count=UploadBlob.upload_count + 1, last_uploaded_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def save(
+    db: Session,
+    sha256: str,
+    upload_result: dict,
+    thumbnails: list[dict],
+    content_type: str,
+    size: int,
+    is_valid: bool,
+    validation_errors: list[str],
+) -> UploadBlob:
+    """
+    Record a newly stored and validated upload.
+
+    Replaces a row left by an older validation version. If another request
+    recorded the same content meanwhile, that row wins and is returned.
+
+    Args:
+        upload_result: StorageService.upload_file() result
+        thumbnails: [{"size", "format", "url"}], smallest size first, best
+            format first within a size
+    """
+    values = dict(
+        storage_key=upload_result["storage_key"],
+        storage_type=upload_result["storage_type"],
+        file_url=upload_result["file_url"],
+        thumbnail_url=_fallback_thumbnail(thumbnails),
+        thumbnails=thumbnails,
+        content_type=content_type,
+        size=size,
+        is_valid=is_valid,
+        validation_errors=json.dumps(validation_errors),
+        validation_version=VALIDATION_VERSION,
+    )
+
+    stale = db.execute(select(UploadBlob).where(UploadBlob.sha256 == sha256)).scalar_one_or_none()
+    if stale is not None:
+        for name, value in values.items():
+            setattr(stale, name, value)
+        stale.upload_count += 1
+        stale.last_uploaded_at = datetime.utcnow()
+        db.commit()
+        return stale
+
+    blob = UploadBlob(sha256=sha256, file_id=upload_result["file_id"], **values)
+    db.add(blob)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return db.execute(select(UploadBlob).where(UploadBlob.sha256 == sha256)).scalar_one()
+    return blob
+
+
+def errors(blob: UploadBlob) -> list[str]:
+    """A blob's validation errors and warnings."""
+    return json.loads(blob.validation_errors)
+
+
+def _fallback_thumbnail(thumbnails: list[dict]) -> Optional[str]:
+    """URL of the smallest thumbnail in the most widely supported format."""
+    smallest = [t for t in thumbnails if t["size"] == thumbnails[0]["size"]] if thumbnails else []
+    return smallest[-1]["url"] if smallest else None
@@ -0,0 +1,116 @@
+"""Spooling of uploaded files.
+
+Uploads are copied chunk by chunk into a SpooledTemporaryFile that stays in
+memory up to ``upload_spool_memory_bytes`` and moves to disk beyond that,
+so a design file is never held in memory as one ``bytes`` object. While
+copying, the size limit is enforced as each chunk arrives, the SHA-256 is
+computed and the first bytes are sniffed for the real file type, so all
+three are known without reading the file again.
+
+Validators and StorageService then read from ``SpooledUpload.rewind()``.
+"""
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Optional
+import hashlib
+
+from fastapi import UploadFile
+
+from ..core.config import get_settings
+
+# Read size when copying an upload
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes kept for type sniffing
+SNIFF_BYTES = 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+BINARY_DXF_SIGNATURE = b"AutoCAD Binary DXF\r\n\x1a\x00"
+
+
+class UploadTooLarge(Exception):
+    """The upload has more bytes than allowed."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+@dataclass
+class SpooledUpload:
+    """An upload copied to a temporary file, with what was learned on the way."""
+    file: BinaryIO
+    size: int
+    sha256: str
+    detected_type: Optional[str]
+
+    def rewind(self) -> BinaryIO:
+        """The file handle, positioned at the start."""
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def sniff_type(head: bytes) -> Optional[str]:
+    """
+    Identify a design file from its first bytes.
+
+    Returns:
+        image/png, image/jpeg, image/svg+xml or application/dxf, or None
+    """
+    if head.startswith(PNG_SIGNATURE):
+        return "image/png"
+    if head.startswith(JPEG_SIGNATURE):
+        return "image/jpeg"
+    if head.startswith(BINARY_DXF_SIGNATURE):
+        return "application/dxf"
+
+    text = head.decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+    if text.startswith("<") and "<svg" in text.lower():
+        return "image/svg+xml"
+
+    # ASCII DXF: group code/value line pairs, starting with a section or a
+    # 999 comment
+    lines = [line.strip() for line in text.splitlines()[:4]]
+    if lines[:2] == ["0", "SECTION"] or (lines[:1] == ["999"] and "SECTION" in lines):
+        return "application/dxf"
+    return None
+
+
+async def spool(chunks: AsyncIterable[bytes], max_size: int) -> SpooledUpload:
+    """
+    Copy a byte stream into a spooled temporary file.
+
+    Raises:
+        UploadTooLarge: More than max_size bytes arrived; the rest of the
+            stream is not read
+    """
+    file = SpooledTemporaryFile(max_size=get_settings().upload_spool_memory_bytes)
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLarge(max_size)
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+            digest.update(chunk)
+            file.write(chunk)
+    except BaseException:
+        file.close()
+        raise
+
+    file.seek(0)
+    return SpooledUpload(file=file, size=size, sha256=digest.hexdigest(), detected_type=sniff_type(head))
+
+
+async def iter_upload(upload: UploadFile, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read an UploadFile in chunks."""
+    while chunk := await upload.read(chunk_size):
+        yield chunk
@@ -0,0 +1,183 @@
+"""Process pool for CPU-bound upload work.
+
+Parsing a DXF with ezdxf, measuring images and rendering thumbnails with
+Pillow take long enough that running them inside ``async def`` handlers
+stalls every other request on the event loop. They run here instead, in
+``validation_workers`` processes:
+
+- Workers are spawned, not forked, so they don't inherit the parent's
+  database connections or event loop, and are warmed up at startup:
+  ezdxf and Pillow are imported once per worker, not per upload.
+- At most ``MAX_PENDING_PER_WORKER`` tasks per worker are queued or
+  running; further callers wait their turn. A task's upload is read into
+  memory by its ``load`` callable only once it has a slot, so this also
+  bounds how many copies of uploads are held.
+- Each task has a ``validation_timeout_seconds`` deadline. The worker
+  interrupts itself when it passes, so a pathological file doesn't occupy
+  a worker indefinitely, and the caller gets ``ValidationTimeout``.
+- If the caller is cancelled (e.g. the client disconnected) a task that
+  hasn't started is dropped from the queue.
+- If a worker dies (out of memory, a crash in a native decoder) the
+  executor is broken for good; it is replaced and the task retried once.
+
+With ``validation_workers = 0`` tasks run inline on the calling thread,
+which suits tests and is the baseline for scripts/bench_upload_latency.py.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tasks queued or running per worker before submitters wait
+MAX_PENDING_PER_WORKER = 4
+
+# Extra time the caller allows past a task's deadline before giving up on
+# the worker interrupting itself
+DEADLINE_GRACE_SECONDS = 5.0
+
+
+class ValidationTimeout(Exception):
+    """A task ran past validation_timeout_seconds."""
+
+
+def _warm_up() -> None:
+    """Worker initializer: import the heavy libraries once."""
+    for module in ("ezdxf", "ezdxf.bbox", "PIL.Image"):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _ping() -> bool:
+    return True
+
+
+def _on_deadline(signum, frame):
+    raise ValidationTimeout("Task ran past its deadline")
+
+
+def _run_with_deadline(fn: Callable[..., T], timeout: float, *args: Any) -> T:
+    """Run fn in a worker, interrupting it after timeout seconds."""
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _on_deadline)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ValidationPool:
+    """Bounded process pool with per-task deadlines."""
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def inline(self) -> bool:
+        return self.workers <= 0
+
+    async def start(self) -> None:
+        """Spawn and warm up the workers. Called at app startup; run() also starts lazily."""
+        if self.inline or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+        )
+        # Workers are created on demand; one ping each brings them all up now
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)
+        ))
+        logger.info(f"Started {self.workers} validation workers")
+
+    def shutdown(self) -> None:
+        """Stop the workers, dropping queued tasks."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., T], *args: Any, load: Optional[Callable[[], Any]] = None) -> T:
+        """
+        Run fn(*args) in a worker process.
+
+        fn and args must be picklable: fn a module-level function, args
+        plain data such as bytes and strings.
+
+        Args:
+            load: Called once the task has a slot; its result is passed to
+                fn ahead of args. Use it to read an upload, so callers
+                waiting for a slot don't each hold a copy.
+
+        Raises:
+            ValidationTimeout: The task ran past validation_timeout_seconds
+        """
+        if self.inline:
+            return fn(load(), *args) if load is not None else fn(*args)
+
+        await self.start()
+        async with self._get_slots():
+            if load is not None:
+                args = (load(), *args)
+            task = partial(_run_with_deadline, fn, self.timeout, *args)
+            executor = self._executor
+            try:
+                return await self._submit(executor, task)
+            except BrokenProcessPool:
+                logger.warning("A validation worker died; restarting the pool")
+                # Concurrent callers see the same broken executor; only the
+                # first replaces it
+                if self._executor is executor:
+                    self.shutdown()
+                await self.start()
+                return await self._submit(self._executor, task)
+
+    async def _submit(self, executor: ProcessPoolExecutor, task: Callable[[], T]) -> T:
+        """Run task on executor, enforcing the deadline from this side too."""
+        future = asyncio.get_running_loop().run_in_executor(executor, task)
+        try:
+            # Cancelling the wait (timeout or caller cancelled) also
+            # cancels the task if it hasn't started yet
+            return await asyncio.wait_for(future, self.timeout + DEADLINE_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            raise ValidationTimeout(f"Task ran past {self.timeout}s") from None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; tests run several in turn
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers * MAX_PENDING_PER_WORKER)
+            self._slots_loop = loop
+        return self._slots
+
+
+def _create_pool() -> ValidationPool:
+    settings = get_settings()
+    return ValidationPool(settings.validation_workers, settings.validation_timeout_seconds)
+
+
+pool = _create_pool()
+
+
+async def run(fn: Callable[..., T], *args: Any, load: Optional[Callable[[], Any]] = None) -> T:
+    """Run fn(*args) on the configured pool (see ValidationPool.run)."""
+    return await pool.run(fn, *args, load=load)
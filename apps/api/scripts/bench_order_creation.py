@@ -0,0 +1,116 @@
+"""
+Benchmark order creation for orders of 1, 10 and 100 lines.
+
+Compares the unit-of-work path checkout used to take (add the order, flush
+for its ID, add_all the items) with services.orders.create_order, on a
+throwaway SQLite file so nothing touches the real database.
+
+Usage:
+    cd apps/api
+    python -m scripts.bench_order_creation [--orders 200]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Product, Variant
+from app.models.order import Order, OrderItem, OrderStatus
+from app.services import orders
+
+LINE_COUNTS = (1, 10, 100)
+
+
+def create_with_unit_of_work(db, items) -> int:
+    """The previous checkout path."""
+    order = Order(status=OrderStatus.PENDING, customer_email="bench@example.com", total=0)
+    db.add(order)
+    db.flush()
+    db.add_all([
+        OrderItem(
+            order_id=order.id,
+            product_id=item.product_id,
+            variant_id=item.variant_id,
+            quantity=item.quantity,
+            price=item.price,
+        )
+        for item in items
+    ])
+    db.flush()
+    return order.id
+
+
+def create_with_service(db, items) -> int:
+    """The bulk insert path."""
+    return orders.create_order(db, items, customer_email="bench@example.com", total=0)
+
+
+def run(session_factory, engine, create, items, order_count) -> tuple[float, float]:
+    """Create order_count orders; returns (ms per order, statements per order)."""
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for _ in range(order_count):
+            create(db, items)
+            db.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+
+    return elapsed * 1000 / order_count, statements / order_count
+
+
+def main(order_count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        setup = session_factory()
+        setup.add(Product(id=1, slug="bench", title="Bench"))
+        setup.add_all(
+            Variant(id=i, product_id=1, sku=f"BENCH-{i}", price=Decimal("1299.00"), inventory_qty=1000)
+            for i in range(1, max(LINE_COUNTS) + 1)
+        )
+        setup.commit()
+        setup.close()
+
+        print(f"{'lines':>5}  {'unit of work':>22}  {'bulk insert':>22}")
+        for line_count in LINE_COUNTS:
+            items = [
+                orders.NewOrderItem(product_id=1, variant_id=i, quantity=1, price=Decimal("1299.00"))
+                for i in range(1, line_count + 1)
+            ]
+            results = [
+                run(session_factory, engine, create, items, order_count)
+                for create in (create_with_unit_of_work, create_with_service)
+            ]
+            print(f"{line_count:>5}  " + "  ".join(
+                f"{ms:8.3f} ms {stmts:5.1f} stmts" for ms, stmts in results
+            ))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark order creation")
+    parser.add_argument("--orders", type=int, default=200, help="Orders created per case")
+    args = parser.parse_args()
+    main(args.orders)
@@ -0,0 +1,112 @@
+"""
+Benchmark admin order search against a large orders table.
+
+Fills a throwaway SQLite file with synthetic orders (the search triggers
+index them as they are inserted), then times the same queries through a
+LIKE scan over the searched columns and through services.order_search.
+
+Usage:
+    cd apps/api
+    python -m scripts.bench_order_search [--orders 1000000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, func, insert, or_, select
+
+from app.core.database import Base
+from app.models.order import Order, OrderStatus, SEARCH_COLUMNS
+from app.services import order_search
+
+FIRST_NAMES = ["Johan", "Thabo", "Anna", "Sipho", "Maria", "Pieter", "Lerato", "Ruan", "Naledi", "Chris"]
+LAST_NAMES = ["van der Merwe", "Mokoena", "Botha", "Nkosi", "Pretorius", "Dlamini", "Smit", "Naidoo"]
+BATCH_SIZE = 10000
+REPEATS = 5
+
+
+def fill(engine, order_count: int) -> dict[str, str]:
+    """Insert synthetic orders; returns a waybill and payment ID that exist."""
+    rng = random.Random(42)
+    sample = {}
+    payment_ids = rng.sample(range(10**9, 10**10), order_count)
+    with engine.begin() as connection:
+        for start in range(0, order_count, BATCH_SIZE):
+            rows = []
+            for i in range(start, min(start + BATCH_SIZE, order_count)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                rows.append({
+                    "status": OrderStatus.PAID,
+                    "total": 1299,
+                    "customer_email": f"{first.lower()}.{i}@example.co.za",
+                    "customer_name": f"{first} {last}",
+                    "customer_phone": f"08{rng.randint(10000000, 99999999)}",
+                    "waybill": f"TCG{rng.randint(10**8, 10**9 - 1)}" if i % 2 else None,
+                    "payfast_payment_id": str(payment_ids[i]),
+                })
+            connection.execute(insert(Order), rows)
+        sample["waybill"] = next(row["waybill"] for row in reversed(rows) if row["waybill"])
+        sample["payment ID"] = rows[0]["payfast_payment_id"]
+    return sample
+
+
+def time_query(engine, statement) -> tuple[float, int]:
+    """Best of REPEATS runs; returns (ms, matching rows)."""
+    best = float("inf")
+    with engine.connect() as connection:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            count = connection.execute(statement).scalar_one()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000, count
+
+
+def like_count(query: str):
+    pattern = f"%{query}%"
+    return select(func.count()).select_from(Order).where(
+        or_(*(getattr(Order, name).ilike(pattern) for name in SEARCH_COLUMNS))
+    )
+
+
+def search_count(query: str):
+    return select(func.count()).select_from(order_search.matches(query))
+
+
+def main(order_count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        start = time.perf_counter()
+        sample = fill(engine, order_count)
+        print(f"Inserted and indexed {order_count} orders in {time.perf_counter() - start:.1f} s\n")
+
+        queries = [
+            ("waybill", sample["waybill"]),
+            ("payment ID", sample["payment ID"]),
+            ("email", f".{order_count // 3}@"),
+            ("surname", "Pretorius"),
+        ]
+
+        print(f"{'query':>12}  {'LIKE scan':>20}  {'search index':>20}")
+        for name, query in queries:
+            (like_ms, like_rows), (fts_ms, fts_rows) = (
+                time_query(engine, like_count(query)),
+                time_query(engine, search_count(query)),
+            )
+            print(f"{name:>12}  {like_ms:9.2f} ms {like_rows:7d}  {fts_ms:9.2f} ms {fts_rows:7d}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark admin order search")
+    parser.add_argument("--orders", type=int, default=1000000, help="Orders in the table")
+    args = parser.parse_args()
+    main(args.orders)
@@ -0,0 +1,152 @@
+"""
+Benchmark upload thumbnail rendering on 20-megapixel phone photos.
+
+Generates photo-like 5184x3888 JPEGs (a 20MP 4:3 phone camera) with an
+EXIF orientation and ICC profile, and times three ways of thumbnailing one:
+
+- before: the single 200px PNG thumbnail uploads used to get
+- full decode: every configured size and format, resized from the fully
+  decoded image (what the pipeline would cost without draft/reduce)
+- pipeline: ``thumbnails.render``, which decodes in JPEG draft mode
+
+Each runs in its own process so its peak memory can be reported.
+
+Usage:
+    cd apps/api
+    python -m scripts.bench_thumbnails [--photos 3] [--runs 3]
+"""
+
+import argparse
+import io
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageCms, ImageDraw, ImageFilter, ImageOps
+
+from app.core.config import get_settings
+from app.services import thumbnails
+
+PHOTO_SIZE = (5184, 3888)
+
+
+def make_photo(seed: int) -> bytes:
+    """A photo-like JPEG: soft shapes over a gradient, with sensor noise."""
+    rng = random.Random(seed)
+    small = Image.new("RGB", (648, 486))
+    draw = ImageDraw.Draw(small)
+    for y in range(small.height):
+        shade = int(255 * y / small.height)
+        draw.line([(0, y), (small.width, y)], fill=(shade, 120, 255 - shade))
+    for _ in range(60):
+        x, y = rng.randrange(small.width), rng.randrange(small.height)
+        r = rng.randrange(10, 120)
+        draw.ellipse([x - r, y - r, x + r, y + r], fill=tuple(rng.randrange(256) for _ in range(3)))
+    photo = small.filter(ImageFilter.GaussianBlur(3)).resize(PHOTO_SIZE, Image.Resampling.BICUBIC)
+    noise = Image.effect_noise(PHOTO_SIZE, 24).convert("RGB")
+    photo = Image.blend(photo, noise, 0.08)
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Taken in portrait
+    exif[0x010F] = "Phone"
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=92, exif=exif.tobytes(), icc_profile=icc)
+    return buffer.getvalue()
+
+
+def before(content: bytes) -> dict:
+    """The old upload thumbnail: one 200px PNG."""
+    img = Image.open(io.BytesIO(content))
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    img.thumbnail((200, 200), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    return {(200, "png"): buffer.getvalue()}
+
+
+def full_decode(content: bytes) -> dict:
+    """Every size and format, resized from the full-size image."""
+    settings = get_settings()
+    formats = thumbnails.supported_formats(settings.thumbnail_formats)
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(content))).convert("RGB")
+    formats = ["jpeg" if fmt == "png" else fmt for fmt in formats]
+    rendered = {}
+    for size in settings.thumbnail_sizes:
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=None)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            thumb.save(buffer, **thumbnails.SAVE_OPTIONS[fmt])
+            rendered[(size, fmt)] = buffer.getvalue()
+    return rendered
+
+
+def pipeline(content: bytes) -> dict:
+    settings = get_settings()
+    return thumbnails.render(
+        content, settings.thumbnail_sizes, thumbnails.supported_formats(settings.thumbnail_formats)
+    )
+
+
+VARIANTS = {"before": before, "full decode": full_decode, "pipeline": pipeline}
+
+
+def measure(name: str, photos: list[bytes], runs: int) -> tuple[list[float], int, int, int]:
+    """In a fresh process: (per-photo ms, output count, output bytes, peak RSS MB)."""
+    fn = VARIANTS[name]
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(runs):
+        for photo in photos:
+            started = time.perf_counter()
+            rendered = fn(photo)
+            timings.append((time.perf_counter() - started) * 1000)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return timings, len(rendered), sum(map(len, rendered.values())), (peak_rss - baseline_rss) // 1024
+
+
+def main(photo_count: int, runs: int) -> None:
+    settings = get_settings()
+    # Peak RSS carries over to child processes, so start them before the
+    # photos are generated
+    context = multiprocessing.get_context("spawn")
+    executors = {name: ProcessPoolExecutor(max_workers=1, mp_context=context) for name in VARIANTS}
+    for executor in executors.values():
+        executor.submit(int).result()
+
+    print(f"Generating {photo_count} {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]} photos...")
+    photos = [make_photo(seed) for seed in range(photo_count)]
+    print(f"JPEG size: {statistics.mean(map(len, photos)) / 1e6:.1f}MB average")
+    print(
+        f"Thumbnails: sizes {settings.thumbnail_sizes}, "
+        f"formats {thumbnails.supported_formats(settings.thumbnail_formats)}\n"
+    )
+
+    print(f"{'':<12} {'median':>9} {'p95':>9} {'outputs':>8} {'bytes':>10} {'peak RSS':>9}")
+    for name, executor in executors.items():
+        with executor:
+            timings, outputs, size, rss = executor.submit(measure, name, photos, runs).result()
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{name:<12} {statistics.median(timings):>7.0f}ms {p95:>7.0f}ms "
+            f"{outputs:>8} {size / 1024:>8.0f}KB {rss:>7}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark upload thumbnail rendering")
+    parser.add_argument("--photos", type=int, default=3, help="Distinct photos to generate")
+    parser.add_argument("--runs", type=int, default=3, help="Times each photo is thumbnailed")
+    args = parser.parse_args()
+    main(args.photos, args.runs)
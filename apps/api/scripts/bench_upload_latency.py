@@ -0,0 +1,118 @@
+"""
+Benchmark storefront latency while DXF uploads are being validated.
+
+Sends a batch of concurrent DXF uploads through the app in-process and,
+while they are being handled, polls the health endpoint to see how long
+other requests wait on the event loop. Runs once with validation inline
+(validation_workers = 0, how uploads used to be handled) and once with the
+validation process pool. Files are stored in a throwaway directory.
+
+Usage:
+    cd apps/api
+    python -m scripts.bench_upload_latency [--uploads 8] [--entities 20000] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("BACKGROUND_JOBS_ENABLED", "false")
+
+import ezdxf
+import httpx
+
+from app.main import app
+from app.routers.uploads import get_storage_service
+from app.services import validation_pool
+from app.services.storage import StorageService
+
+PROBE_INTERVAL_SECONDS = 0.01
+
+
+def make_dxf(entity_count: int) -> bytes:
+    """A drawing with entity_count lines and circles."""
+    doc = ezdxf.new()
+    modelspace = doc.modelspace()
+    for i in range(entity_count // 2):
+        modelspace.add_line((i, 0), (i, 100))
+        modelspace.add_circle((i, 50), radius=0.4)
+    text = io.StringIO()
+    doc.write(text)
+    return text.getvalue().encode("utf-8")
+
+
+async def run(client: httpx.AsyncClient, dxf: bytes, uploads: int) -> tuple[float, list[float]]:
+    """Upload concurrently while probing; returns (upload wall time s, probe latencies ms)."""
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def probe():
+        # Latency counts from when the probe was due, so time spent waiting
+        # for a blocked event loop to run it at all is included
+        while not done.is_set():
+            due = time.perf_counter() + PROBE_INTERVAL_SECONDS
+            await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+            response = await client.get("/api/v1/health")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - due) * 1000)
+
+    async def upload():
+        response = await client.post(
+            "/api/v1/uploads/design",
+            files={"file": ("bench.dxf", dxf, "application/dxf")},
+        )
+        response.raise_for_status()
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(upload() for _ in range(uploads)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return elapsed, latencies
+
+
+async def main(uploads: int, entities: int, workers: int) -> None:
+    dxf = make_dxf(entities)
+    print(f"{uploads} concurrent uploads of a {len(dxf) / 1024 / 1024:.1f}MB DXF ({entities} entities)\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = StorageService()
+        storage._local_storage_path = tmp
+        app.dependency_overrides[get_storage_service] = lambda: storage
+
+        print(f"{'validation':>12}  {'uploads':>9}  {'probes':>6}  {'p50':>8}  {'p99':>8}  {'max':>8}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, worker_count in (("inline", 0), (f"{workers} workers", workers)):
+                pool = validation_pool.ValidationPool(worker_count, timeout=120)
+                validation_pool.pool = pool
+                await pool.start()
+                try:
+                    elapsed, latencies = await run(client, dxf, uploads)
+                finally:
+                    pool.shutdown()
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                print(
+                    f"{label:>12}  {elapsed:7.2f} s  {len(latencies):>6}  "
+                    f"{statistics.median(latencies):5.1f} ms  {p99:5.1f} ms  {latencies[-1]:5.1f} ms"
+                )
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request latency during DXF uploads")
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--entities", type=int, default=20000, help="Entities per DXF")
+    parser.add_argument("--workers", type=int, default=2, help="Validation worker processes")
+    args = parser.parse_args()
+    asyncio.run(main(args.uploads, args.entities, args.workers))
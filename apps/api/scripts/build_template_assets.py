@@ -0,0 +1,198 @@
+"""
+Build step for design template SVG assets.
+
+Minifies every SVG in the web app's public/images/templates/ directory and
+writes content-hashed copies to public/images/templates/build/ together
+with gzip and brotli precompressed variants, e.g.:
+
+    build/lion.3f9a1c2b7d.svg
+    build/lion.3f9a1c2b7d.svg.gz
+    build/lion.3f9a1c2b7d.svg.br
+
+Hashed filenames are safe to serve with the immutable Cache-Control the web
+app already sets for /images/. The .gz/.br files can be served as-is by a
+static server with gzip_static/brotli_static support. A manifest.json maps
+each original public path to its hashed path.
+
+Usage:
+    cd apps/api
+    python -m scripts.build_template_assets
+
+To also point DesignTemplate.svg_path (and thumbnails that reference the
+same SVG) at the hashed files:
+    python -m scripts.build_template_assets --update-db
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip variants are still built
+    brotli = None
+
+WEB_PUBLIC_DIR = Path(__file__).resolve().parents[2] / "web" / "public"
+TEMPLATES_DIR = WEB_PUBLIC_DIR / "images" / "templates"
+BUILD_DIR = TEMPLATES_DIR / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+
+HASH_LENGTH = 10
+
+
+def minify_svg(svg: str) -> str:
+    """
+    Minify SVG markup without changing how it renders.
+
+    Removes XML comments, the XML prolog, doctype and <metadata> blocks, and
+    collapses insignificant whitespace between and inside tags.
+    """
+    svg = re.sub(r"<!--.*?-->", "", svg, flags=re.DOTALL)
+    svg = re.sub(r"<\?xml.*?\?>", "", svg, flags=re.DOTALL)
+    svg = re.sub(r"<!DOCTYPE[^>]*>", "", svg, flags=re.IGNORECASE)
+    svg = re.sub(r"<metadata\b.*?</metadata>", "", svg, flags=re.DOTALL | re.IGNORECASE)
+    svg = re.sub(r">\s+<", "><", svg)
+    svg = re.sub(r"\s{2,}", " ", svg)
+    svg = re.sub(r"\s*(/?>)", r"\1", svg)
+    return svg.strip()
+
+
+def content_hash(data: bytes) -> str:
+    """Short content hash used in built filenames."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def build_assets(clean: bool = True) -> dict[str, str]:
+    """
+    Minify, hash and precompress every template SVG.
+
+    Args:
+        clean: Remove previously built files that are no longer referenced
+
+    Returns:
+        Manifest mapping original public paths to hashed public paths
+    """
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    manifest: dict[str, str] = {}
+    written: set[Path] = {MANIFEST_PATH}
+
+    sources = sorted(TEMPLATES_DIR.glob("*.svg"))
+    for source in sources:
+        original = source.read_text(encoding="utf-8")
+        minified = minify_svg(original).encode("utf-8")
+        hashed_name = f"{source.stem}.{content_hash(minified)}.svg"
+
+        target = BUILD_DIR / hashed_name
+        target.write_bytes(minified)
+        written.add(target)
+
+        # mtime=0 keeps the gzip output byte-for-byte reproducible
+        gz_target = BUILD_DIR / f"{hashed_name}.gz"
+        gz_target.write_bytes(gzip.compress(minified, compresslevel=9, mtime=0))
+        written.add(gz_target)
+
+        if brotli is not None:
+            br_target = BUILD_DIR / f"{hashed_name}.br"
+            br_target.write_bytes(brotli.compress(minified, quality=11))
+            written.add(br_target)
+
+        manifest[_public_path(source)] = _public_path(target)
+        print(f"  {source.name}: {len(original.encode('utf-8'))} -> {len(minified)} bytes ({hashed_name})")
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    if clean:
+        for stale in BUILD_DIR.iterdir():
+            if stale.is_file() and stale not in written:
+                stale.unlink()
+
+    if brotli is None:
+        print("  Brotli not installed - skipped .br variants (pip install Brotli)")
+
+    return manifest
+
+
+def load_manifest() -> dict[str, str]:
+    """Read the manifest written by the last build; empty if never built."""
+    if not MANIFEST_PATH.exists():
+        return {}
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+
+def update_database(manifest: dict[str, str]) -> int:
+    """
+    Point design templates at the hashed SVG files.
+
+    Matches on both the original and any previously hashed path, so the
+    command can be re-run after templates change.
+
+    Returns:
+        Number of templates updated
+    """
+    from app.core.database import SessionLocal
+    from app.models import DesignTemplate
+
+    # Map stem -> new path so stale hashed paths are also recognised
+    by_stem = {Path(original).stem: hashed for original, hashed in manifest.items()}
+
+    db = SessionLocal()
+    updated = 0
+    try:
+        for template in db.query(DesignTemplate).all():
+            new_svg_path = _resolve(template.svg_path, manifest, by_stem)
+            if new_svg_path and new_svg_path != template.svg_path:
+                if template.thumbnail == template.svg_path:
+                    template.thumbnail = new_svg_path
+                template.svg_path = new_svg_path
+                updated += 1
+        db.commit()
+    finally:
+        db.close()
+    return updated
+
+
+def _resolve(path: str | None, manifest: dict[str, str], by_stem: dict[str, str]) -> str | None:
+    """Find the hashed path for an original or previously hashed SVG path."""
+    if not path:
+        return None
+    if path in manifest:
+        return manifest[path]
+    if path.startswith("/images/templates/build/"):
+        stem = Path(path).name.split(".")[0]
+        return by_stem.get(stem)
+    return None
+
+
+def _public_path(path: Path) -> str:
+    """Convert a file under public/ to its URL path."""
+    return "/" + path.relative_to(WEB_PUBLIC_DIR).as_posix()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build minified, hashed, precompressed template SVGs")
+    parser.add_argument(
+        "--update-db",
+        action="store_true",
+        help="Update DesignTemplate.svg_path to the hashed filenames"
+    )
+    parser.add_argument(
+        "--no-clean",
+        action="store_true",
+        help="Keep previously built files that are no longer referenced"
+    )
+    args = parser.parse_args()
+
+    print("Building design template assets...")
+    manifest = build_assets(clean=not args.no_clean)
+    print(f"Built {len(manifest)} templates -> {BUILD_DIR}")
+
+    if args.update_db:
+        count = update_database(manifest)
+        print(f"Updated {count} design templates in the database.")
@@ -14,6 +14,10 @@ from app.models import (
     Collection, PromoBlock,
     Order, OrderItem,
     DesignTemplate, CustomDesignOrder,
+    CatalogState,
+    InventoryHold,
+    IdempotencyKey,
+    Cart,
 )
 
 def init_db():
@@ -0,0 +1,46 @@
+"""
+Render raster previews for all design templates.
+
+The API also does this in the background on startup; this script is for
+running it ahead of a deploy or after replacing template SVGs.
+
+Usage:
+    cd apps/api
+    python -m scripts.render_template_previews [--force]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services import template_previews
+
+
+def main(force: bool) -> None:
+    """Render previews for templates whose SVG changed."""
+    if template_previews.cairosvg_rasterizer() is None:
+        print("cairosvg is not installed (pip install cairosvg); nothing rendered.")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        count = asyncio.run(template_previews.render_template_previews(db, force=force))
+    finally:
+        db.close()
+    print(f"Rendered previews for {count} design templates.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render design template previews")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render previews even if the template SVG is unchanged"
+    )
+    args = parser.parse_args()
+    main(args.force)
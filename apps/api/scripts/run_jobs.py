@@ -0,0 +1,57 @@
+"""
+Run the background job worker.
+
+Claims and runs queued jobs (design upload processing) until stopped with
+Ctrl+C or SIGTERM, finishing the job in hand first. The API runs a worker
+in each process by default; run this to add capacity, or instead of them
+with JOB_WORKER_IN_APP=false. Jobs wait in the database while no worker is
+running.
+
+Usage:
+    cd apps/api
+    python -m scripts.run_jobs [--once]
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services import jobs, validation_pool
+
+
+async def run(once: bool) -> None:
+    """Run jobs until stopped, or just those already due with --once."""
+    await validation_pool.pool.start()
+    try:
+        if once:
+            count = await jobs.run_pending(SessionLocal)
+            print(f"Ran {count} jobs.")
+            return
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"Job worker running ({', '.join(sorted(jobs.HANDLERS))}).")
+        await jobs.work(SessionLocal, stop)
+    finally:
+        validation_pool.pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Run the jobs that are due, then exit"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args.once))
@@ -38,6 +38,8 @@ from app.models import (
     DesignCategory,
     collection_product,
 )
+from app.services import smart_collections
+from scripts.build_template_assets import load_manifest
 
 
 def clear_database(db: Session):
@@ -314,13 +316,13 @@ def seed_collections(db: Session, products: dict[str, Product]) -> dict[str, Col
             "slug": "best-sellers",
             "title": "Best Sellers",
             "hero_copy": "Our most-loved fire pits. Tried, tested, and loved by real braai enthusiasts.",
-            "product_slugs": ["koosdoos-medium"],  # Products with best-seller badge
+            "rules": {"badges_any": ["best-seller"]},  # Smart collection
         },
         {
             "slug": "new-arrivals",
             "title": "New Arrivals",
             "hero_copy": "Fresh off the laser cutter. The latest additions to the KoosDoos family.",
-            "product_slugs": ["koosdoos-small", "koosdoos-personalised"],  # Products with new badge
+            "rules": {"badges_any": ["new"]},  # Smart collection
         },
         {
             "slug": "personalised",
@@ -332,11 +334,17 @@ def seed_collections(db: Session, products: dict[str, Product]) -> dict[str, Col
 
     collections = {}
     for data in collections_data:
-        product_slugs = data.pop("product_slugs")
+        product_slugs = data.pop("product_slugs", [])
         collection = Collection(**data)
         db.add(collection)
         db.flush()  # Get the ID
 
+        # Smart collections are evaluated from their rules
+        if collection.rules is not None:
+            smart_collections.rebuild_collection(db, collection)
+            collections[data["slug"]] = collection
+            continue
+
         # Add products to collection
         for slug in product_slugs:
             if slug in products:
@@ -422,8 +430,13 @@ def seed_design_templates(db: Session):
         {"name": "Ndebele", "category": DesignCategory.PATTERNS, "thumbnail": "/images/templates/ndebele.svg", "svg_path": "/images/templates/ndebele.svg"},
     ]
 
+    # Use the hashed, precompressed SVGs when build_template_assets has run
+    manifest = load_manifest()
+
     count = 0
     for data in templates_data:
+        data["thumbnail"] = manifest.get(data["thumbnail"], data["thumbnail"])
+        data["svg_path"] = manifest.get(data["svg_path"], data["svg_path"])
         template = DesignTemplate(**data)
         db.add(template)
         count += 1
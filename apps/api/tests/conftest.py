@@ -1,4 +1,13 @@
 """Test configuration and fixtures for API tests."""
+import os
+
+# Keep startup jobs from touching the real database during tests
+os.environ.setdefault("BACKGROUND_JOBS_ENABLED", "false")
+# Run validation inline rather than spawning worker processes per test client
+os.environ.setdefault("VALIDATION_WORKERS", "0")
+# Process uploads in the request; there is no job worker in tests
+os.environ.setdefault("UPLOAD_JOBS_INLINE", "true")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -6,7 +15,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_session_factory
+from app.services import template_catalog, shipping_quotes, order_cache
 
 
 # Create an in-memory SQLite database for testing
@@ -41,10 +51,20 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Clear in-process caches so tests don't see each other's data."""
+    template_catalog.invalidate()
+    shipping_quotes.invalidate()
+    order_cache.clear()
+    yield
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Provide a test client with database session."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -236,6 +236,275 @@ class TestCollectionAdmin:
         assert response.status_code == 200
 
 
+class TestCollectionMembershipAdmin:
+    """Test incremental collection membership endpoints."""
+
+    def _seed(self, db_session, product_count: int = 3):
+        from app.models.product import Product
+        from app.models.collection import Collection
+
+        products = [Product(slug=f"member-{i}", title=f"Member {i}") for i in range(product_count)]
+        collection = Collection(slug="members", title="Members")
+        db_session.add_all(products + [collection])
+        db_session.commit()
+        return collection, products
+
+    def _member_slugs(self, client: TestClient) -> list[str]:
+        response = client.get("/api/v1/collections/members")
+        return [p["slug"] for p in response.json()["products"]]
+
+    def test_add_products(self, client: TestClient, db_session):
+        """Test adding products appends them and skips existing members."""
+        collection, products = self._seed(db_session)
+
+        response = client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [products[2].id, products[0].id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["added"] == 2
+        assert data["product_count"] == 2
+        assert data["catalog_version"] >= 1
+
+        response = client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [products[0].id, products[1].id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.json()["added"] == 1
+        assert self._member_slugs(client) == ["member-2", "member-0", "member-1"]
+
+    def test_add_missing_product(self, client: TestClient, db_session):
+        """Test that adding a non-existent product fails."""
+        collection, _ = self._seed(db_session)
+
+        response = client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [99999]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 404
+
+    def test_remove_products(self, client: TestClient, db_session):
+        """Test removing products from a collection."""
+        collection, products = self._seed(db_session)
+        client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [p.id for p in products]},
+            headers=ADMIN_HEADERS,
+        )
+
+        response = client.request(
+            "DELETE",
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [products[1].id, 99999]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 200
+        assert response.json()["removed"] == 1
+        assert response.json()["product_count"] == 2
+        assert self._member_slugs(client) == ["member-0", "member-2"]
+
+    def test_reorder_products(self, client: TestClient, db_session):
+        """Test that reordering moves listed products to the front."""
+        collection, products = self._seed(db_session)
+        client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [p.id for p in products]},
+            headers=ADMIN_HEADERS,
+        )
+
+        response = client.put(
+            f"/api/v1/admin/collections/{collection.id}/products/order",
+            json={"product_ids": [products[2].id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 200
+        assert self._member_slugs(client) == ["member-2", "member-0", "member-1"]
+
+    def test_reorder_rejects_non_members(self, client: TestClient, db_session):
+        """Test that reordering with a non-member product fails."""
+        collection, products = self._seed(db_session)
+
+        response = client.put(
+            f"/api/v1/admin/collections/{collection.id}/products/order",
+            json={"product_ids": [products[0].id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 400
+
+    def test_membership_edits_bump_catalog_version(self, client: TestClient, db_session):
+        """Test that each effective edit reports a newer catalog version."""
+        collection, products = self._seed(db_session)
+
+        first = client.post(
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [products[0].id]},
+            headers=ADMIN_HEADERS,
+        ).json()["catalog_version"]
+        second = client.request(
+            "DELETE",
+            f"/api/v1/admin/collections/{collection.id}/products",
+            json={"product_ids": [products[0].id]},
+            headers=ADMIN_HEADERS,
+        ).json()["catalog_version"]
+        assert second == first + 1
+
+    def test_update_collection_product_ids_keeps_order(self, client: TestClient, db_session):
+        """Test that replacing product_ids applies the given order."""
+        collection, products = self._seed(db_session)
+
+        response = client.put(
+            f"/api/v1/admin/collections/{collection.id}",
+            json={"product_ids": [products[1].id, products[0].id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 200
+        assert self._member_slugs(client) == ["member-1", "member-0"]
+
+    def test_replace_writes_only_changed_positions(self, db_session):
+        """Test that replacing a collection's products leaves unmoved rows alone."""
+        from sqlalchemy import event
+        from app.services import collection_membership
+        from .conftest import engine
+
+        collection, products = self._seed(db_session, product_count=4)
+        ids = [p.id for p in products]
+        collection_membership.add_products(db_session, collection.id, ids[:3])
+        db_session.commit()
+
+        updated = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("UPDATE"):
+                updated.extend(parameters if executemany else [parameters])
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            # Drop the last member and append a new one: nothing kept moves
+            assert collection_membership.replace_products(db_session, collection.id, ids[:2] + [ids[3]]) == (1, 1)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        db_session.commit()
+
+        assert updated == []
+        assert collection_membership.member_ids(db_session, collection.id) == ids[:2] + [ids[3]]
+
+
+class TestSmartCollectionAdmin:
+    """Test rule-based smart collections."""
+
+    def _seed_products(self, db_session):
+        from app.models.product import Product, Variant
+
+        small = Product(slug="smart-small", title="Small", badges=["new"], seats_min=2, seats_max=3)
+        medium = Product(slug="smart-medium", title="Medium", badges=["best-seller"], seats_min=4, seats_max=6)
+        db_session.add_all([small, medium])
+        db_session.commit()
+        db_session.add_all([
+            Variant(product_id=small.id, sku="SMART-SM", price=Decimal("1299.00"), inventory_qty=0),
+            Variant(product_id=medium.id, sku="SMART-MD", price=Decimal("1899.00"), inventory_qty=5),
+        ])
+        db_session.commit()
+        return small, medium
+
+    def _member_slugs(self, client: TestClient, slug: str) -> set[str]:
+        response = client.get(f"/api/v1/collections/{slug}")
+        assert response.status_code == 200
+        return {p["slug"] for p in response.json()["products"]}
+
+    def test_create_smart_collection(self, client: TestClient, db_session):
+        """Test that a smart collection is populated from its rules."""
+        self._seed_products(db_session)
+
+        response = client.post(
+            "/api/v1/admin/collections",
+            json={"slug": "new-arrivals", "title": "New Arrivals", "rules": {"badges_any": ["new"]}},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 201
+        assert response.json()["rules"]["badges_any"] == ["new"]
+        assert self._member_slugs(client, "new-arrivals") == {"smart-small"}
+
+    def test_smart_collection_combines_rules(self, client: TestClient, db_session):
+        """Test price, seats and stock rules together."""
+        self._seed_products(db_session)
+
+        response = client.post(
+            "/api/v1/admin/collections",
+            json={
+                "slug": "family-size",
+                "title": "Family Size",
+                "rules": {"min_price": "1500", "seats": 5, "in_stock": True},
+            },
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 201
+        assert self._member_slugs(client, "family-size") == {"smart-medium"}
+
+    def test_product_update_refreshes_membership(self, client: TestClient, db_session):
+        """Test that changing a product's badges updates membership."""
+        small, medium = self._seed_products(db_session)
+        client.post(
+            "/api/v1/admin/collections",
+            json={"slug": "best-sellers", "title": "Best Sellers", "rules": {"badges_any": ["best-seller"]}},
+            headers=ADMIN_HEADERS,
+        )
+
+        client.put(
+            f"/api/v1/admin/products/{small.id}",
+            json={"badges": ["best-seller"]},
+            headers=ADMIN_HEADERS,
+        )
+        client.put(
+            f"/api/v1/admin/products/{medium.id}",
+            json={"badges": []},
+            headers=ADMIN_HEADERS,
+        )
+
+        assert self._member_slugs(client, "best-sellers") == {"smart-small"}
+
+    def test_variant_update_refreshes_membership(self, client: TestClient, db_session):
+        """Test that restocking a variant adds the product to an in-stock collection."""
+        from app.models.product import Variant
+
+        self._seed_products(db_session)
+        client.post(
+            "/api/v1/admin/collections",
+            json={"slug": "in-stock", "title": "In Stock", "rules": {"in_stock": True}},
+            headers=ADMIN_HEADERS,
+        )
+        assert self._member_slugs(client, "in-stock") == {"smart-medium"}
+
+        variant = db_session.query(Variant).filter(Variant.sku == "SMART-SM").first()
+        client.put(
+            f"/api/v1/admin/variants/{variant.id}",
+            json={"inventory_qty": 3},
+            headers=ADMIN_HEADERS,
+        )
+
+        assert self._member_slugs(client, "in-stock") == {"smart-small", "smart-medium"}
+
+    def test_smart_collection_rejects_manual_products(self, client: TestClient, db_session):
+        """Test that product_ids cannot be edited on a smart collection."""
+        small, _ = self._seed_products(db_session)
+        response = client.post(
+            "/api/v1/admin/collections",
+            json={"slug": "smart", "title": "Smart", "rules": {"badges_any": ["new"]}},
+            headers=ADMIN_HEADERS,
+        )
+        collection_id = response.json()["id"]
+
+        response = client.put(
+            f"/api/v1/admin/collections/{collection_id}",
+            json={"product_ids": [small.id]},
+            headers=ADMIN_HEADERS,
+        )
+        assert response.status_code == 409
+
+
 class TestPromoBlockAdmin:
     """Test promo block admin endpoints."""
 
@@ -326,7 +595,6 @@ class TestOrderAdmin:
     def test_list_orders_with_data(self, client: TestClient, db_session):
         """Test listing orders with data."""
         from app.models.order import Order, OrderStatus
-        from decimal import Decimal
 
         order = Order(
             customer_email="test@example.com",
@@ -346,7 +614,6 @@ class TestOrderAdmin:
     def test_list_orders_filter_by_status(self, client: TestClient, db_session):
         """Test filtering orders by status."""
         from app.models.order import Order, OrderStatus
-        from decimal import Decimal
 
         # Create orders with different statuses
         pending = Order(
@@ -372,10 +639,130 @@ class TestOrderAdmin:
         assert data["total"] == 1
         assert data["orders"][0]["customer_email"] == "pending@example.com"
 
+    def test_list_orders_filter_by_region(self, client: TestClient, db_session):
+        """Test filtering orders by shipping province and city."""
+        from app.models.order import Order, OrderStatus
+
+        db_session.add_all([
+            Order(
+                customer_email="jhb@example.com",
+                total=Decimal("1000.00"),
+                status=OrderStatus.PAID,
+                shipping_address='{"city": "Johannesburg", "province": "Gauteng", "postal_code": "2000"}',
+            ),
+            Order(
+                customer_email="cpt@example.com",
+                total=Decimal("2000.00"),
+                status=OrderStatus.PAID,
+                shipping_address='{"city": "Cape Town", "province": "Western Cape", "postal_code": "8001"}',
+            ),
+        ])
+        db_session.commit()
+
+        response = client.get("/api/v1/admin/orders?province=Gauteng", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert [o["customer_email"] for o in response.json()["orders"]] == ["jhb@example.com"]
+
+        response = client.get("/api/v1/admin/orders?city=Cape%20Town&postal_code=8001", headers=ADMIN_HEADERS)
+        assert [o["customer_email"] for o in response.json()["orders"]] == ["cpt@example.com"]
+
+    def search_orders(self, client, q):
+        response = client.get("/api/v1/admin/orders", params={"q": q}, headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        return [o["customer_email"] for o in response.json()["orders"]]
+
+    def test_search_orders(self, client: TestClient, db_session):
+        """Test the unified order search across name, phone, waybill, payment ID and order number."""
+        from app.models.order import Order, OrderStatus
+
+        johan = Order(
+            customer_email="johan@example.com",
+            customer_name="Johan van der Merwe",
+            customer_phone="082 555 1234",
+            total=Decimal("1000.00"),
+            status=OrderStatus.PAID,
+            payfast_payment_id="PF-778899",
+        )
+        thabo = Order(
+            customer_email="thabo@example.com",
+            customer_name="Thabo Mokoena",
+            total=Decimal("2000.00"),
+            status=OrderStatus.SHIPPED,
+            waybill="TCG123456",
+        )
+        db_session.add_all([johan, thabo])
+        db_session.commit()
+
+        assert self.search_orders(client, "merwe") == ["johan@example.com"]
+        assert self.search_orders(client, "555 12") == ["johan@example.com"]
+        assert self.search_orders(client, "pf-7788") == ["johan@example.com"]
+        assert self.search_orders(client, "TCG1234") == ["thabo@example.com"]
+        assert self.search_orders(client, "ab") == ["thabo@example.com"]  # Too short for the index
+        assert self.search_orders(client, f"#{thabo.id}") == ["thabo@example.com"]
+        assert self.search_orders(client, "nobody") == []
+
+        # The index follows updates to the order
+        thabo.waybill = "TCG999000"
+        db_session.commit()
+        assert self.search_orders(client, "TCG1234") == []
+        assert self.search_orders(client, "999000") == ["thabo@example.com"]
+
+    def test_search_ranks_better_matches_first(self, client: TestClient, db_session):
+        """Test that search results are ordered by relevance, not date."""
+        from app.models.order import Order, OrderStatus
+        from datetime import datetime, timedelta
+
+        now = datetime.utcnow()
+        best = Order(
+            customer_email="smith@smith.co.za",
+            customer_name="Smith",
+            total=Decimal("1.00"),
+            status=OrderStatus.PAID,
+            created_at=now - timedelta(days=30),
+        )
+        weaker = Order(
+            customer_email="anna@example.com",
+            customer_name="Anna Smithers-Jones",
+            total=Decimal("1.00"),
+            status=OrderStatus.PAID,
+            created_at=now,
+        )
+        db_session.add_all([best, weaker])
+        db_session.commit()
+
+        assert self.search_orders(client, "smith") == ["smith@smith.co.za", "anna@example.com"]
+
+        # An order number beats text that happens to contain the same digits
+        weaker.customer_phone = f"0821{best.id}{best.id}{best.id}"
+        db_session.commit()
+        assert self.search_orders(client, f"{best.id}{best.id}{best.id}") == ["anna@example.com"]
+        weaker.customer_phone = f"082 {best.id}"
+        db_session.commit()
+        assert self.search_orders(client, str(best.id)) == ["smith@smith.co.za", "anna@example.com"]
+
+    def test_shipping_summary(self, client: TestClient, db_session):
+        """Test order counts and totals grouped by shipping province."""
+        from app.models.order import Order, OrderStatus
+
+        address = '{"city": "Durban", "province": "KwaZulu-Natal"}'
+        db_session.add_all([
+            Order(customer_email="a@example.com", total=Decimal("100.00"), status=OrderStatus.PAID, shipping_address=address),
+            Order(customer_email="b@example.com", total=Decimal("250.00"), status=OrderStatus.PAID, shipping_address=address),
+            Order(customer_email="c@example.com", total=Decimal("50.00"), status=OrderStatus.PENDING),
+        ])
+        db_session.commit()
+
+        response = client.get("/api/v1/admin/orders/shipping-summary", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        regions = response.json()["regions"]
+        assert [(r["province"], r["orders"], float(r["total"])) for r in regions] == [
+            ("KwaZulu-Natal", 2, 350.0),
+            (None, 1, 50.0),
+        ]
+
     def test_update_order_status(self, client: TestClient, db_session):
         """Test updating order status."""
         from app.models.order import Order, OrderStatus
-        from decimal import Decimal
 
         order = Order(
             customer_email="status@example.com",
@@ -393,10 +780,21 @@ class TestOrderAdmin:
         assert response.status_code == 200
         assert response.json()["status"] == "paid"
 
+    def test_update_order_status_refreshes_order_cache(self, client: TestClient, db_session):
+        """Test that a status change shows up on the next public order read."""
+        from app.models.order import Order, OrderStatus
+
+        order = Order(customer_email="cache@example.com", total=Decimal("1999.00"), status=OrderStatus.PENDING)
+        db_session.add(order)
+        db_session.commit()
+
+        assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == "pending"
+        client.put(f"/api/v1/admin/orders/{order.id}/status", json={"status": "paid"}, headers=ADMIN_HEADERS)
+        assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == "paid"
+
     def test_update_order_status_invalid_transition(self, client: TestClient, db_session):
         """Test invalid status transition."""
         from app.models.order import Order, OrderStatus
-        from decimal import Decimal
 
         order = Order(
             customer_email="invalid@example.com",
@@ -418,7 +816,6 @@ class TestOrderAdmin:
     def test_get_order_detail(self, client: TestClient, db_session):
         """Test getting order detail."""
         from app.models.order import Order, OrderStatus
-        from decimal import Decimal
 
         order = Order(
             customer_email="detail@example.com",
@@ -467,7 +864,6 @@ class TestVariantAdmin:
     def test_update_variant(self, client: TestClient, db_session):
         """Test updating a variant."""
         from app.models.product import Product, Variant
-        from decimal import Decimal
 
         product = Product(slug="variant-update-product", title="Variant Update")
         db_session.add(product)
@@ -492,7 +888,6 @@ class TestVariantAdmin:
     def test_delete_variant(self, client: TestClient, db_session):
         """Test deleting a variant."""
         from app.models.product import Product, Variant
-        from decimal import Decimal
 
         product = Product(slug="variant-delete-product", title="Variant Delete")
         db_session.add(product)
@@ -67,6 +67,39 @@ def seed_products_for_cart(db_session):
     return [product1, product2]
 
 
+@pytest.fixture
+def count_queries():
+    """Count SELECT statements issued against the test engine."""
+    from sqlalchemy import event
+    from .conftest import engine
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def checkout_payload(items):
+    """Build a Payfast checkout request body for the given cart items."""
+    return {
+        "items": items,
+        "customer_email": "test@example.com",
+        "customer_first_name": "Test",
+        "shipping_address": {
+            "street": "1 Main Road",
+            "suburb": "Centurion",
+            "city": "Pretoria",
+            "province": "Gauteng",
+            "postal_code": "0157",
+        },
+    }
+
+
 class TestCartValidation:
     """Tests for cart validation endpoint."""
 
@@ -143,6 +176,279 @@ class TestCartValidation:
         assert validated_item["line_total"] == 1299.00
 
 
+class TestBatchedPricing:
+    """Tests for single-query cart pricing."""
+
+    def test_duplicate_lines_are_merged(self, client, db_session):
+        """Test that repeated lines for one variant are priced as one."""
+        seed_products_for_cart(db_session)
+
+        cart_items = [
+            {"product_id": 1, "variant_id": 1, "quantity": 2},
+            {"product_id": 2, "variant_id": 2, "quantity": 1},
+            {"product_id": 1, "variant_id": 1, "quantity": 3},
+        ]
+
+        data = client.post("/api/v1/cart/validate", json={"items": cart_items}).json()
+        assert [(i["variant_id"], i["quantity"]) for i in data["items"]] == [(1, 5), (2, 1)]
+        assert float(data["subtotal"]) == 1299.00 * 5 + 1899.00
+
+    def test_mismatched_product_is_rejected(self, client, db_session):
+        """Test that a variant paired with the wrong product is not found."""
+        seed_products_for_cart(db_session)
+
+        cart_items = [{"product_id": 2, "variant_id": 1, "quantity": 1}]
+
+        data = client.post("/api/v1/cart/validate", json={"items": cart_items}).json()
+        assert data["items"] == []
+        assert data["errors"]
+
+    def test_validate_query_count_is_constant(self, client, db_session, count_queries):
+        """Test that validating a cart issues one SELECT however many lines it has."""
+        seed_products_for_cart(db_session)
+
+        cart_items = [
+            {"product_id": 1, "variant_id": 1, "quantity": 1},
+            {"product_id": 2, "variant_id": 2, "quantity": 1},
+            {"product_id": 1, "variant_id": 3, "quantity": 1},
+            {"product_id": 999, "variant_id": 999, "quantity": 1},
+        ]
+
+        count_queries.clear()
+        response = client.post("/api/v1/cart/validate", json={"items": cart_items})
+        assert response.status_code == 200
+        assert len(count_queries) == 1
+
+    def test_checkout_query_count_is_constant(self, client, db_session, count_queries):
+        """Test that checkout cost doesn't grow with the number of cart lines."""
+        seed_products_for_cart(db_session)
+
+        def checkout(items):
+            count_queries.clear()
+            response = client.post("/api/v1/checkout/payfast", json=checkout_payload(items))
+            assert response.status_code == 200
+            return len(count_queries)
+
+        one_line = checkout([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        two_lines = checkout([
+            {"product_id": 1, "variant_id": 1, "quantity": 1},
+            {"product_id": 2, "variant_id": 2, "quantity": 2},
+        ])
+        assert one_line == two_lines
+
+
+class TestBulkValidation:
+    """Tests for trade-order CSV validation."""
+
+    @staticmethod
+    def post_csv(client, body):
+        """Post a CSV body and parse the NDJSON response."""
+        import json
+
+        response = client.post(
+            "/api/v1/cart/validate/bulk", content=body, headers={"Content-Type": "text/csv"}
+        )
+        records = [json.loads(line) for line in response.text.splitlines()] if response.status_code == 200 else []
+        return response, records
+
+    def test_prices_rows_in_order(self, client, db_session):
+        """Test that each row gets a record and the summary totals them."""
+        seed_products_for_cart(db_session)
+
+        response, records = self.post_csv(client, "sku,quantity\r\nKDS-SM,2\r\nKDS-MD,1\r\n")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        assert [(r["type"], r.get("sku")) for r in records] == [
+            ("line", "KDS-SM"), ("line", "KDS-MD"), ("summary", None),
+        ]
+        assert records[0]["line"] == 2
+        assert float(records[0]["line_total"]) == 2598
+        summary = records[-1]
+        assert summary["valid"] is True
+        assert summary["lines"] == 2
+        assert float(summary["subtotal"]) == 2598 + 1899
+
+    def test_reports_bad_rows(self, client, db_session):
+        """Test that unknown SKUs and bad quantities are reported per row."""
+        seed_products_for_cart(db_session)
+
+        _, records = self.post_csv(client, "KDS-SM,1\nNOPE,1\nKDS-MD,lots\nKDS-MD,0\nKDS-MD\n")
+        errors = {r["line"]: r["error"] for r in records if r["type"] == "error"}
+        assert errors == {
+            2: "Unknown SKU: NOPE",
+            3: "Invalid quantity: lots",
+            4: "Quantity must be at least 1: 0",
+            5: "Missing quantity",
+        }
+        assert records[-1]["valid"] is False
+        assert records[-1]["errors"] == 4
+
+    def test_repeated_sku_checks_running_total(self, client, db_session):
+        """Test that availability counts every row for the same SKU."""
+        seed_products_for_cart(db_session)  # KDS-SM has 25 in stock
+
+        _, records = self.post_csv(client, "KDS-SM,20\nKDS-SM,10\n")
+        assert [r["available"] for r in records[:2]] == [True, False]
+        assert records[-1]["unavailable"] == 1
+        assert records[-1]["valid"] is False
+
+    def test_one_lookup_per_chunk(self, client, db_session, count_queries, monkeypatch):
+        """Test that SKUs are resolved a chunk at a time."""
+        from app.core.config import get_settings
+
+        seed_products_for_cart(db_session)
+        monkeypatch.setattr(get_settings(), "bulk_validation_chunk_size", 100)
+
+        count_queries.clear()
+        _, records = self.post_csv(client, "KDS-SM,1\n" * 250)
+        assert records[-1]["lines"] == 250
+        assert len(count_queries) == 3
+
+    def test_too_many_lines(self, client, db_session, monkeypatch):
+        """Test that oversized files are rejected."""
+        from app.core.config import get_settings
+
+        seed_products_for_cart(db_session)
+        monkeypatch.setattr(get_settings(), "bulk_validation_max_lines", 10)
+
+        response, _ = self.post_csv(client, "KDS-SM,1\n" * 11)
+        assert response.status_code == 413
+
+    def test_blank_rows_count_towards_limit(self, client, db_session, monkeypatch):
+        """Test that blank and comma-only rows can't get past the line limit."""
+        from app.core.config import get_settings
+
+        seed_products_for_cart(db_session)
+        monkeypatch.setattr(get_settings(), "bulk_validation_max_lines", 10)
+
+        response, _ = self.post_csv(client, "\n,,\n" * 6)
+        assert response.status_code == 413
+
+        response, records = self.post_csv(client, "KDS-SM,1\n\n,\n")
+        assert response.status_code == 200
+        assert records[-1]["lines"] == 1
+
+    def test_line_too_long(self, client, db_session):
+        """Test that a body with no line breaks isn't buffered whole."""
+        from app.services import bulk_validation
+
+        seed_products_for_cart(db_session)
+
+        response, _ = self.post_csv(client, "KDS-SM" * (bulk_validation.MAX_LINE_LENGTH // 6 + 1))
+        assert response.status_code == 413
+
+    def test_rows_split_across_chunks(self):
+        """Test that rows and multi-byte characters split between chunks parse correctly."""
+        import asyncio
+        from app.services import bulk_validation
+
+        body = "\ufeffsku,quantity\nKDS-\u00c9T\u00c9,3\n\nKDS-MD,1".encode("utf-8")
+
+        async def parse():
+            async def chunks():
+                for i in range(0, len(body), 5):
+                    yield body[i:i + 5]
+            return [row async for row in bulk_validation.iter_csv_rows(chunks())]
+
+        assert asyncio.run(parse()) == [
+            (1, ["sku", "quantity"]),
+            (2, ["KDS-\u00c9T\u00c9", "3"]),
+            (3, []),
+            (4, ["KDS-MD", "1"]),
+        ]
+
+
+class TestInventoryHolds:
+    """Tests for stock reservations taken at checkout."""
+
+    def test_checkout_holds_stock(self, client, db_session):
+        """Test that checkout reserves stock and validation reports what's left."""
+        seed_products_for_cart(db_session)
+
+        response = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 5}]),
+        )
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        assert db_session.get(Variant, 1).reserved_qty == 5
+
+        data = client.post(
+            "/api/v1/cart/validate",
+            json={"items": [{"product_id": 1, "variant_id": 1, "quantity": 1}]},
+        ).json()
+        assert data["items"][0]["available_qty"] == 20
+
+    def test_last_unit_cannot_be_held_twice(self, client, db_session):
+        """Test that a second shopper can't check out stock already held."""
+        seed_products_for_cart(db_session)
+        db_session.get(Variant, 1).inventory_qty = 1
+        db_session.commit()
+
+        items = [{"product_id": 1, "variant_id": 1, "quantity": 1}]
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 400
+
+    def test_expired_hold_frees_stock(self, client, db_session):
+        """Test that stock from an expired hold can be reserved again."""
+        from datetime import datetime, timedelta
+        from app.models.inventory import InventoryHold
+
+        seed_products_for_cart(db_session)
+        db_session.get(Variant, 1).inventory_qty = 1
+        db_session.commit()
+
+        items = [{"product_id": 1, "variant_id": 1, "quantity": 1}]
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+
+        hold = db_session.query(InventoryHold).one()
+        hold.expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db_session.commit()
+
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+        db_session.expire_all()
+        statuses = sorted(h.status.value for h in db_session.query(InventoryHold).all())
+        assert statuses == ["active", "expired"]
+        assert db_session.get(Variant, 1).reserved_qty == 1
+
+    def test_concurrent_reservation_loses_cleanly(self, db_session):
+        """Test that the conditional UPDATE rejects a hold the stock can't cover."""
+        from app.models.order import Order
+        from app.services import inventory
+
+        seed_products_for_cart(db_session)
+        order = Order(total=1299, customer_email="test@example.com")
+        db_session.add(order)
+        db_session.flush()
+
+        inventory.reserve_order(db_session, order.id, [(1, 20)])
+        with pytest.raises(inventory.InsufficientStock) as exc_info:
+            inventory.reserve_order(db_session, order.id, [(2, 1), (1, 6)])
+        assert exc_info.value.available == 5
+
+    def test_convert_and_release_return_reserved_stock(self, db_session):
+        """Test that converting or releasing holds clears the reserved count once."""
+        from app.models.order import Order
+        from app.services import inventory
+
+        seed_products_for_cart(db_session)
+        paid, cancelled = Order(total=1, customer_email="a@example.com"), Order(total=1, customer_email="b@example.com")
+        db_session.add_all([paid, cancelled])
+        db_session.flush()
+
+        inventory.reserve_order(db_session, paid.id, [(1, 2)])
+        inventory.reserve_order(db_session, cancelled.id, [(1, 3)])
+
+        assert inventory.convert_order_holds(db_session, paid.id) == 1
+        assert inventory.release_order_holds(db_session, cancelled.id) == 1
+        assert inventory.release_order_holds(db_session, cancelled.id) == 0
+        db_session.commit()
+
+        assert db_session.get(Variant, 1).reserved_qty == 0
+
+
 class TestCheckoutSession:
     """Tests for checkout session creation."""
 
@@ -184,6 +490,48 @@ class TestOrderRetrieval:
         response = client.get("/api/v1/orders/99999")
         assert response.status_code == 404
 
+    def test_repeated_polls_are_cached(self, client, db_session, count_queries):
+        """Test that polling an order only reads the database once."""
+        seed_products_for_cart(db_session)
+        order_id = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 2}]),
+        ).json()["order_id"]
+
+        count_queries.clear()
+        first = client.get(f"/api/v1/orders/{order_id}")
+        reads = len(count_queries)
+        second = client.get(f"/api/v1/orders/{order_id}")
+
+        assert first.status_code == 200
+        assert first.json()["items"][0]["variant_sku"] == "KDS-SM"
+        assert second.json() == first.json()
+        assert len(count_queries) == reads
+
+    def test_expiry_sweep_refreshes_cache(self, client, db_session):
+        """Test that an order cancelled by the sweep isn't served stale."""
+        from datetime import datetime, timedelta
+        from app.services import order_expiry
+
+        seed_products_for_cart(db_session)
+        order_id = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}]),
+        ).json()["order_id"]
+        assert client.get(f"/api/v1/orders/{order_id}").json()["status"] == "pending"
+
+        order_expiry.expire_pending_orders(db_session, older_than=datetime.utcnow() + timedelta(minutes=1))
+        assert client.get(f"/api/v1/orders/{order_id}").json()["status"] == "cancelled"
+
+    def test_read_racing_an_update_is_not_cached(self, db_session):
+        """Test that a response read before an invalidation isn't stored after it."""
+        from app.services import order_cache
+
+        generation = order_cache.generation()
+        order_cache.invalidate(1)
+        assert order_cache.put(1, b"{}", generation) is False
+        assert order_cache.get(1) is None
+
 
 class TestShippingCalculation:
     """Tests for shipping calculation logic."""
@@ -219,3 +567,456 @@ class TestShippingCalculation:
 
         # Subtotal should be below free shipping threshold
         assert data["subtotal"] < 2500
+
+
+class TestCheckoutShipping:
+    """Tests for server-side shipping quotes at checkout."""
+
+    @pytest.fixture
+    def tcg_calls(self, monkeypatch):
+        """Count quote requests that reach TCG."""
+        from app.services import tcg
+
+        calls = []
+        get_shipping_quotes = tcg.get_shipping_quotes
+
+        async def counting(destination, parcels):
+            calls.append((destination.province, len(parcels)))
+            return await get_shipping_quotes(destination, parcels)
+
+        monkeypatch.setattr(tcg, "get_shipping_quotes", counting)
+        return calls
+
+    def test_client_shipping_cost_is_ignored(self, client, db_session):
+        """Test that checkout charges the quoted price, not the client's figure."""
+        from app.models.order import Order
+
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        payload.update(shipping_service="express", shipping_cost=0)
+
+        response = client.post("/api/v1/checkout/payfast", json=payload)
+        assert response.status_code == 200
+
+        # Gauteng express R150 + R50 surcharge for one 15kg small parcel
+        assert float(response.json()["total"]) == 1299 + 200
+        order = db_session.query(Order).one()
+        assert float(order.shipping_cost) == 200
+        assert order.shipping_service == "express"
+
+    def test_free_standard_shipping_over_threshold(self, client, db_session):
+        """Test that standard shipping is free once the subtotal reaches the threshold."""
+        seed_products_for_cart(db_session)
+        response = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 2, "variant_id": 2, "quantity": 2}]),
+        )
+        assert response.status_code == 200
+        assert float(response.json()["total"]) == 3798
+
+    def test_unknown_shipping_service(self, client, db_session):
+        """Test that a service TCG didn't quote is rejected."""
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        payload["shipping_service"] = "teleport"
+
+        response = client.post("/api/v1/checkout/payfast", json=payload)
+        assert response.status_code == 400
+        assert "teleport" in response.json()["detail"]
+
+    def test_cart_quote_is_reused(self, client, db_session, tcg_calls):
+        """Test that checkout reuses the quote fetched from the cart page."""
+        from app.services import shipping_quotes
+
+        seed_products_for_cart(db_session)
+        parcel = shipping_quotes.get_parcel_for_variant("KDS-SM")
+        response = client.post(
+            "/api/v1/shipping/quote",
+            json={
+                "destination": checkout_payload([])["shipping_address"],
+                "parcels": [{"length": parcel.length, "width": parcel.width,
+                             "height": parcel.height, "weight": parcel.weight}],
+            },
+        )
+        assert response.status_code == 200
+
+        items = [{"product_id": 1, "variant_id": 1, "quantity": 1}]
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+        assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+        assert tcg_calls == [("Gauteng", 1)]
+
+    async def test_quotes_are_cached_per_postal_code(self, monkeypatch):
+        """Test that addresses in one province but different postal codes are quoted separately."""
+        from decimal import Decimal
+        from app.services import shipping_quotes, tcg
+
+        async def quote_by_postal_code(destination, parcels):
+            surcharge = Decimal("120.00") if destination.postal_code == "0950" else Decimal("0.00")
+            return [tcg.ShippingQuote("standard", "Standard", Decimal("95.00") + surcharge, 3, None)]
+
+        monkeypatch.setattr(tcg, "get_shipping_quotes", quote_by_postal_code)
+        parcels = [shipping_quotes.get_parcel_for_variant("KDS-SM")]
+        centurion = tcg.Address("1 Main Road", "Centurion", "Pretoria", "Gauteng", "0157")
+        outlying = tcg.Address("5 Farm Road", "Bronkhorstspruit", "Bronkhorstspruit", "Gauteng", "0950")
+        same_area = tcg.Address("9 Other Road", " centurion ", "PRETORIA", "Gauteng", "0157")
+
+        assert (await shipping_quotes.get_quotes(centurion, parcels))[0].price == Decimal("95.00")
+        assert (await shipping_quotes.get_quotes(outlying, parcels))[0].price == Decimal("215.00")
+        assert shipping_quotes.cache_key(same_area, parcels) == shipping_quotes.cache_key(centurion, parcels)
+
+
+class TestOrderCreation:
+    """Tests for the bulk order creation path."""
+
+    def test_checkout_stores_order_items(self, client, db_session):
+        """Test that checkout writes one item per merged cart line at the current price."""
+        from app.models.order import Order, OrderStatus
+
+        seed_products_for_cart(db_session)
+        response = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([
+                {"product_id": 1, "variant_id": 1, "quantity": 1},
+                {"product_id": 2, "variant_id": 2, "quantity": 2},
+                {"product_id": 1, "variant_id": 1, "quantity": 1},
+            ]),
+        )
+        assert response.status_code == 200
+
+        order = db_session.get(Order, response.json()["order_id"])
+        assert order.status == OrderStatus.PENDING
+        assert order.created_at is not None
+        assert sorted((i.variant_id, i.quantity, float(i.price)) for i in order.items) == [
+            (1, 2, 1299.0),
+            (2, 2, 1899.0),
+        ]
+
+    def test_checkout_stores_structured_address(self, client, db_session):
+        """Test that checkout fills the ship_* columns from the shipping address."""
+        from app.models.order import Order
+
+        seed_products_for_cart(db_session)
+        response = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}]),
+        )
+        assert response.status_code == 200
+
+        order = db_session.get(Order, response.json()["order_id"])
+        assert order.ship_city == "Pretoria"
+        assert order.ship_province == "Gauteng"
+        assert order.ship_line1 == "1 Main Road"
+        assert order.ship_postal_code == "0157"
+
+    def test_create_order_uses_two_statements(self, db_session):
+        """Test that an order's size doesn't change how many statements create it."""
+        from decimal import Decimal
+        from sqlalchemy import event
+        from app.models.order import Order
+        from app.services import orders
+        from .conftest import engine
+
+        seed_products_for_cart(db_session)
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        items = [orders.NewOrderItem(1, 1, 1, Decimal("1299.00"))] * 100
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            order_id = orders.create_order(db_session, items, customer_email="trade@example.com", total=129900)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        db_session.commit()
+
+        assert len(statements) == 2
+        assert len(db_session.get(Order, order_id).items) == 100
+
+
+class TestCheckoutIdempotency:
+    """Tests for Idempotency-Key handling on checkout."""
+
+    def test_retry_with_same_key_replays_order(self, client, db_session):
+        """Test that a retried checkout returns the first order instead of a new one."""
+        from app.models.order import Order
+
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        headers = {"Idempotency-Key": "checkout-abc"}
+
+        first = client.post("/api/v1/checkout/payfast", json=payload, headers=headers)
+        second = client.post("/api/v1/checkout/payfast", json=payload, headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.headers["idempotent-replayed"] == "true"
+        assert second.json()["order_id"] == first.json()["order_id"]
+        assert db_session.query(Order).count() == 1
+
+    def test_key_reused_with_different_body(self, client, db_session):
+        """Test that reusing a key for a different cart is rejected."""
+        seed_products_for_cart(db_session)
+        headers = {"Idempotency-Key": "checkout-abc"}
+
+        client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}]),
+            headers=headers,
+        )
+        response = client.post(
+            "/api/v1/checkout/payfast",
+            json=checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 2}]),
+            headers=headers,
+        )
+        assert response.status_code == 422
+
+    def test_failed_request_releases_key(self, client, db_session):
+        """Test that a retry after a failed request runs again."""
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 3, "quantity": 1}])  # Out of stock
+        headers = {"Idempotency-Key": "checkout-abc"}
+
+        assert client.post("/api/v1/checkout/payfast", json=payload, headers=headers).status_code == 400
+
+        db_session.get(Variant, 3).inventory_qty = 1
+        db_session.commit()
+        assert client.post("/api/v1/checkout/payfast", json=payload, headers=headers).status_code == 200
+
+    def test_failure_after_commit_is_replayed(self, client, db_session, monkeypatch):
+        """Test that a request that committed its order then failed isn't run again."""
+        from fastapi import HTTPException
+        from app.models.order import Order
+        from app.services import payfast
+
+        def unavailable(**kwargs):
+            raise HTTPException(status_code=502, detail="Payfast unavailable")
+
+        monkeypatch.setattr(payfast, "build_payment_form_data", unavailable)
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        headers = {"Idempotency-Key": "checkout-abc"}
+
+        first = client.post("/api/v1/checkout/payfast", json=payload, headers=headers)
+        second = client.post("/api/v1/checkout/payfast", json=payload, headers=headers)
+
+        assert first.status_code == 502
+        assert second.status_code == 502
+        assert second.headers["idempotent-replayed"] == "true"
+        assert second.json()["detail"] == "Payfast unavailable"
+        assert db_session.query(Order).count() == 1
+
+    def test_in_flight_key_conflicts(self, client, db_session):
+        """Test that a retry while the original is still running gets 409."""
+        from app.schemas.cart import PayfastCheckoutRequest
+        from app.services import idempotency
+
+        seed_products_for_cart(db_session)
+        payload = checkout_payload([{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        request_fingerprint = idempotency.fingerprint(PayfastCheckoutRequest(**payload))
+        idempotency.claim(db_session, "checkout.payfast", "checkout-abc", request_fingerprint)
+
+        response = client.post(
+            "/api/v1/checkout/payfast", json=payload, headers={"Idempotency-Key": "checkout-abc"}
+        )
+        assert response.status_code == 409
+
+    def test_late_response_does_not_overwrite_taken_over_claim(self, db_session):
+        """Test that a request whose claim was taken over can't store or release the new claim."""
+        from datetime import datetime, timedelta
+        from app.models.idempotency import IdempotencyKey
+        from app.services import idempotency
+
+        stale, _ = idempotency.claim(db_session, "checkout.payfast", "checkout-abc", "x")
+        db_session.get(IdempotencyKey, stale.id).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        claimed, stored = idempotency.claim(db_session, "checkout.payfast", "checkout-abc", "x")
+        assert stored is None
+
+        stale = idempotency.Claim(stale.id, datetime.utcnow() - timedelta(seconds=1))
+        assert idempotency.store_response(db_session, stale, 200, {"order_id": 1}) is False
+        idempotency.release(db_session, stale)
+        assert idempotency.store_response(db_session, claimed, 200, {"order_id": 2}) is True
+
+        _, stored = idempotency.claim(db_session, "checkout.payfast", "checkout-abc", "x")
+        assert stored.body == {"order_id": 2}
+
+    def test_purge_expired_keys(self, db_session):
+        """Test that expired keys are swept and live ones kept."""
+        from datetime import datetime, timedelta
+        from app.models.idempotency import IdempotencyKey
+        from app.services import idempotency
+
+        now = datetime.utcnow()
+        db_session.add_all([
+            IdempotencyKey(scope="checkout.payfast", key="old", fingerprint="x", expires_at=now - timedelta(hours=1)),
+            IdempotencyKey(scope="checkout.payfast", key="new", fingerprint="x", expires_at=now + timedelta(hours=1)),
+        ])
+        db_session.commit()
+
+        assert idempotency.purge_expired(db_session) == 1
+        assert [k.key for k in db_session.query(IdempotencyKey).all()] == ["new"]
+
+
+class TestPendingOrderExpiry:
+    """Tests for the abandoned pending-order sweep."""
+
+    def seed_orders(self, client, db_session, count):
+        """Check out count single-item orders and age them past the TTL."""
+        from datetime import datetime, timedelta
+        from app.models.order import Order
+
+        seed_products_for_cart(db_session)
+        items = [{"product_id": 1, "variant_id": 1, "quantity": 1}]
+        for _ in range(count):
+            assert client.post("/api/v1/checkout/payfast", json=checkout_payload(items)).status_code == 200
+
+        db_session.query(Order).update({Order.created_at: datetime.utcnow() - timedelta(days=2)})
+        db_session.commit()
+
+    def test_expires_stale_orders_and_releases_holds(self, client, db_session):
+        """Test that stale pending orders are cancelled and their stock returned."""
+        from app.models.order import Order, OrderStatus
+        from app.services import order_expiry
+
+        self.seed_orders(client, db_session, 3)
+        paid = db_session.query(Order).order_by(Order.id).first()
+        paid.status = OrderStatus.PAID
+        db_session.commit()
+
+        assert order_expiry.expire_pending_orders(db_session) == 2
+
+        db_session.expire_all()
+        orders = db_session.query(Order).order_by(Order.id).all()
+        assert [o.status for o in orders] == [OrderStatus.PAID, OrderStatus.CANCELLED, OrderStatus.CANCELLED]
+        assert orders[1].cancel_reason == "expired"
+        # Only the paid order's hold is still active
+        assert db_session.get(Variant, 1).reserved_qty == 1
+
+    def test_recent_orders_are_kept(self, client, db_session):
+        """Test that orders younger than the TTL aren't touched."""
+        from datetime import datetime, timedelta
+        from app.services import order_expiry
+
+        self.seed_orders(client, db_session, 1)
+
+        cutoff = datetime.utcnow() - timedelta(days=3)
+        assert order_expiry.expire_pending_orders(db_session, older_than=cutoff) == 0
+
+    def test_sweep_is_bounded(self, client, db_session):
+        """Test that one run cancels at most batch_size * max_batches orders."""
+        from app.services import order_expiry
+
+        self.seed_orders(client, db_session, 5)
+
+        assert order_expiry.expire_pending_orders(db_session, batch_size=2, max_batches=2) == 4
+        assert order_expiry.expire_pending_orders(db_session, batch_size=2, max_batches=2) == 1
+
+
+class TestServerCarts:
+    """Tests for server-side carts with cached pricing."""
+
+    def create_cart(self, client, items):
+        """Create a cart and return its token."""
+        response = client.post("/api/v1/carts", json={"items": items})
+        assert response.status_code == 201
+        return response.json()["token"]
+
+    def test_create_and_get_cart(self, client, db_session):
+        """Test that a created cart is priced and retrievable by token."""
+        seed_products_for_cart(db_session)
+
+        token = self.create_cart(client, [
+            {"product_id": 1, "variant_id": 1, "quantity": 2},
+            {"product_id": 2, "variant_id": 2, "quantity": 1},
+        ])
+
+        data = client.get(f"/api/v1/carts/{token}").json()
+        assert data["valid"] is True
+        assert [i["variant_id"] for i in data["items"]] == [1, 2]
+        assert float(data["subtotal"]) == 1299.00 * 2 + 1899.00
+
+    def test_unknown_cart_returns_404(self, client, db_session):
+        """Test that an unknown token is a 404."""
+        assert client.get("/api/v1/carts/nope").status_code == 404
+
+    def test_unchanged_cart_skips_catalog(self, client, db_session, count_queries):
+        """Test that reading a cart on an unchanged catalog only re-reads stock."""
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [
+            {"product_id": 1, "variant_id": 1, "quantity": 1},
+            {"product_id": 2, "variant_id": 2, "quantity": 1},
+        ])
+
+        count_queries.clear()
+        assert client.get(f"/api/v1/carts/{token}").status_code == 200
+        assert not any("FROM products" in statement for statement in count_queries)
+        assert len(count_queries) == 3  # Cart, catalog version and stock
+
+    def test_stock_change_is_seen_without_catalog_change(self, client, db_session):
+        """Test that stock sold by other checkouts shows up on the next read."""
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [{"product_id": 1, "variant_id": 1, "quantity": 2}])
+
+        db_session.get(Variant, 1).reserved_qty = 24
+        db_session.commit()
+
+        data = client.get(f"/api/v1/carts/{token}").json()
+        assert data["valid"] is False
+        assert data["items"][0]["available_qty"] == 1
+        assert data["catalog_version"] == 0
+
+    def test_read_keeps_cart_from_being_purged(self, client, db_session):
+        """Test that reading an old cart refreshes updated_at."""
+        from datetime import datetime, timedelta
+        from app.models.cart import Cart
+        from app.services import carts
+
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [{"product_id": 1, "variant_id": 1, "quantity": 1}])
+        db_session.query(Cart).update({Cart.updated_at: datetime.utcnow() - timedelta(days=60)})
+        db_session.commit()
+
+        assert client.get(f"/api/v1/carts/{token}").status_code == 200
+        db_session.expire_all()
+        assert carts.purge_stale(db_session) == 0
+
+    def test_catalog_change_reprices_cart(self, client, db_session):
+        """Test that a catalog version bump re-prices cached lines."""
+        from app.services import catalog
+
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [{"product_id": 1, "variant_id": 1, "quantity": 1}])
+
+        db_session.get(Variant, 1).price = 999.00
+        catalog.bump_catalog_version(db_session)
+        db_session.commit()
+
+        data = client.get(f"/api/v1/carts/{token}").json()
+        assert float(data["items"][0]["price"]) == 999.00
+        assert data["catalog_version"] == 1
+
+    def test_set_and_remove_lines(self, client, db_session):
+        """Test adding, changing and removing a cart line."""
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [{"product_id": 1, "variant_id": 1, "quantity": 1}])
+
+        data = client.put(f"/api/v1/carts/{token}/items/2", json={"product_id": 2, "quantity": 2}).json()
+        assert [(i["variant_id"], i["quantity"]) for i in data["items"]] == [(1, 1), (2, 2)]
+
+        data = client.put(f"/api/v1/carts/{token}/items/1", json={"product_id": 1, "quantity": 3}).json()
+        assert [(i["variant_id"], i["quantity"]) for i in data["items"]] == [(1, 3), (2, 2)]
+
+        data = client.delete(f"/api/v1/carts/{token}/items/1?product_id=1").json()
+        assert [(i["variant_id"], i["quantity"]) for i in data["items"]] == [(2, 2)]
+        assert float(data["subtotal"]) == 1899.00 * 2
+
+    def test_missing_variant_is_reported(self, client, db_session):
+        """Test that a line for an unknown variant is an error, not an item."""
+        seed_products_for_cart(db_session)
+        token = self.create_cart(client, [{"product_id": 999, "variant_id": 999, "quantity": 1}])
+
+        data = client.get(f"/api/v1/carts/{token}").json()
+        assert data["valid"] is False
+        assert data["items"] == []
+        assert data["errors"]
@@ -1,6 +1,6 @@
 """Tests for collection endpoints."""
 import pytest
-from app.models.product import Product, Variant, collection_product
+from app.models.product import Product, Variant, ProductImage, collection_product
 from app.models.collection import Collection, PromoBlock
 
 
@@ -133,6 +133,73 @@ class TestCollectionList:
         assert "hero_copy" in collection
 
 
+class TestCollectionListAggregates:
+    """Tests for the collection index with counts and previews."""
+
+    def _seed_images(self, db_session):
+        db_session.add_all([
+            ProductImage(product_id=1, url="/images/small-2.jpg", sort_order=1),
+            ProductImage(product_id=1, url="/images/small-1.jpg", sort_order=0),
+            ProductImage(product_id=2, url="/images/medium-1.jpg", sort_order=0),
+        ])
+        db_session.commit()
+
+    def test_list_collections_with_counts(self, client, db_session):
+        """Test product counts and price ranges per collection."""
+        seed_test_collections(db_session)
+
+        response = client.get("/api/v1/collections?with=counts")
+        assert response.status_code == 200
+        collections = {c["slug"]: c for c in response.json()["collections"]}
+
+        assert collections["fire-pits"]["product_count"] == 2
+        assert float(collections["fire-pits"]["price_min"]) == 1299.00
+        assert float(collections["fire-pits"]["price_max"]) == 1899.00
+        assert collections["best-sellers"]["product_count"] == 1
+        assert collections["fire-pits"]["preview_images"] is None
+
+    def test_list_collections_with_preview(self, client, db_session):
+        """Test preview images use each product's first image."""
+        seed_test_collections(db_session)
+        self._seed_images(db_session)
+
+        response = client.get("/api/v1/collections?with=counts,preview")
+        assert response.status_code == 200
+        collections = {c["slug"]: c for c in response.json()["collections"]}
+
+        assert collections["fire-pits"]["preview_images"] == ["/images/small-1.jpg", "/images/medium-1.jpg"]
+        assert collections["best-sellers"]["preview_images"] == ["/images/medium-1.jpg"]
+        assert collections["fire-pits"]["product_count"] == 2
+
+    def test_list_collections_preview_limit(self, client, db_session):
+        """Test that preview_limit caps preview images per collection."""
+        seed_test_collections(db_session)
+        self._seed_images(db_session)
+
+        response = client.get("/api/v1/collections?with=preview&preview_limit=1")
+        assert response.status_code == 200
+        collections = {c["slug"]: c for c in response.json()["collections"]}
+        assert collections["fire-pits"]["preview_images"] == ["/images/small-1.jpg"]
+        assert response.json()["total"] == 2
+
+    def test_list_collections_empty_collection_aggregates(self, client, db_session):
+        """Test aggregates for a collection with no products."""
+        db_session.add(Collection(id=1, slug="empty", title="Empty"))
+        db_session.commit()
+
+        response = client.get("/api/v1/collections?with=counts,preview")
+        assert response.status_code == 200
+        collection = response.json()["collections"][0]
+        assert collection["product_count"] == 0
+        assert collection["price_min"] is None
+        assert collection["preview_images"] == []
+
+    def test_list_collections_unknown_include(self, client, db_session):
+        """Test that unknown 'with' values are rejected."""
+        response = client.get("/api/v1/collections?with=products")
+        assert response.status_code == 400
+
+
 class TestCollectionDetail:
     """Tests for collection detail endpoint."""
 
@@ -135,3 +135,137 @@ class TestDesignTemplatesList:
         assert "category" in template
         assert "thumbnail" in template
         assert "svg_path" in template
+
+
+class TestDesignTemplatesCaching:
+    """Tests for the cached design template catalog."""
+
+    def test_list_templates_sets_cache_headers(self, client, db_session):
+        """Test that the template list has an ETag and a long Cache-Control."""
+        seed_design_templates(db_session)
+
+        response = client.get("/api/v1/design-templates")
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert "max-age=" in response.headers["cache-control"]
+
+    def test_stale_while_revalidate_is_configurable(self, client, db_session, monkeypatch):
+        """Test that stale-while-revalidate comes from settings."""
+        from app.core.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "design_templates_stale_while_revalidate", 600)
+        seed_design_templates(db_session)
+
+        response = client.get("/api/v1/design-templates")
+        assert "stale-while-revalidate=600" in response.headers["cache-control"]
+
+    def test_list_templates_not_modified(self, client, db_session):
+        """Test that a matching If-None-Match returns 304."""
+        seed_design_templates(db_session)
+
+        etag = client.get("/api/v1/design-templates").headers["etag"]
+        response = client.get("/api/v1/design-templates", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    def test_category_has_distinct_etag(self, client, db_session):
+        """Test that filtered lists don't share the unfiltered ETag."""
+        seed_design_templates(db_session)
+
+        all_etag = client.get("/api/v1/design-templates").headers["etag"]
+        response = client.get(
+            "/api/v1/design-templates?category=wildlife",
+            headers={"If-None-Match": all_etag},
+        )
+        assert response.status_code == 200
+        assert len(response.json()["templates"]) == 2
+
+    def test_list_templates_served_from_snapshot(self, client, db_session):
+        """Test that repeated requests don't re-read the database until invalidated."""
+        from app.services import template_catalog
+
+        seed_design_templates(db_session)
+        assert client.get("/api/v1/design-templates").json()["total"] == 5
+
+        db_session.add(DesignTemplate(id=6, name="Aloe", category=DesignCategory.NATURE))
+        db_session.commit()
+        assert client.get("/api/v1/design-templates").json()["total"] == 5
+
+        template_catalog.invalidate()
+        assert client.get("/api/v1/design-templates").json()["total"] == 6
+
+
+def fake_rasterize(svg, size):
+    """Stand-in for cairosvg: a blank PNG of the requested size."""
+    import io
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGBA", (size, size), (0, 0, 0, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestDesignTemplatePreviews:
+    """Tests for pre-rendered template previews."""
+
+    @pytest.fixture
+    def template_files(self, tmp_path, monkeypatch):
+        """Point the preview job at a temporary public/ directory."""
+        from app.core.config import get_settings
+
+        svg_dir = tmp_path / "public" / "templates"
+        svg_dir.mkdir(parents=True)
+        (svg_dir / "elephant.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+        monkeypatch.setattr(get_settings(), "design_templates_public_dir", str(tmp_path / "public"))
+        return svg_dir
+
+    @pytest.fixture
+    def storage(self, tmp_path):
+        """Storage service writing to a temporary directory."""
+        from app.services.storage import StorageService
+
+        service = StorageService()
+        service._local_storage_path = str(tmp_path / "uploads")
+        return service
+
+    async def test_render_previews_for_changed_templates(self, client, db_session, template_files, storage):
+        """Test that each available SVG is rendered once per size and format."""
+        from app.services import template_catalog, template_previews
+
+        seed_design_templates(db_session)
+
+        rendered = await template_previews.render_template_previews(db_session, storage, fake_rasterize)
+        assert rendered == 1  # Only elephant.svg exists on disk
+
+        # Unchanged SVGs are skipped on the next run
+        assert await template_previews.render_template_previews(db_session, storage, fake_rasterize) == 0
+
+        template_catalog.invalidate()
+        data = client.get("/api/v1/design-templates?category=wildlife").json()
+        elephant = next(t for t in data["templates"] if t["name"] == "Elephant")
+        lion = next(t for t in data["templates"] if t["name"] == "Lion")
+
+        sizes = {(p["size"], p["format"]) for p in elephant["previews"]}
+        assert sizes == {(s, f) for s in template_previews.PREVIEW_SIZES for f in template_previews.PREVIEW_FORMATS}
+        assert lion["previews"] is None
+
+    async def test_changed_svg_is_rerendered(self, db_session, template_files, storage):
+        """Test that editing a template SVG produces new content-addressed URLs."""
+        from app.services import template_previews
+
+        seed_design_templates(db_session)
+        await template_previews.render_template_previews(db_session, storage, fake_rasterize)
+        old_urls = {p["url"] for p in db_session.get(DesignTemplate, 1).previews}
+
+        (template_files / "elephant.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg"><circle r="1"/></svg>')
+        assert await template_previews.render_template_previews(db_session, storage, fake_rasterize) == 1
+
+        new_urls = {p["url"] for p in db_session.get(DesignTemplate, 1).previews}
+        assert old_urls.isdisjoint(new_urls)
+
+    def test_default_public_dir_is_the_web_app(self):
+        """Test that without an override, SVGs load from apps/web/public."""
+        from app.services import template_previews
+
+        assert template_previews.public_dir().name == "public"
+        assert template_previews.load_svg("/images/templates/lion.svg") is not None
@@ -0,0 +1,172 @@
+"""Tests for the background job queue."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_settings
+from app.models.job import Job, JobStatus
+from app.services import jobs
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Register test handlers; returns the payloads they were called with."""
+    calls = []
+
+    async def ok(db, job, payload):
+        calls.append(payload)
+
+    async def flaky(db, job, payload):
+        calls.append(payload)
+        raise ConnectionError("storage unavailable")
+
+    async def broken(db, job, payload):
+        calls.append(payload)
+        raise jobs.PermanentError("bad payload")
+
+    monkeypatch.setitem(jobs.HANDLERS, "ok", ok)
+    monkeypatch.setitem(jobs.HANDLERS, "flaky", flaky)
+    monkeypatch.setitem(jobs.HANDLERS, "broken", broken)
+    return calls
+
+
+def queue(db, kind, payload=None):
+    job = jobs.enqueue(db, kind, payload or {})
+    db.commit()
+    return job
+
+
+def run_pending(db):
+    """Run due jobs as the worker would, each in its own session."""
+    return asyncio.run(jobs.run_pending(sessionmaker(bind=db.get_bind())))
+
+
+class TestJobQueue:
+    """Tests for queueing, claiming and retrying jobs."""
+
+    def test_runs_due_jobs(self, db_session, calls):
+        job = queue(db_session, "ok", {"n": 1})
+        queue(db_session, "ok", {"n": 2})
+
+        assert run_pending(db_session) == 2
+        assert calls == [{"n": 1}, {"n": 2}]
+        db_session.refresh(job)
+        assert job.status == JobStatus.DONE
+        assert job.attempts == 1
+
+    def test_delayed_job_waits(self, db_session, calls):
+        jobs.enqueue(db_session, "ok", {}, delay=60)
+        db_session.commit()
+        assert run_pending(db_session) == 0
+
+    def test_failure_is_retried_with_backoff(self, db_session, calls):
+        settings = get_settings()
+        job = queue(db_session, "flaky")
+
+        assert run_pending(db_session) == 1  # Not due again straight away
+        db_session.refresh(job)
+        assert job.status == JobStatus.QUEUED
+        assert job.last_error == "ConnectionError: storage unavailable"
+        delay = (job.run_at - datetime.utcnow()).total_seconds()
+        assert settings.job_retry_base_seconds / 2 - 1 < delay <= settings.job_retry_base_seconds
+
+        for _ in range(settings.job_max_attempts - 1):
+            job.run_at = datetime.utcnow()
+            db_session.commit()
+            run_pending(db_session)
+            db_session.refresh(job)
+
+        assert job.status == JobStatus.FAILED
+        assert job.attempts == settings.job_max_attempts
+        assert len(calls) == settings.job_max_attempts
+
+    def test_retry_delay_doubles_up_to_max(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "job_retry_base_seconds", 10.0)
+        monkeypatch.setattr(settings, "job_retry_max_seconds", 60.0)
+        assert 5 <= jobs.retry_delay(1) <= 10
+        assert 20 <= jobs.retry_delay(3) <= 40
+        assert 30 <= jobs.retry_delay(10) <= 60
+
+    def test_permanent_error_is_not_retried(self, db_session, calls):
+        job = queue(db_session, "broken")
+        run_pending(db_session)
+        db_session.refresh(job)
+        assert job.status == JobStatus.FAILED
+        assert job.attempts == 1
+
+    def test_unknown_kind_fails(self, db_session):
+        job = queue(db_session, "no-such-kind")
+        run_pending(db_session)
+        db_session.refresh(job)
+        assert job.status == JobStatus.FAILED
+        assert "No handler" in job.last_error
+
+    def test_abandoned_job_is_claimed_again(self, db_session, calls):
+        """Test that a job whose worker died is run again once its lease runs out."""
+        job = queue(db_session, "ok")
+        assert jobs.claim(db_session).id == job.id
+        assert jobs.claim(db_session) is None  # Leased
+
+        job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        assert run_pending(db_session) == 1
+        db_session.refresh(job)
+        assert job.status == JobStatus.DONE
+        assert job.attempts == 2
+
+    def test_run_now_leaves_a_claimed_job_to_its_worker(self, db_session, calls):
+        """Test that an inline run and a worker can't both run the same job."""
+        job = queue(db_session, "ok")
+        assert jobs.claim(db_session).id == job.id  # A worker got there first
+
+        assert asyncio.run(jobs.run_now(db_session, job)) is False
+        assert calls == []
+        db_session.refresh(job)
+        assert job.attempts == 1
+
+        other = queue(db_session, "ok", {"n": 2})
+        assert asyncio.run(jobs.run_now(db_session, other)) is True
+        assert calls == [{"n": 2}]
+        assert run_pending(db_session) == 0
+
+    def test_purge_finished(self, db_session, calls):
+        old = queue(db_session, "ok")
+        recent = queue(db_session, "ok")
+        waiting = queue(db_session, "ok")
+        waiting.run_at = datetime.utcnow() + timedelta(hours=1)
+        db_session.commit()
+        run_pending(db_session)
+        old.finished_at = datetime.utcnow() - timedelta(days=get_settings().job_retention_days + 1)
+        db_session.commit()
+
+        assert jobs.purge_finished(db_session) == 1
+        db_session.commit()
+        assert {j.id for j in db_session.query(Job)} == {recent.id, waiting.id}
+
+
+    def test_app_runs_a_worker(self, monkeypatch):
+        """Test that the API starts a job worker and stops it on shutdown."""
+        from fastapi.testclient import TestClient
+        from app import main
+
+        started = []
+
+        async def work(session_factory, stop):
+            started.append(session_factory)
+            await stop.wait()
+
+        async def idle(*args):
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(get_settings(), "background_jobs_enabled", True)
+        monkeypatch.setattr(jobs, "work", work)
+        monkeypatch.setattr(main, "_render_template_previews", idle)
+        monkeypatch.setattr(main.scheduler, "run_periodically", idle)
+        monkeypatch.setattr(main.order_events.broker, "run", idle, raising=False)
+
+        with TestClient(main.app):
+            pass
+        assert started == [main.SessionLocal]
@@ -0,0 +1,180 @@
+"""Tests for order status event streams."""
+import asyncio
+import json
+import threading
+import time
+
+from app.models.order import Order, OrderStatus
+from app.services import order_events
+
+ADMIN_HEADERS = {"X-Admin-API-Key": "koosdoos-admin-secret-key-change-in-production"}
+
+
+def parse_events(body: str) -> list[dict]:
+    """Decode the data of each SSE event in a response body."""
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def wait_for_subscribers(count: int, timeout: float = 5.0) -> None:
+    """Block until the broker has at least count subscribers."""
+    deadline = time.monotonic() + timeout
+    while order_events.broker.subscriber_count() < count:
+        assert time.monotonic() < deadline, "stream never subscribed"
+        time.sleep(0.01)
+
+
+class TestLocalBroker:
+    """Tests for in-process publish/subscribe."""
+
+    def test_subscriber_gets_only_its_order(self):
+        """Test that order subscriptions are filtered and the firehose sees everything."""
+        broker = order_events.LocalBroker()
+
+        async def run():
+            async with broker.subscribe(1) as one, broker.subscribe() as everything:
+                # Publish from another thread, as the expiry sweep does
+                publisher = threading.Thread(target=lambda: [
+                    broker.publish(order_events.OrderEvent(2, "paid")),
+                    broker.publish(order_events.OrderEvent(1, "paid")),
+                ])
+                publisher.start()
+                publisher.join()
+
+                first = await asyncio.wait_for(one.queue.get(), 1)
+                seen = [await asyncio.wait_for(everything.queue.get(), 1) for _ in range(2)]
+                return first, seen, one.queue.empty()
+
+        first, seen, nothing_else = asyncio.run(run())
+        assert first.order_id == 1
+        assert [e.order_id for e in seen] == [2, 1]
+        assert nothing_else
+        assert broker.subscriber_count() == 0
+
+    def test_slow_subscriber_is_dropped(self):
+        """Test that a subscriber that stops reading is disconnected, not buffered forever."""
+        broker = order_events.LocalBroker()
+
+        async def run():
+            async with broker.subscribe() as subscription:
+                for i in range(order_events.SUBSCRIBER_QUEUE_SIZE + 1):
+                    broker.publish(order_events.OrderEvent(i, "pending"))
+                await asyncio.sleep(0)  # Let the deliveries run
+                return await subscription.queue.get(), broker.subscriber_count()
+
+        end_marker, subscribers = asyncio.run(run())
+        assert end_marker is None
+        assert subscribers == 0
+
+
+class TestPollingBroker:
+    """Tests for picking up changes made by other workers."""
+
+    def test_poll_publishes_changes_once(self, db_session):
+        """Test that a change is delivered once whether published locally or found by polling."""
+        broker = order_events.PollingBroker()
+        order = Order(customer_email="poll@example.com", total=100, status=OrderStatus.PENDING)
+        db_session.add(order)
+        db_session.commit()
+
+        async def run():
+            async with broker.subscribe() as subscription:
+                assert broker.poll_once(db_session) == 1  # Created by "another worker"
+                broker.publish(order_events.OrderEvent.from_order(order))  # Already seen
+                order.status = OrderStatus.PAID
+                db_session.commit()
+                assert broker.poll_once(db_session) == 1
+                assert broker.poll_once(db_session) == 0
+                await asyncio.sleep(0)
+                events = []
+                while not subscription.queue.empty():
+                    events.append(subscription.queue.get_nowait())
+                return events
+
+        assert [e.status for e in asyncio.run(run())] == ["pending", "paid"]
+
+
+class TestOrderEventStream:
+    """Tests for GET /orders/{order_id}/events and the admin firehose."""
+
+    def create_order(self, db_session, status=OrderStatus.PENDING):
+        order = Order(customer_email="sse@example.com", total=100, status=status)
+        db_session.add(order)
+        db_session.commit()
+        return order.id
+
+    def test_unknown_order(self, client, db_session):
+        """Test 404 for an order that doesn't exist."""
+        assert client.get("/api/v1/orders/99999/events").status_code == 404
+
+    def test_final_order_sends_state_and_ends(self, client, db_session):
+        """Test that a finished order's stream sends its state and closes."""
+        order_id = self.create_order(db_session, OrderStatus.CANCELLED)
+
+        response = client.get(f"/api/v1/orders/{order_id}/events")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [e["status"] for e in parse_events(response.text)] == ["cancelled"]
+
+    def test_expired_order_stream_stays_open_for_late_payment(self, client, db_session):
+        """Test that an order cancelled by the expiry sweep isn't treated as final."""
+        order = Order(
+            customer_email="sse@example.com", total=100, status=OrderStatus.CANCELLED, cancel_reason="expired"
+        )
+        db_session.add(order)
+        db_session.commit()
+        order_id = order.id
+        results = {}
+
+        def listen():
+            results["order"] = client.get(f"/api/v1/orders/{order_id}/events").text
+
+        order_stream = threading.Thread(target=listen)
+        order_stream.start()
+        wait_for_subscribers(1)
+
+        order_events.publish(order_events.OrderEvent(order_id, OrderStatus.PAID.value))
+        order_events.publish(order_events.OrderEvent(order_id, OrderStatus.DELIVERED.value))
+        order_stream.join(timeout=5)
+
+        assert not order_stream.is_alive()
+        assert [e["status"] for e in parse_events(results["order"])] == ["cancelled", "paid", "delivered"]
+
+    def test_stream_follows_status_changes(self, client, db_session):
+        """Test that admin status changes reach an open order stream and the firehose."""
+        order_id = self.create_order(db_session)
+        results = {}
+
+        def listen(name, url, headers=None):
+            results[name] = client.get(url, headers=headers).text
+
+        order_stream = threading.Thread(target=listen, args=("order", f"/api/v1/orders/{order_id}/events"))
+        order_stream.start()
+        wait_for_subscribers(1)
+
+        async def firehose():
+            async with order_events.broker.subscribe() as subscription:
+                for status in ("paid", "cancelled"):
+                    response = await asyncio.to_thread(
+                        client.put,
+                        f"/api/v1/admin/orders/{order_id}/status",
+                        json={"status": status},
+                        headers=ADMIN_HEADERS,
+                    )
+                    assert response.status_code == 200
+                return [await asyncio.wait_for(subscription.queue.get(), 5) for _ in range(2)]
+
+        firehose_events = asyncio.run(firehose())
+        order_stream.join(timeout=5)
+
+        assert not order_stream.is_alive()
+        assert [e["status"] for e in parse_events(results["order"])] == ["pending", "paid", "cancelled"]
+        assert [(e.order_id, e.status) for e in firehose_events] == [(order_id, "paid"), (order_id, "cancelled")]
+
+    def test_firehose_requires_admin_key(self, client, db_session):
+        """Test that the admin stream is protected."""
+        response = client.get("/api/v1/admin/orders/events", headers={"X-Admin-API-Key": "wrong"})
+        assert response.status_code == 401
@@ -0,0 +1,55 @@
+"""Tests for shipping endpoints."""
+import json
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, Variant
+
+
+def seed_paid_order(db_session):
+    """Helper to seed a paid order with a shipping address."""
+    db_session.add(Product(id=1, slug="koosdoos-medium", title="KoosDoos Medium"))
+    db_session.add(Variant(id=1, product_id=1, sku="KDS-MD", price=1899.00, inventory_qty=10))
+    order = Order(
+        status=OrderStatus.PAID,
+        customer_email="test@example.com",
+        customer_name="Test Customer",
+        total=1899.00,
+        shipping_address=json.dumps({
+            "line1": "1 Main Road",
+            "suburb": "Centurion",
+            "city": "Pretoria",
+            "province": "Gauteng",
+            "postal_code": "0157",
+            "country": "ZA",
+        }),
+    )
+    order.items.append(OrderItem(product_id=1, variant_id=1, quantity=1, price=1899.00))
+    db_session.add(order)
+    db_session.commit()
+    return order
+
+
+class TestCreateShipmentIdempotency:
+    """Tests for Idempotency-Key handling on shipment creation."""
+
+    def test_retry_with_same_key_replays_waybill(self, client, db_session):
+        """Test that a retried request returns the first waybill without rebooking."""
+        order = seed_paid_order(db_session)
+        body = {"order_id": order.id, "service_type": "standard"}
+        headers = {"Idempotency-Key": "ship-1"}
+
+        first = client.post("/api/v1/shipping/create", json=body, headers=headers)
+        second = client.post("/api/v1/shipping/create", json=body, headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.headers["idempotent-replayed"] == "true"
+        assert second.json()["waybill"] == first.json()["waybill"]
+
+    def test_repeat_without_key_is_rejected(self, client, db_session):
+        """Test that without a key the existing waybill check still applies."""
+        order = seed_paid_order(db_session)
+        body = {"order_id": order.id, "service_type": "standard"}
+
+        assert client.post("/api/v1/shipping/create", json=body).status_code == 200
+        assert client.post("/api/v1/shipping/create", json=body).status_code == 400
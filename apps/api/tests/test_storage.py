@@ -0,0 +1,206 @@
+"""Tests for the S3 storage service, against moto's S3 stand-in."""
+import asyncio
+import io
+import threading
+
+import pytest
+
+from app.core.config import get_settings
+from app.main import app
+from app.routers.uploads import get_storage_service
+from app.services.storage import StorageService, get_storage
+
+BUCKET = "koosdoos-test"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """A StorageService pointed at an in-process mock S3 bucket."""
+    moto = pytest.importorskip("moto")
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "s3_bucket", BUCKET)
+    monkeypatch.setattr(settings, "s3_access_key", "testing")
+    monkeypatch.setattr(settings, "s3_secret_key", "testing")
+    monkeypatch.setattr(settings, "s3_endpoint_url", "")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with moto.mock_aws():
+        service = StorageService()
+        service.client.create_bucket(Bucket=BUCKET)
+        yield service
+
+
+def get_object(service, key):
+    return service.client.get_object(Bucket=BUCKET, Key=key)
+
+
+def design_keys(sha, ext=".png", sizes=(200, 400)):
+    """Keys of a stored design and its WebP and JPEG thumbnails."""
+    base = f"designs/sha256/{sha[:2]}/{sha}"
+    return {f"{base}{ext}"} | {f"{base}_thumb_{size}.{fmt}" for size in sizes for fmt in ("webp", "jpg")}
+
+
+class TestStorageService:
+    """Tests for S3 uploads."""
+
+    def test_shared_instance(self):
+        """Test that the app uses one storage service, and so one client."""
+        assert get_storage() is get_storage()
+        assert get_storage_service() is get_storage()
+
+    def test_client_pool_config(self, s3):
+        assert s3.client.meta.config.max_pool_connections == get_settings().s3_max_pool_connections
+
+    def test_upload_file_streams_handle(self, s3):
+        """Test that a file handle is uploaded under the given key with its content type."""
+        data = b"0\nSECTION\n" * 1000
+        result = asyncio.run(s3.upload_file(
+            io.BytesIO(data), "design.dxf", "application/dxf", file_key="designs/sha256/ab/abc.dxf"
+        ))
+
+        assert result["storage_type"] == "s3"
+        assert result["storage_key"] == "designs/sha256/ab/abc.dxf"
+        assert result["file_url"] == f"https://{BUCKET}.s3.amazonaws.com/designs/sha256/ab/abc.dxf"
+        stored = get_object(s3, "designs/sha256/ab/abc.dxf")
+        assert stored["Body"].read() == data
+        assert stored["ContentType"] == "application/dxf"
+
+    def test_put_object_is_immutable(self, s3):
+        url = asyncio.run(s3.put_object(b"<webp>", "template-previews/abc/96.webp", "image/webp"))
+        assert url.endswith("template-previews/abc/96.webp")
+        assert get_object(s3, "template-previews/abc/96.webp")["CacheControl"] == "public, max-age=31536000, immutable"
+
+    def test_delete_file(self, s3):
+        asyncio.run(s3.put_object(b"x", "designs/x.png", "image/png"))
+        assert asyncio.run(s3.delete_file("designs/x.png"))
+        assert s3.client.list_objects_v2(Bucket=BUCKET).get("KeyCount") == 0
+
+    def test_calls_run_off_the_event_loop(self, s3, monkeypatch):
+        """Test that boto3 is called from a worker thread, not the event loop's."""
+        threads = []
+        put = s3._put_s3
+
+        def recording_put(*args):
+            threads.append(threading.current_thread())
+            return put(*args)
+
+        monkeypatch.setattr(s3, "_put_s3", recording_put)
+
+        async def run():
+            await s3.put_object(b"png", "designs/a_thumb_200.png", "image/png")
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(run())
+        assert threads and threads[0] is not loop_thread
+
+    def test_upload_design_stores_original_and_thumbnail(self, client, db_session, s3, monkeypatch):
+        """Test that a design upload puts both the file and its thumbnail in the bucket."""
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 600), "orange").save(buffer, format="PNG")
+
+        from app.services import design_uploads
+
+        app.dependency_overrides[get_storage_service] = lambda: s3
+        monkeypatch.setattr(design_uploads, "get_storage", lambda: s3)
+        monkeypatch.setattr(get_settings(), "thumbnail_formats", ["webp", "png"])
+        try:
+            response = client.post(
+                "/api/v1/uploads/design",
+                files={"file": ("pit.png", buffer.getvalue(), "image/png")},
+            )
+        finally:
+            app.dependency_overrides.pop(get_storage_service, None)
+        assert response.status_code == 200
+        body = response.json()
+
+        sha = body["sha256"]
+        keys = {obj["Key"] for obj in s3.client.list_objects_v2(Bucket=BUCKET)["Contents"]}
+        assert keys == design_keys(sha)  # 800px skipped: larger than the 600px image
+        assert body["thumbnail_url"].endswith(f"{sha}_thumb_200.jpg")  # Opaque, so JPEG fallback
+        assert [(t["size"], t["format"]) for t in body["thumbnails"]] == [
+            (200, "webp"), (200, "jpeg"), (400, "webp"), (400, "jpeg"),
+        ]
+        assert get_object(s3, f"designs/sha256/{sha[:2]}/{sha}_thumb_400.webp")["ContentType"] == "image/webp"
+
+
+class TestPresignedUploads:
+    """Tests for design files uploaded straight to S3."""
+
+    @pytest.fixture
+    def api(self, client, s3, monkeypatch):
+        from app.services import design_uploads
+
+        app.dependency_overrides[get_storage_service] = lambda: s3
+        monkeypatch.setattr(design_uploads, "get_storage", lambda: s3)
+        monkeypatch.setattr(get_settings(), "thumbnail_formats", ["webp", "png"])
+        yield client
+        app.dependency_overrides.pop(get_storage_service, None)
+
+    def upload(self, api, name, data):
+        """Presign, PUT the file to the URL, and complete the upload."""
+        import requests
+
+        response = api.post("/api/v1/uploads/design/presign", json={"file_name": name, "file_size": len(data)})
+        assert response.status_code == 200
+        presigned = response.json()
+        assert presigned["method"] == "PUT"
+        put = requests.put(presigned["upload_url"], data=data, headers=presigned["headers"])
+        assert put.status_code == 200
+        return api.post(f"/api/v1/uploads/design/{presigned['file_id']}/complete")
+
+    def test_upload_is_processed_after_completion(self, api, db_session, s3):
+        """Test that a completed upload is validated, thumbnailed and moved to its content key."""
+        from PIL import Image
+        from app.models.upload import DesignUpload, DesignUploadStatus
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 600), "orange").save(buffer, format="PNG")
+
+        response = self.upload(api, "pit.png", buffer.getvalue())
+        assert response.status_code == 202
+        assert response.json()["status"] == "ready"  # Processed inline in tests
+
+        record = db_session.query(DesignUpload).one()
+        assert record.status == DesignUploadStatus.READY
+        sha = record.blob.sha256
+        assert record.blob.is_valid
+        assert record.blob.thumbnail_url.endswith(f"{sha}_thumb_200.jpg")
+        keys = {obj["Key"] for obj in s3.client.list_objects_v2(Bucket=BUCKET)["Contents"]}
+        assert keys == design_keys(sha)
+        assert get_object(s3, f"designs/sha256/{sha[:2]}/{sha}.png")["ContentType"] == "image/png"
+
+        # Completing again doesn't process it again
+        again = api.post(f"/api/v1/uploads/design/{record.file_id}/complete")
+        assert again.json()["status"] == "ready"
+        assert again.json()["upload"]["sha256"] == sha
+
+    def test_content_must_match_extension(self, api, db_session, s3):
+        from app.models.upload import DesignUpload, DesignUploadStatus
+
+        self.upload(api, "design.png", b"<html><script>alert(1)</script></html>")
+
+        record = db_session.query(DesignUpload).one()
+        assert record.status == DesignUploadStatus.FAILED
+        assert record.error == "File content does not match its '.png' extension"
+        assert s3.client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+
+    def test_complete_before_upload(self, api):
+        presigned = api.post("/api/v1/uploads/design/presign", json={"file_name": "a.dxf", "file_size": 100}).json()
+        response = api.post(f"/api/v1/uploads/design/{presigned['file_id']}/complete")
+        assert response.status_code == 409
+
+    def test_presign_checks_type_and_size(self, api):
+        response = api.post("/api/v1/uploads/design/presign", json={"file_name": "a.exe", "file_size": 100})
+        assert response.status_code == 400
+        response = api.post(
+            "/api/v1/uploads/design/presign",
+            json={"file_name": "a.png", "file_size": get_settings().upload_max_bytes + 1},
+        )
+        assert response.status_code == 413
+
+    def test_presign_needs_s3(self, client):
+        response = client.post("/api/v1/uploads/design/presign", json={"file_name": "a.png", "file_size": 100})
+        assert response.status_code == 503
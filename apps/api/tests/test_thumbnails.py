@@ -0,0 +1,105 @@
+"""Tests for responsive upload thumbnails."""
+import io
+
+import pytest
+
+from app.services import thumbnails
+from app.services.storage import StorageService
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageCms  # noqa: E402
+
+SIZES = [200, 400, 800]
+FORMATS = ["webp", "png"]
+
+ORIENTATION = 0x0112
+GPS_IFD = 0x8825
+
+
+def encode(image, fmt, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **params)
+    return buffer.getvalue()
+
+
+def decode(content: bytes):
+    image = Image.open(io.BytesIO(content))
+    image.load()
+    return image
+
+
+class TestRender:
+    """Tests for rendering thumbnails."""
+
+    def test_every_size_and_format(self):
+        logo = encode(Image.new("RGBA", (1600, 800), (255, 0, 0, 128)), "PNG")
+        rendered = thumbnails.render(logo, SIZES, FORMATS)
+
+        assert list(rendered) == [(800, "webp"), (800, "png"), (400, "webp"), (400, "png"), (200, "webp"), (200, "png")]
+        assert decode(rendered[800, "png"]).size == (800, 400)
+        assert decode(rendered[200, "webp"]).size == (200, 100)
+        # Transparency kept, so the fallback stays PNG
+        assert decode(rendered[400, "png"]).mode == "RGBA"
+
+    def test_opaque_fallback_is_jpeg(self):
+        photo = encode(Image.new("RGB", (1000, 1000), "orange"), "PNG")
+        rendered = thumbnails.render(photo, [200], FORMATS)
+        assert list(rendered) == [(200, "webp"), (200, "jpeg")]
+        assert decode(rendered[200, "jpeg"]).format == "JPEG"
+
+    def test_no_upscaling(self):
+        """Test that sizes above the image's own are skipped, except the smallest."""
+        rendered = thumbnails.render(encode(Image.new("RGB", (300, 300)), "PNG"), SIZES, ["webp"])
+        assert list(rendered) == [(200, "webp")]
+
+        rendered = thumbnails.render(encode(Image.new("RGB", (120, 60)), "PNG"), SIZES, ["webp"])
+        assert list(rendered) == [(200, "webp")]
+        assert decode(rendered[200, "webp"]).size == (120, 60)
+
+    def test_photo_orientation_applied_and_metadata_stripped(self):
+        """Test that EXIF rotation is applied to the pixels and EXIF, GPS and ICC are dropped."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6  # Rotated 90 degrees clockwise
+        exif.get_ifd(GPS_IFD)[2] = (33.0, 55.0, 0.0)
+        icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+        photo = encode(Image.new("RGB", (1200, 800), "green"), "JPEG", exif=exif.tobytes(), icc_profile=icc)
+
+        rendered = thumbnails.render(photo, SIZES, FORMATS)
+
+        assert decode(rendered[800, "jpeg"]).size == (533, 800)  # Portrait
+        for content in rendered.values():
+            image = decode(content)
+            assert not image.getexif()
+            assert "icc_profile" not in image.info
+            assert "exif" not in image.info
+
+    def test_large_jpeg_decoded_in_draft_mode(self, monkeypatch):
+        """Test that a large JPEG is decoded at a reduced scale, not at full size."""
+        from PIL import JpegImagePlugin
+
+        decoded = []
+        draft = JpegImagePlugin.JpegImageFile.draft
+
+        def recording_draft(self, mode, size):
+            result = draft(self, mode, size)
+            decoded.append(self.size)
+            return result
+
+        monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+        photo = encode(Image.new("RGB", (4000, 3000), "blue"), "JPEG")
+
+        rendered = thumbnails.render(photo, SIZES, ["webp"])
+
+        assert decoded == [(2000, 1500)]  # 1/2 scale: still twice the 800px thumbnail
+        assert decode(rendered[800, "webp"]).size == (800, 600)
+
+    def test_supported_formats(self):
+        supported = thumbnails.supported_formats(["avif", "webp", "gif", "png"])
+        assert supported[-2:] == ["webp", "png"]
+        assert "gif" not in supported
+
+
+def test_thumbnail_key():
+    storage = StorageService()
+    assert storage.thumbnail_key("designs/sha256/ab/abc.png", 400, "webp") == "designs/sha256/ab/abc_thumb_400.webp"
+    assert storage.thumbnail_key("designs/sha256/ab/abc.png", 200, "jpeg") == "designs/sha256/ab/abc_thumb_200.jpg"
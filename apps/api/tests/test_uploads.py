@@ -0,0 +1,375 @@
+"""Tests for design file uploads."""
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from app.main import app
+from app.routers.uploads import get_storage_service
+from app.services import upload_spool
+from app.services.dxf_validator import DXFValidator
+
+DXF = (
+    "  0\nSECTION\n  2\nHEADER\n  0\nENDSEC\n"
+    "  0\nSECTION\n  2\nENTITIES\n"
+    "  0\nLINE\n  8\n0\n 10\n0.0\n 20\n0.0\n 11\n100.0\n 21\n50.0\n"
+    "  0\nENDSEC\n  0\nEOF\n"
+).encode()
+
+
+def png_bytes(size=(600, 600)) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "orange").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def chunked(data: bytes, size: int, consumed: list):
+    for start in range(0, len(data), size):
+        consumed.append(start)
+        yield data[start:start + size]
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Store uploads in a temporary directory."""
+    from app.services import design_uploads
+    from app.services.storage import StorageService
+
+    service = StorageService()
+    service._local_storage_path = str(tmp_path / "uploads")
+    app.dependency_overrides[get_storage_service] = lambda: service
+    monkeypatch.setattr(design_uploads, "get_storage", lambda: service)
+    yield service
+    app.dependency_overrides.pop(get_storage_service, None)
+
+
+class TestUploadSpool:
+    """Tests for copying uploads into a spooled file."""
+
+    def test_hashes_sizes_and_sniffs(self):
+        """Test that size, SHA-256 and type are worked out while copying."""
+        data = png_bytes()
+        upload = asyncio.run(upload_spool.spool(chunked(data, 1000, []), max_size=len(data)))
+
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        assert upload.detected_type == "image/png"
+        assert upload.rewind().read() == data
+        upload.close()
+
+    def test_stops_reading_at_the_limit(self):
+        """Test that an oversized stream is rejected without reading the rest."""
+        consumed = []
+        with pytest.raises(upload_spool.UploadTooLarge):
+            asyncio.run(upload_spool.spool(chunked(b"x" * 10000, 1000, consumed), max_size=2500))
+        assert len(consumed) == 3
+
+    @pytest.mark.parametrize("head, expected", [
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+        (b'\xef\xbb\xbf<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg">', "image/svg+xml"),
+        (DXF, "application/dxf"),
+        (b"999\nmade by hand\n  0\nSECTION\n", "application/dxf"),
+        (b"<html><body>not a design</body></html>", None),
+        (b"MZ\x90\x00", None),
+    ])
+    def test_sniff_type(self, head, expected):
+        assert upload_spool.sniff_type(head) == expected
+
+
+class TestValidators:
+    """Tests for validating from file handles."""
+
+    def test_dxf_validated_from_handle(self):
+        """Test that a DXF is validated from a handle and the handle stays usable."""
+        handle = io.BytesIO(DXF)
+        result = asyncio.run(DXFValidator().validate(handle, "design.dxf"))
+
+        assert result["is_valid"], result["errors"]
+        assert result["entity_count"] == 1
+        assert not handle.closed
+
+    def test_dxf_missing_entities(self):
+        result = asyncio.run(DXFValidator().validate(io.BytesIO(b"  0\nSECTION\n  2\nHEADER\n  0\nENDSEC\n  0\nEOF\n"), "a.dxf"))
+        assert "DXF file must contain ENTITIES section for laser cutting" in result["errors"]
+
+
+class TestUploadDesign:
+    """Tests for POST /uploads/design."""
+
+    def test_upload_png(self, client, storage):
+        """Test that a PNG is stored with its hash and a thumbnail."""
+        data = png_bytes()
+        response = client.post(
+            "/api/v1/uploads/design",
+            files={"file": ("pit.png", data, "application/octet-stream")},
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["is_valid"]
+        assert body["file_type"] == "image/png"  # Sniffed, not the client's type
+        assert body["file_size"] == len(data)
+        assert body["sha256"] == hashlib.sha256(data).hexdigest()
+        assert body["thumbnail_url"]
+
+    def test_duplicate_upload_reuses_stored_file(self, client, db_session, storage, monkeypatch):
+        """Test that re-uploading the same content skips validation, thumbnailing and storage."""
+        from app.models.upload import UploadBlob
+        from app.services import upload_blobs, validation_pool
+
+        tasks = []
+        run = validation_pool.run
+
+        async def counting_run(fn, *args, **kwargs):
+            tasks.append(fn.__name__)
+            return await run(fn, *args, **kwargs)
+
+        monkeypatch.setattr(validation_pool, "run", counting_run)
+        data = png_bytes()
+
+        def upload(name):
+            response = client.post("/api/v1/uploads/design", files={"file": (name, data, "image/png")})
+            assert response.status_code == 200
+            return response.json()
+
+        first = upload("logo.png")
+        assert tasks == ["_check_image", "render"]
+
+        second = upload("logo-v2.png")
+        assert tasks == ["_check_image", "render"]  # Nothing re-run
+        for field in ("file_url", "thumbnail_url", "sha256", "is_valid", "validation_errors"):
+            assert second[field] == first[field]
+        assert second["file_name"] == "logo-v2.png"
+        assert f"sha256_{first['sha256'][:2]}_{first['sha256']}" in first["file_url"]
+        assert db_session.query(UploadBlob).one().upload_count == 2
+
+        # New validation rules check the file again on its next upload
+        monkeypatch.setattr(upload_blobs, "VALIDATION_VERSION", upload_blobs.VALIDATION_VERSION + 1)
+        third = upload("logo.png")
+        assert len(tasks) == 4
+        assert third["file_url"] == first["file_url"]
+        db_session.expire_all()
+        assert db_session.query(UploadBlob).one().validation_version == upload_blobs.VALIDATION_VERSION
+
+    def test_duplicate_upload_gets_its_own_file_id(self, client, db_session, storage):
+        """Test that re-uploaded content doesn't expose the first upload's record."""
+        data = png_bytes()
+        first = client.post("/api/v1/uploads/design", files={"file": ("alice.png", data, "image/png")}).json()
+        second = client.post("/api/v1/uploads/design", files={"file": ("bob.png", data, "image/png")}).json()
+
+        assert second["file_id"] != first["file_id"]
+        status = client.get(f"/api/v1/uploads/{second['file_id']}/status").json()
+        assert status["status"] == "ready"
+        assert status["file_name"] == "bob.png"
+        assert status["upload"]["file_id"] == second["file_id"]
+        assert status["upload"]["file_url"] == first["file_url"]
+
+    def test_content_must_match_extension(self, client, storage):
+        """Test that a file renamed to an allowed extension is refused."""
+        response = client.post(
+            "/api/v1/uploads/design",
+            files={"file": ("design.png", b"<html><script>alert(1)</script></html>", "image/png")},
+        )
+        assert response.status_code == 400
+        assert "does not match" in response.json()["detail"]
+
+    def test_file_over_limit(self, client, storage, monkeypatch):
+        """Test that a file over the limit is refused while it is copied."""
+        from app.routers import uploads
+
+        monkeypatch.setattr(uploads, "MAX_FILE_SIZE", 1000)
+        response = client.post(
+            "/api/v1/uploads/design",
+            files={"file": ("pit.png", png_bytes(), "image/png")},
+        )
+        assert response.status_code == 413
+
+    def test_request_body_over_limit(self, client, storage):
+        """Test that an oversized body is refused from its Content-Length."""
+        from app.core.config import get_settings
+
+        response = client.post(
+            "/api/v1/uploads/design",
+            content=b"x",
+            headers={
+                "Content-Type": "multipart/form-data; boundary=x",
+                "Content-Length": str(get_settings().upload_max_bytes * 2),
+            },
+        )
+        assert response.status_code == 413
+
+    def test_oversized_body_refusal_has_cors_headers(self, client, storage):
+        """Test that the 413 carries CORS headers so browsers can read it."""
+        from app.core.config import get_settings
+
+        origin = get_settings().cors_origins[0]
+        response = client.post(
+            "/api/v1/uploads/design",
+            content=b"x",
+            headers={
+                "Origin": origin,
+                "Content-Type": "multipart/form-data; boundary=x",
+                "Content-Length": str(get_settings().upload_max_bytes * 2),
+            },
+        )
+        assert response.status_code == 413
+        assert response.headers["access-control-allow-origin"] == origin
+
+    def test_validate_dxf(self, client):
+        response = client.post(
+            "/api/v1/uploads/design/validate-dxf",
+            files={"file": ("design.dxf", DXF, "application/dxf")},
+        )
+        assert response.status_code == 200
+        assert response.json()["is_valid"]
+
+
+class TestBodySizeLimitMiddleware:
+    """Tests for refusing bodies while they stream in."""
+
+    def test_streamed_body_is_cut_off(self):
+        """Test that a body without Content-Length is refused once it passes the limit."""
+        from fastapi import FastAPI, Request
+        from fastapi.testclient import TestClient
+        from app.core.middleware import BodySizeLimitMiddleware
+
+        limited = FastAPI()
+        limited.add_middleware(BodySizeLimitMiddleware, path_prefix="/upload", max_bytes=100)
+        chunks_read = []  # Every chunk the endpoint received, from both requests
+
+        @limited.post("/upload")
+        async def upload(request: Request):
+            async for chunk in request.stream():
+                chunks_read.append(chunk)
+            return {"ok": True}
+
+        def body():
+            for _ in range(10):
+                yield b"x" * 60
+
+        with TestClient(limited) as test_client:
+            assert test_client.post("/upload", content=body()).status_code == 413
+            assert test_client.post("/upload", content=b"x" * 50).status_code == 200
+        # Only the small body was read in full
+        assert sum(len(chunk) for chunk in chunks_read) < 100 + 50
+
+
+class TestQueuedUploads:
+    """Tests for design uploads processed by the job worker."""
+
+    def test_upload_returns_before_processing(self, client, db_session, storage, monkeypatch):
+        from sqlalchemy.orm import sessionmaker
+        from app.core.config import get_settings
+        from app.models.upload import DesignUpload
+        from app.services import jobs
+
+        monkeypatch.setattr(get_settings(), "upload_jobs_inline", False)
+        data = png_bytes()
+
+        response = client.post("/api/v1/uploads/design", files={"file": ("logo.png", data, "image/png")})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "uploaded"
+        assert body["file_url"] is None
+        assert body["is_valid"] is None
+        file_id = body["file_id"]
+
+        status = client.get(f"/api/v1/uploads/{file_id}/status").json()
+        assert status["status"] == "uploaded"
+        assert status["upload"] is None
+
+        assert asyncio.run(jobs.run_pending(sessionmaker(bind=db_session.get_bind()))) == 1  # As the worker would
+        status = client.get(f"/api/v1/uploads/{file_id}/status").json()
+        assert status["status"] == "ready"
+        assert status["upload"]["file_id"] == file_id
+        assert status["upload"]["is_valid"] is True
+        assert status["upload"]["thumbnail_url"]
+
+        # The staged copy is gone once processed
+        record = db_session.query(DesignUpload).one()
+        db_session.refresh(record)
+        assert not storage._delete(record.storage_key, record.storage_type)
+
+    def test_status_of_unknown_upload(self, client):
+        assert client.get("/api/v1/uploads/nope/status").status_code == 404
+
+
+class TestValidationPool:
+    """Tests for running validation in worker processes."""
+
+    @pytest.fixture
+    def worker_pool(self, monkeypatch):
+        """A one-worker process pool in place of the inline test pool."""
+        from app.services import validation_pool
+
+        worker_pool = validation_pool.ValidationPool(workers=1, timeout=1.0)
+        monkeypatch.setattr(validation_pool, "pool", worker_pool)
+        yield worker_pool
+        worker_pool.shutdown()
+
+    def test_runs_in_another_process(self, worker_pool):
+        import os
+
+        assert asyncio.run(worker_pool.run(os.getpid)) != os.getpid()
+
+    def test_validators_use_the_pool(self, worker_pool):
+        """Test that DXF validation gives the same result from a worker."""
+        result = asyncio.run(DXFValidator().validate(io.BytesIO(DXF), "design.dxf"))
+        assert result["is_valid"], result["errors"]
+        assert result["entity_count"] == 1
+
+    def test_slow_task_times_out_and_frees_the_worker(self, worker_pool):
+        """Test that a task past its deadline is interrupted and the worker reused."""
+        import os
+        import time
+        from app.services import validation_pool
+
+        async def run():
+            started = time.monotonic()
+            with pytest.raises(validation_pool.ValidationTimeout):
+                await worker_pool.run(time.sleep, 30)
+            elapsed = time.monotonic() - started
+            return elapsed, await worker_pool.run(os.getpid)
+
+        elapsed, pid = asyncio.run(run())
+        assert elapsed < validation_pool.DEADLINE_GRACE_SECONDS
+        assert pid != os.getpid()
+
+    def test_upload_is_loaded_once_a_slot_is_free(self, worker_pool):
+        """Test that a waiting task doesn't read its input until it has a slot."""
+        import time
+        from app.services import validation_pool
+
+        loaded = []
+
+        async def run():
+            await worker_pool.start()
+            busy = [
+                asyncio.create_task(worker_pool.run(time.sleep, 0.3))
+                for _ in range(validation_pool.MAX_PENDING_PER_WORKER)
+            ]
+            await asyncio.sleep(0.1)
+            waiting = asyncio.create_task(worker_pool.run(len, load=lambda: loaded.append(True) or b"abc"))
+            await asyncio.sleep(0.1)
+            assert loaded == []
+            await asyncio.gather(*busy)
+            return await waiting
+
+        assert asyncio.run(run()) == 3
+        assert loaded == [True]
+
+    def test_dead_worker_is_replaced(self, worker_pool):
+        """Test that the pool recovers after a worker process is killed."""
+        import os
+        import signal
+
+        async def run():
+            pid = await worker_pool.run(os.getpid)
+            os.kill(pid, signal.SIGKILL)
+            return pid, await worker_pool.run(os.getpid), await worker_pool.run(os.getpid)
+
+        dead, first, second = asyncio.run(run())
+        assert first != dead
+        assert second == first
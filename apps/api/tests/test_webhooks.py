@@ -0,0 +1,184 @@
+"""Tests for webhook endpoints."""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, Variant
+from app.services import inventory, payfast
+
+
+def seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,)):
+    """Helper to seed one variant and a pending order per quantity."""
+    db_session.add(Product(id=1, slug="koosdoos-small", title="KoosDoos Small"))
+    db_session.add(Variant(id=1, product_id=1, sku="KDS-SM", price=1299.00, inventory_qty=inventory_qty))
+    db_session.commit()
+
+    orders = []
+    for quantity in order_quantities:
+        order = Order(status=OrderStatus.PENDING, customer_email="test@example.com", total=1299 * quantity)
+        order.items.append(OrderItem(product_id=1, variant_id=1, quantity=quantity, price=1299.00))
+        db_session.add(order)
+        orders.append(order)
+    db_session.commit()
+    return orders
+
+
+def post_itn(client, order, payment_status="COMPLETE"):
+    """Post a correctly signed Payfast ITN for an order."""
+    data = {
+        "m_payment_id": str(order.id),
+        "pf_payment_id": f"pf-{order.id}",
+        "payment_status": payment_status,
+        "amount_gross": f"{order.total:.2f}",
+    }
+    data["signature"] = payfast.generate_signature(data)
+    return client.post("/api/v1/webhooks/payfast", data=data)
+
+
+class TestPayfastComplete:
+    """Tests for the Payfast COMPLETE ITN."""
+
+    def test_complete_marks_paid_and_decrements_stock(self, client, db_session):
+        """Test that a COMPLETE ITN pays the order and takes its stock."""
+        order, = seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,))
+
+        response = post_itn(client, order)
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        assert db_session.get(Order, order.id).status == OrderStatus.PAID
+        assert db_session.get(Variant, 1).inventory_qty == 3
+
+    def test_repeated_complete_decrements_once(self, client, db_session):
+        """Test that Payfast retrying the ITN doesn't take stock twice."""
+        order, = seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,))
+
+        assert post_itn(client, order).status_code == 200
+        assert post_itn(client, order).status_code == 200
+
+        db_session.expire_all()
+        assert db_session.get(Variant, 1).inventory_qty == 3
+
+    def test_oversell_is_clamped_and_reported(self, client, db_session, caplog):
+        """Test that paying for more than is on hand zeroes stock and logs the shortfall."""
+        order, = seed_paid_order_data(db_session, inventory_qty=1, order_quantities=(3,))
+
+        with caplog.at_level(logging.ERROR, logger="app.routers.webhooks"):
+            assert post_itn(client, order).status_code == 200
+
+        db_session.expire_all()
+        assert db_session.get(Variant, 1).inventory_qty == 0
+        assert "short by 2" in caplog.text
+
+    def test_complete_refreshes_order_cache(self, client, db_session):
+        """Test that a polling client sees the payment as soon as the ITN is handled."""
+        order, = seed_paid_order_data(db_session)
+
+        assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == "pending"
+        assert post_itn(client, order).status_code == 200
+        assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == "paid"
+
+    def test_complete_converts_holds(self, client, db_session):
+        """Test that paying an order turns its hold into a sale."""
+        order, = seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,))
+        inventory.reserve_order(db_session, order.id, [(1, 2)])
+        db_session.commit()
+
+        assert post_itn(client, order).status_code == 200
+
+        db_session.expire_all()
+        variant = db_session.get(Variant, 1)
+        assert variant.inventory_qty == 3
+        assert variant.reserved_qty == 0
+
+    def test_expired_order_paid_late_is_a_sale(self, client, db_session):
+        """Test that a COMPLETE ITN for an order the sweep expired still pays it."""
+        order, = seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,))
+        order.status = OrderStatus.CANCELLED
+        order.cancel_reason = "expired"
+        db_session.commit()
+
+        assert post_itn(client, order).status_code == 200
+
+        db_session.expire_all()
+        paid = db_session.get(Order, order.id)
+        assert paid.status == OrderStatus.PAID
+        assert paid.cancel_reason is None
+        assert db_session.get(Variant, 1).inventory_qty == 3
+
+    def test_replayed_complete_after_admin_cancel_is_ignored(self, client, db_session):
+        """Test that replaying the ITN of a paid, then cancelled order doesn't re-pay it."""
+        order, = seed_paid_order_data(db_session, inventory_qty=5, order_quantities=(2,))
+        assert post_itn(client, order).status_code == 200
+
+        from .test_admin import ADMIN_HEADERS
+
+        response = client.put(
+            f"/api/v1/admin/orders/{order.id}/status", json={"status": "cancelled"}, headers=ADMIN_HEADERS
+        )
+        assert response.status_code == 200
+
+        assert post_itn(client, order).status_code == 200
+
+        db_session.expire_all()
+        cancelled = db_session.get(Order, order.id)
+        assert cancelled.status == OrderStatus.CANCELLED
+        assert cancelled.cancel_reason == "admin"
+        assert db_session.get(Variant, 1).inventory_qty == 3
+
+
+class TestConcurrentCompletion:
+    """Tests for parallel payment completions against one SKU."""
+
+    @pytest.fixture
+    def file_session_factory(self, tmp_path):
+        """Sessions on a file-backed SQLite database shared across threads."""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'concurrency.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        Base.metadata.create_all(bind=engine)
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        engine.dispose()
+
+    def test_parallel_completions_never_lose_updates(self, file_session_factory):
+        """Test that concurrent completions for one SKU decrement exactly once each."""
+        setup = file_session_factory()
+        orders = seed_paid_order_data(setup, inventory_qty=5, order_quantities=(1,) * 8)
+        order_ids = [order.id for order in orders]
+        setup.close()
+
+        # Every order is completed twice, as if Payfast retried each ITN
+        attempts = order_ids * 2
+        barrier = threading.Barrier(len(attempts))
+
+        def complete(order_id):
+            db = file_session_factory()
+            try:
+                barrier.wait()
+                result = inventory.complete_order(db, order_id)
+                db.commit()
+                return result
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=len(attempts)) as pool:
+            results = list(pool.map(complete, attempts))
+
+        applied = [r for r in results if r is not None]
+        assert len(applied) == len(order_ids)
+        assert sum(o.shortfall for r in applied for o in r) == 3
+
+        check = file_session_factory()
+        try:
+            assert check.get(Variant, 1).inventory_qty == 0
+            statuses = {o.status for o in check.query(Order).all()}
+            assert statuses == {OrderStatus.PAID}
+        finally:
+            check.close()
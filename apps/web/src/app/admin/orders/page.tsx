@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Link from "next/link";
 import { useSearchParams } from "next/navigation";
 import {
@@ -33,6 +33,12 @@ interface Order {
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8001/api/v1";
 
+// Order event stream: reconnect backoff, and how long to wait for a burst of
+// events about orders not on this page to settle before reloading the list
+const STREAM_RETRY_MIN_MS = 3000;
+const STREAM_RETRY_MAX_MS = 30000;
+const STREAM_REFETCH_DEBOUNCE_MS = 500;
+
 const ORDER_STATUSES = [
   { value: "", label: "All Statuses" },
   { value: "pending", label: "Pending" },
@@ -126,7 +132,7 @@ export default function OrdersPage() {
         url += `&status=${statusFilter}`;
       }
       if (search) {
-        url += `&customer_email=${encodeURIComponent(search)}`;
+        url += `&q=${encodeURIComponent(search)}`;
       }
 
       const response = await fetch(url, {
@@ -188,6 +194,87 @@ export default function OrdersPage() {
     return () => clearTimeout(timer);
   }, [search]);
 
+  // Latest list and loader for the event stream handler below
+  const ordersRef = useRef(orders);
+  ordersRef.current = orders;
+  const fetchOrdersRef = useRef(fetchOrders);
+  fetchOrdersRef.current = fetchOrders;
+
+  // Live updates: apply status changes from the admin event stream, and
+  // reload the page (debounced) when an order we aren't showing changes.
+  // EventSource can't send the admin key header, so the stream is read with
+  // fetch, and reconnecting after a drop, restart or proxy timeout is done
+  // here with backoff.
+  useEffect(() => {
+    if (!apiKey) return;
+    const controller = new AbortController();
+    let refetchTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const refetchSoon = () => {
+      clearTimeout(refetchTimer);
+      refetchTimer = setTimeout(() => fetchOrdersRef.current(), STREAM_REFETCH_DEBOUNCE_MS);
+    };
+
+    // Reads the stream until it ends. Returns false if it shouldn't be retried.
+    const follow = async (onOpen: () => void) => {
+      const response = await fetch(`${API_URL}/admin/orders/events`, {
+        headers: { "X-Admin-API-Key": apiKey },
+        signal: controller.signal,
+      });
+      if (response.status >= 400 && response.status < 500) return false;
+      if (!response.ok || !response.body) return true;
+      onOpen();
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let pending = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) return true;
+        const messages = (pending + value).split("\n\n");
+        pending = messages.pop() ?? "";
+        for (const message of messages) {
+          const data = message.split("\n").find((line) => line.startsWith("data: "));
+          if (!data) continue;
+          const event = JSON.parse(data.slice("data: ".length)) as { order_id: number; status: string };
+          if (ordersRef.current.some((o) => o.id === event.order_id)) {
+            setOrders((current) =>
+              current.map((o) => (o.id === event.order_id ? { ...o, status: event.status } : o))
+            );
+          } else {
+            refetchSoon();
+          }
+        }
+      }
+    };
+
+    const run = async () => {
+      let delay = STREAM_RETRY_MIN_MS;
+      let connected = false;
+      while (!controller.signal.aborted) {
+        let retry = true;
+        try {
+          retry = await follow(() => {
+            // Catch up on anything missed while disconnected
+            if (connected) refetchSoon();
+            connected = true;
+            delay = STREAM_RETRY_MIN_MS;
+          });
+        } catch {
+          // Network error or abort; retried below unless aborted
+        }
+        if (!retry || controller.signal.aborted) return;
+        await new Promise((resolve) => setTimeout(resolve, delay));
+        delay = Math.min(delay * 2, STREAM_RETRY_MAX_MS);
+      }
+    };
+
+    run();
+    return () => {
+      controller.abort();
+      clearTimeout(refetchTimer);
+    };
+  }, [apiKey]);
+
   const formatPrice = (cents: number) => {
     return `R${(cents / 100).toLocaleString("en-ZA", { minimumFractionDigits: 2 })}`;
   };
@@ -238,7 +325,7 @@ export default function OrdersPage() {
           <Search className="absolute left-3 top-1/2 -translate-y-1/2 h-4 w-4 text-steel-grey" />
           <input
             type="text"
-            placeholder="Search by email..."
+            placeholder="Search by order #, email, name, phone or waybill..."
             value={search}
             onChange={(e) => setSearch(e.target.value)}
             className="w-full pl-10 pr-4 py-2 bg-soot border border-smoke rounded text-white-hot placeholder:text-steel-grey focus:outline-none focus:border-ember"
@@ -17,6 +17,7 @@ import {
   GripVertical,
 } from "lucide-react";
 import { useAdminAuth } from "../../layout";
+import { uploadsApi } from "@/lib/api/uploads";
 
 interface Variant {
   id?: number;
@@ -205,42 +206,21 @@ export default function ProductEditPage({
     setError("");
 
     try {
-      const formData = new FormData();
-      formData.append("file", file);
-
-      const response = await fetch(`${API_URL}/uploads/design`, {
-        method: "POST",
-        headers: { "X-Admin-API-Key": apiKey },
-        body: formData,
-      });
-
-      if (response.ok) {
-        const data = await response.json();
-        setProduct((prev) => ({
-          ...prev,
-          images: [
-            ...prev.images,
-            {
-              url: data.file_url,
-              alt: file.name,
-              sort_order: prev.images.length,
-            },
-          ],
-        }));
-      } else {
-        // For demo, add a placeholder image
-        setProduct((prev) => ({
-          ...prev,
-          images: [
-            ...prev.images,
-            {
-              url: `/images/products/${prev.slug || "product"}-${prev.images.length + 1}.jpg`,
-              alt: file.name,
-              sort_order: prev.images.length,
-            },
-          ],
-        }));
-      }
+      // Resolves once the file is processed and file_url is set
+      const data = await uploadsApi.uploadDesign(file);
+      const url = data.file_url;
+      if (!url) throw new Error("Upload has no file URL");
+      setProduct((prev) => ({
+        ...prev,
+        images: [
+          ...prev.images,
+          {
+            url,
+            alt: file.name,
+            sort_order: prev.images.length,
+          },
+        ],
+      }));
     } catch (err) {
       // For demo, add a placeholder
       setProduct((prev) => ({
@@ -83,7 +83,13 @@ export default function CartPage() {
   );
 
   // Calculated values
-  const shippingCost = selectedShipping?.price ?? (subtotal >= FREE_SHIPPING_THRESHOLD ? 0 : 150);
+  // Display estimate only: the API quotes shipping itself at checkout, with
+  // standard shipping free from the threshold
+  const shippingService = selectedShipping?.service_type || "standard";
+  const shippingCost =
+    shippingService === "standard" && subtotal >= FREE_SHIPPING_THRESHOLD
+      ? 0
+      : selectedShipping?.price ?? 150;
   const total = subtotal + shippingCost;
   const amountToFreeShipping = FREE_SHIPPING_THRESHOLD - subtotal;
 
@@ -231,8 +237,7 @@ export default function CartPage() {
         customer_last_name: customerLastName,
         customer_phone: customerPhone || undefined,
         shipping_address: shippingAddress,
-        shipping_service: selectedShipping?.service_type || "standard",
-        shipping_cost: shippingCost,
+        shipping_service: shippingService,
       });
 
       // Submit to Payfast (this will redirect the page)
@@ -21,7 +21,7 @@ import { formatPrice } from "@/data/products";
 import { Breadcrumbs } from "@/components/layout";
 import { Button } from "@/components/ui";
 import { trackPurchase, toAnalyticsItem, AnalyticsPurchaseItem } from "@/lib/analytics";
-import { getOrder } from "@/lib/api/cart";
+import { getOrder, subscribeToOrder } from "@/lib/api/cart";
 import { getOrderTracking, type TrackingEvent } from "@/lib/api/shipping";
 import type { OrderResponse } from "@/lib/api/types";
 
@@ -127,6 +127,25 @@ function OrderConfirmationContent() {
     fetchOrder();
   }, [orderId, sessionId, orderCleared, items, subtotal, clearCart]);
 
+  // Follow payment/shipment updates (e.g. the Payfast ITN landing after the
+  // redirect) without polling
+  const loadedOrderId = order?.id;
+  useEffect(() => {
+    if (!loadedOrderId) return;
+    return subscribeToOrder(loadedOrderId, (event) => {
+      setOrder((current) =>
+        current
+          ? {
+              ...current,
+              status: event.status,
+              waybill: event.waybill,
+              tracking_url: event.tracking_url,
+            }
+          : current
+      );
+    });
+  }, [loadedOrderId]);
+
   function getEstimatedDelivery(): string {
     if (order?.shipping_service === "overnight") {
       const date = new Date();
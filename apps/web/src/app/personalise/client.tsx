@@ -128,7 +128,7 @@ export function PersonalisePageClient({
 
       // Upload the file
       setUploadStatus("uploading");
-      const response = await uploadsApi.uploadDesign(file);
+      const response = await uploadsApi.uploadDesignDirect(file);
 
       clearInterval(progressInterval);
       setUploadProgress(100);
@@ -15,6 +15,14 @@ const DEFAULT_RETRY_COUNT = 3;
 const RETRY_DELAY_MS = 1000;
 const RETRYABLE_STATUS_CODES = [408, 429, 500, 502, 503, 504];
 
+/**
+ * Absolute URL for an API endpoint
+ */
+export const apiUrl = (endpoint: string): string =>
+  endpoint.startsWith("http")
+    ? endpoint
+    : `${API_BASE_URL}${endpoint.startsWith("/") ? "" : "/"}${endpoint}`;
+
 /**
  * Custom API Error class with status code and response body
  */
@@ -37,8 +45,22 @@ interface RequestOptions extends Omit<RequestInit, "body"> {
   retries?: number;
   retryDelay?: number;
   timeout?: number;
+  /**
+   * Idempotency-Key sent with POST requests. One is generated per call if
+   * omitted, and the same key is reused for every retry of that call so the
+   * API can replay the first response instead of repeating the work.
+   */
+  idempotencyKey?: string;
 }
 
+/**
+ * Generate a random idempotency key
+ */
+export const createIdempotencyKey = (): string =>
+  typeof crypto !== "undefined" && "randomUUID" in crypto
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 /**
  * Sleep utility for retry delays
  */
@@ -72,6 +94,7 @@ async function request<T>(
     timeout = 30000,
     body,
     headers = {},
+    idempotencyKey,
     ...fetchOptions
   } = options;
 
@@ -82,12 +105,17 @@ async function request<T>(
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), timeout);
 
-  const requestHeaders: HeadersInit = {
+  const requestHeaders: Record<string, string> = {
     "Content-Type": "application/json",
     Accept: "application/json",
-    ...headers,
+    ...(headers as Record<string, string>),
   };
 
+  // Fixed before the retry loop so every attempt carries the same key
+  if (fetchOptions.method === "POST") {
+    requestHeaders["Idempotency-Key"] = idempotencyKey ?? createIdempotencyKey();
+  }
+
   const config: RequestInit = {
     ...fetchOptions,
     headers: requestHeaders,
@@ -219,6 +247,58 @@ export const api = {
   delete: <T>(endpoint: string, options?: Omit<RequestOptions, "method" | "body">) =>
     request<T>(endpoint, { ...options, method: "DELETE" }),
 
+  /**
+   * POST a raw body (e.g. a CSV file) and parse an NDJSON response,
+   * calling onRecord for each record as it arrives
+   */
+  ndjson: async <T>(
+    endpoint: string,
+    body: Blob,
+    onRecord: (record: T) => void,
+    contentType: string = "text/csv"
+  ): Promise<void> => {
+    const url = endpoint.startsWith("http")
+      ? endpoint
+      : `${API_BASE_URL}${endpoint.startsWith("/") ? "" : "/"}${endpoint}`;
+
+    const response = await fetch(url, {
+      method: "POST",
+      body,
+      headers: { "Content-Type": contentType, Accept: "application/x-ndjson" },
+    });
+
+    if (!response.ok || !response.body) {
+      let errorBody: unknown;
+      try {
+        errorBody = await response.json();
+      } catch {
+        errorBody = undefined;
+      }
+
+      const errorMessage =
+        typeof errorBody === "object" &&
+        errorBody !== null &&
+        "detail" in errorBody
+          ? String((errorBody as { detail: unknown }).detail)
+          : `HTTP ${response.status}: ${response.statusText}`;
+
+      throw new ApiError(errorMessage, response.status, errorBody);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let pending = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      const lines = (pending + value).split("\n");
+      pending = lines.pop() ?? "";
+      lines.filter(Boolean).forEach((line) => onRecord(JSON.parse(line) as T));
+    }
+    if (pending) {
+      onRecord(JSON.parse(pending) as T);
+    }
+  },
+
   /**
    * Upload a file via multipart/form-data
    */
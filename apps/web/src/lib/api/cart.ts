@@ -1,13 +1,16 @@
 /**
  * Cart & Checkout API Service
  */
-import api from "../api-client";
+import api, { apiUrl } from "../api-client";
 import type {
+  BulkValidationRecord,
   CartItemRequest,
   CartValidateResponse,
   OrderResponse,
+  OrderStatusEvent,
   PayfastCheckoutRequest,
   PayfastCheckoutResponse,
+  ServerCart,
 } from "./types";
 
 /**
@@ -19,14 +22,61 @@ export async function validateCart(
   return api.post<CartValidateResponse>("/cart/validate", { items });
 }
 
+/**
+ * Validate a trade-order CSV (sku,quantity per line, optional header).
+ * Records arrive one per row in file order, followed by a summary record.
+ */
+export async function validateBulkCart(
+  csv: Blob,
+  onRecord: (record: BulkValidationRecord) => void
+): Promise<void> {
+  return api.ndjson<BulkValidationRecord>("/cart/validate/bulk", csv, onRecord);
+}
+
+/**
+ * Create a server-side cart, optionally with initial items.
+ * Keep the returned token to read and update the cart later.
+ */
+export async function createCart(items: CartItemRequest[] = []): Promise<ServerCart> {
+  return api.post<ServerCart>("/carts", { items });
+}
+
+/**
+ * Get a server-side cart. Pricing is cached server-side and only
+ * recomputed when the catalog changes.
+ */
+export async function getCart(token: string): Promise<ServerCart> {
+  return api.get<ServerCart>(`/carts/${encodeURIComponent(token)}`);
+}
+
+/**
+ * Set a cart line's quantity (0 removes it). Only that line is re-priced.
+ */
+export async function setCartLine(
+  token: string,
+  productId: string,
+  variantId: string,
+  quantity: number
+): Promise<ServerCart> {
+  return api.put<ServerCart>(
+    `/carts/${encodeURIComponent(token)}/items/${variantId}`,
+    { product_id: productId, quantity }
+  );
+}
+
 /**
  * Create a Payfast checkout
- * Returns form data that should be submitted to Payfast
+ * Returns form data that should be submitted to Payfast.
+ * Retries reuse one Idempotency-Key, so they never create a second order;
+ * pass idempotencyKey to extend that across separate calls.
  */
 export async function createPayfastCheckout(
-  request: PayfastCheckoutRequest
+  request: PayfastCheckoutRequest,
+  idempotencyKey?: string
 ): Promise<PayfastCheckoutResponse> {
-  return api.post<PayfastCheckoutResponse>("/checkout/payfast", request);
+  return api.post<PayfastCheckoutResponse>("/checkout/payfast", request, {
+    idempotencyKey,
+  });
 }
 
 /**
@@ -36,8 +86,36 @@ export async function getOrder(orderId: string): Promise<OrderResponse> {
   return api.get<OrderResponse>(`/orders/${orderId}`);
 }
 
+/**
+ * Follow an order's status changes over Server-Sent Events.
+ * The current state is sent first; the stream closes itself once the order
+ * is final. An order cancelled because it expired stays open, since a late
+ * payment can still complete it. Returns a function that closes the stream
+ * early.
+ */
+export function subscribeToOrder(
+  orderId: string | number,
+  onEvent: (event: OrderStatusEvent) => void
+): () => void {
+  const source = new EventSource(apiUrl(`/orders/${orderId}/events`));
+  source.addEventListener("order", (message) => {
+    const event = JSON.parse((message as MessageEvent<string>).data) as OrderStatusEvent;
+    onEvent(event);
+    const expired = event.status === "cancelled" && event.cancel_reason === "expired";
+    if (["delivered", "cancelled", "refunded"].includes(event.status) && !expired) {
+      source.close();
+    }
+  });
+  return () => source.close();
+}
+
 export const cartApi = {
   validateCart,
+  validateBulkCart,
+  createCart,
+  getCart,
+  setCartLine,
   createPayfastCheckout,
   getOrder,
+  subscribeToOrder,
 };
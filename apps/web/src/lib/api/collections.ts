@@ -4,11 +4,28 @@
 import api from "../api-client";
 import type { CollectionListResponse, CollectionDetail } from "./types";
 
+export type CollectionListInclude = "counts" | "preview";
+
 /**
  * Get all collections
+ * Pass `include` to get product counts, price ranges and preview images
+ * in the same request instead of fetching each collection in full.
  */
-export async function getCollections(): Promise<CollectionListResponse> {
-  return api.get<CollectionListResponse>("/collections");
+export async function getCollections(
+  include: CollectionListInclude[] = [],
+  previewLimit?: number
+): Promise<CollectionListResponse> {
+  const params = new URLSearchParams();
+  if (include.length > 0) {
+    params.set("with", include.join(","));
+  }
+  if (previewLimit !== undefined) {
+    params.set("preview_limit", previewLimit.toString());
+  }
+  const query = params.toString();
+  return api.get<CollectionListResponse>(
+    query ? `/collections?${query}` : "/collections"
+  );
 }
 
 /**
@@ -130,16 +130,22 @@ export async function getSimpleQuote(
 
 /**
  * Create a shipment for an order
- * Should be called after successful payment
+ * Should be called after successful payment. Retries reuse one
+ * Idempotency-Key, so a retried request can't book a second collection.
  */
 export async function createShipment(
   orderId: number,
-  serviceType: string
+  serviceType: string,
+  idempotencyKey?: string
 ): Promise<Shipment> {
-  return api.post<Shipment>("/shipping/create", {
-    order_id: orderId,
-    service_type: serviceType,
-  });
+  return api.post<Shipment>(
+    "/shipping/create",
+    {
+      order_id: orderId,
+      service_type: serviceType,
+    },
+    { idempotencyKey }
+  );
 }
 
 /**
@@ -18,6 +18,8 @@ export interface Variant {
   price: number;
   compare_at_price: number | null;
   inventory_qty: number;
+  /** Stock left after holds for pending checkouts */
+  available_qty?: number;
   weight: number;
   dimensions_mm: string | null;
 }
@@ -70,6 +72,11 @@ export interface CollectionListItem {
   slug: string;
   title: string;
   hero_copy: string | null;
+  // Present only when requested with `?with=counts,preview`
+  product_count?: number | null;
+  price_min?: number | null;
+  price_max?: number | null;
+  preview_images?: string[] | null;
 }
 
 export interface CollectionDetail extends CollectionListItem {
@@ -90,12 +97,19 @@ export type DesignCategory =
   | "custom"
   | "patterns";
 
+export interface TemplatePreview {
+  size: number;
+  format: "webp" | "png";
+  url: string;
+}
+
 export interface DesignTemplate {
   id: string;
   name: string;
   category: DesignCategory;
   thumbnail: string | null;
   svg_path: string | null;
+  previews?: TemplatePreview[] | null;
 }
 
 export interface DesignTemplateListResponse {
@@ -129,6 +143,37 @@ export interface CartValidateResponse {
   errors: string[];
 }
 
+export interface BulkValidatedLine extends ValidatedCartItem {
+  type: "line";
+  line: number;
+}
+
+export interface BulkValidationError {
+  type: "error";
+  line: number;
+  sku: string;
+  error: string;
+}
+
+export interface BulkValidationSummary {
+  type: "summary";
+  valid: boolean;
+  lines: number;
+  errors: number;
+  unavailable: number;
+  subtotal: number;
+}
+
+export type BulkValidationRecord =
+  | BulkValidatedLine
+  | BulkValidationError
+  | BulkValidationSummary;
+
+export interface ServerCart extends CartValidateResponse {
+  token: string;
+  catalog_version: number;
+}
+
 export interface OrderItem {
   id: string;
   product_id: string;
@@ -155,6 +200,15 @@ export interface OrderResponse {
   items: OrderItem[];
 }
 
+/** Payload of an `order` Server-Sent Event */
+export interface OrderStatusEvent {
+  order_id: number;
+  status: string;
+  waybill: string | null;
+  tracking_url: string | null;
+  cancel_reason: string | null;
+}
+
 // Payfast Checkout Types
 export interface CheckoutShippingAddress {
   street: string;
@@ -173,7 +227,6 @@ export interface PayfastCheckoutRequest {
   customer_phone?: string;
   shipping_address: CheckoutShippingAddress;
   shipping_service?: string;
-  shipping_cost: number;
 }
 
 export interface PayfastFormField {
@@ -189,15 +242,45 @@ export interface PayfastCheckoutResponse {
 }
 
 // Upload Types
+export type UploadStatus = "pending" | "uploaded" | "processing" | "ready" | "failed";
+
 export interface UploadDesignResponse {
   file_id: string;
-  file_url: string;
+  /** Anything but "ready" means validation is still running; see waitForUpload */
+  status: UploadStatus;
+  file_url: string | null;
   thumbnail_url: string | null;
-  is_valid: boolean;
+  /** Every size and format; pick with srcset and <picture> */
+  thumbnails: UploadThumbnail[];
+  is_valid: boolean | null;
+  validation_errors: string[];
   validation_message: string | null;
   dxf_info: DXFValidationResult | null;
 }
 
+export interface UploadThumbnail {
+  /** Longest side, in pixels */
+  size: number;
+  format: "avif" | "webp" | "png" | "jpeg";
+  url: string;
+}
+
+export interface PresignUploadResponse {
+  file_id: string;
+  upload_url: string;
+  method: string;
+  headers: Record<string, string>;
+  expires_at: string;
+}
+
+export interface DesignUploadStatusResponse {
+  file_id: string;
+  file_name: string;
+  status: UploadStatus;
+  error: string | null;
+  upload: UploadDesignResponse | null;
+}
+
 export interface DXFValidationResult {
   is_valid: boolean;
   entity_count: number;
@@ -1,14 +1,89 @@
 /**
  * Uploads API Service
+ *
+ * Uploads return once the file is stored; validation and the thumbnail
+ * follow in the background. The helpers here wait for that, so they
+ * resolve with the finished upload.
  */
-import api from "../api-client";
-import type { UploadDesignResponse, DXFValidationResult } from "./types";
+import api, { ApiError } from "../api-client";
+import type {
+  UploadDesignResponse,
+  DXFValidationResult,
+  PresignUploadResponse,
+  DesignUploadStatusResponse,
+} from "./types";
+
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 120000;
 
 /**
- * Upload a custom design file (PNG, JPG, SVG, DXF)
+ * Upload a custom design file (PNG, JPG, SVG, DXF) through the API
  */
 export async function uploadDesign(file: File): Promise<UploadDesignResponse> {
-  return api.upload<UploadDesignResponse>("/uploads/design", file, "file");
+  const response = await api.upload<UploadDesignResponse>("/uploads/design", file, "file");
+  return response.status === "ready" ? response : waitForUpload(response.file_id);
+}
+
+/**
+ * Upload a custom design file straight to storage, bypassing the API.
+ * Falls back to uploadDesign when direct uploads aren't available.
+ */
+export async function uploadDesignDirect(file: File): Promise<UploadDesignResponse> {
+  let presigned: PresignUploadResponse;
+  try {
+    presigned = await api.post<PresignUploadResponse>("/uploads/design/presign", {
+      file_name: file.name,
+      file_size: file.size,
+    });
+  } catch (error) {
+    if (error instanceof ApiError && error.status === 503) {
+      return uploadDesign(file);
+    }
+    throw error;
+  }
+
+  const put = await fetch(presigned.upload_url, {
+    method: presigned.method,
+    headers: presigned.headers,
+    body: file,
+  });
+  if (!put.ok) {
+    throw new ApiError(`Upload failed: HTTP ${put.status}`, put.status);
+  }
+
+  await api.post<DesignUploadStatusResponse>(`/uploads/design/${presigned.file_id}/complete`);
+  return waitForUpload(presigned.file_id);
+}
+
+/**
+ * Processing status of an upload
+ */
+export async function getUploadStatus(fileId: string): Promise<DesignUploadStatusResponse> {
+  return api.get<DesignUploadStatusResponse>(`/uploads/${fileId}/status`);
+}
+
+/**
+ * Poll an upload until it is ready; rejects if processing fails
+ */
+export async function waitForUpload(
+  fileId: string,
+  intervalMs: number = POLL_INTERVAL_MS,
+  timeoutMs: number = POLL_TIMEOUT_MS
+): Promise<UploadDesignResponse> {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const status = await getUploadStatus(fileId);
+    if (status.status === "ready" && status.upload) {
+      return status.upload;
+    }
+    if (status.status === "failed") {
+      throw new ApiError(status.error || "File could not be processed", 422, status);
+    }
+    if (Date.now() > deadline) {
+      throw new ApiError("Timed out waiting for the file to be processed", 504, status);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
 }
 
 /**
@@ -24,5 +99,8 @@ export async function validateDxf(file: File): Promise<DXFValidationResult> {
 
 export const uploadsApi = {
   uploadDesign,
+  uploadDesignDirect,
+  getUploadStatus,
+  waitForUpload,
   validateDxf,
 };
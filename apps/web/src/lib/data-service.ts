@@ -55,7 +55,7 @@ function transformApiProduct(apiProduct: ProductListItem | ApiProductDetail): Pr
       name: v.sku.split("-").pop() || v.sku, // Extract name from SKU
       price: v.price,
       compareAtPrice: v.compare_at_price || undefined,
-      inventoryQty: v.inventory_qty,
+      inventoryQty: v.available_qty ?? v.inventory_qty,
       weight: v.weight,
       dimensions: parseDimensions(v.dimensions_mm),
     })),
@@ -276,6 +276,8 @@ export interface DesignTemplate {
   category: string;
   description?: string;
   previewUrl: string;
+  /** WebP srcset of pre-rendered previews, when the API has rendered them */
+  previewSrcSet?: string;
 }
 
 /**
@@ -298,12 +300,21 @@ export async function getDesignTemplates(category?: string): Promise<DesignTempl
       total: number;
     }>(`/design-templates${queryParams}`);
 
-    return response.templates.map((t) => ({
-      id: t.id,
-      name: t.name,
-      category: t.category,
-      previewUrl: t.thumbnail || t.svg_path || "/images/templates/placeholder.svg",
-    }));
+    return response.templates.map((t) => {
+      const previews = t.previews ?? [];
+      const pngPreview = previews.find((p) => p.format === "png" && p.size === 192);
+      const webpPreviews = previews.filter((p) => p.format === "webp");
+      return {
+        id: t.id,
+        name: t.name,
+        category: t.category,
+        previewUrl:
+          pngPreview?.url || t.thumbnail || t.svg_path || "/images/templates/placeholder.svg",
+        previewSrcSet: webpPreviews.length
+          ? webpPreviews.map((p) => `${p.url} ${p.size}w`).join(", ")
+          : undefined,
+      };
+    });
   } catch (error) {
     console.warn("Failed to fetch design templates from API, using mock data:", error);
     if (category) {